@@ -18,6 +18,63 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import from our module
 from src.translator import model_load, process_excel, process_directory
+from src.translator.journal import job_id_for, job_journal
+from src.translator.manifest import translation_settings
+
+
+def translate_input(args) -> bool:
+    """Translate the file or directory given on the command line."""
+    if args.file:
+        # Single file processing
+        if not os.path.exists(args.file):
+            print(f"❌ File not found: {args.file}")
+            return False
+            
+        print(f"📄 Processing file: {args.file}")
+        output_path = args.output
+        
+        result = process_excel(
+            input_path=args.file,
+            output_path=output_path,
+            source_lang=args.source,
+            target_lang=args.target,
+            country=args.country,
+            engine=args.engine,
+            streaming=args.streaming,
+            workers=args.workers,
+            incremental=args.incremental
+        )
+        
+        if not result:
+            print("❌ Translation failed")
+            return False
+            
+    elif args.dir:
+        # Directory processing
+        if not os.path.isdir(args.dir):
+            print(f"❌ Directory not found: {args.dir}")
+            return False
+            
+        print(f"📁 Processing directory: {args.dir}")
+        output_dir = args.output
+        
+        results = process_directory(
+            input_dir=args.dir,
+            output_dir=output_dir,
+            source_lang=args.source,
+            target_lang=args.target,
+            country=args.country,
+            engine=args.engine,
+            streaming=args.streaming,
+            workers=args.workers,
+            incremental=args.incremental
+        )
+        
+        if not results:
+            print("⚠️ No files were translated successfully")
+            return False
+    
+    return True
 
 
 def main():
@@ -41,6 +98,21 @@ def main():
                         help='Path for saving translated output (file or directory)')
     parser.add_argument('--country', type=str, default="",
                         help='Target country context (e.g., Mexico, Vietnam, Japan)')
+    parser.add_argument('--engine', choices=['auto', 'excel', 'openpyxl', 'ooxml'], default='auto',
+                        help='Use Microsoft Excel (xlwings), edit files directly with openpyxl (no Excel needed), '
+                             'or rewrite the .xlsx parts directly (ooxml, fastest; also translates shapes, charts, '
+                             'comments and headers/footers without Excel)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Files (with --dir) or batches (with --file) processed concurrently; '
+                             'all requests share the --rpm limit')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Translate very large .xlsx files row window by row window with bounded memory')
+    parser.add_argument('--resume', type=str, metavar='JOB',
+                        help='Continue an interrupted run: rerun the same command with the job name it printed, '
+                             'batches already translated are not sent again')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only translate cells changed since the last run into the same output '
+                             '(keeps <output>.manifest.json next to each translated file)')
     
     # API configuration
     parser.add_argument('--endpoint', choices=['OpenAI', 'Groq', 'TogetherAI', 'Ollama', 'CUSTOM'],
@@ -93,47 +165,16 @@ def main():
     # Process file or directory
     start_time = time.time()
     
-    if args.file:
-        # Single file processing
-        if not os.path.exists(args.file):
-            print(f"❌ File not found: {args.file}")
-            return 1
-            
-        print(f"📄 Processing file: {args.file}")
-        output_path = args.output
-        
-        result = process_excel(
-            input_path=args.file,
-            output_path=output_path,
-            source_lang=args.source,
-            target_lang=args.target,
-            country=args.country
-        )
-        
-        if not result:
-            print("❌ Translation failed")
-            return 1
-            
-    elif args.dir:
-        # Directory processing
-        if not os.path.isdir(args.dir):
-            print(f"❌ Directory not found: {args.dir}")
-            return 1
-            
-        print(f"📁 Processing directory: {args.dir}")
-        output_dir = args.output
-        
-        results = process_directory(
-            input_dir=args.dir,
-            output_dir=output_dir,
-            source_lang=args.source,
-            target_lang=args.target,
-            country=args.country
-        )
-        
-        if not results:
-            print("⚠️ No files were translated successfully")
+    # Journal completed batches so an interrupted run can be resumed
+    job_id = args.resume or job_id_for(args.file or args.dir, args.target)
+    if not args.resume:
+        print(f"📓 Job '{job_id}' (if interrupted, rerun with --resume {job_id})")
+    settings = translation_settings(args.source, args.target, args.country, detect_languages=True)
+    with job_journal(job_id, resume=bool(args.resume), settings=settings) as journal:
+        if not translate_input(args):
+            print(f"📓 Finished batches are kept; rerun with --resume {job_id} to continue")
             return 1
+        journal.discard()
     
     # Calculate and display execution time
     end_time = time.time()
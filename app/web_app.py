@@ -35,11 +35,8 @@ from src.translator import (
     #TRANSLATION_STYLES
 )
 
-# Import PDF processor
-from src.translator.pdf_processor import process_pdf
-
-# Import the new OCR processor
-from app.ocr_processor import process_pdf_ocr
+# PDF and OCR processors are imported inside their handlers so that their
+# dependencies (reportlab, pytesseract, pdf2image) load only when used
 
 # --- Constants for UI --- 
 
@@ -109,6 +106,9 @@ def translate_content(
     
     # For file uploads
     upload_file: Optional[tempfile._TemporaryFileWrapper] = None,
+    
+    # Reflection options
+    fused_reflection: bool = False,
 ):
     """Translate text or document content."""
     if not source_text and not upload_file:
@@ -186,7 +186,8 @@ def translate_content(
                 full_response=True,
                 translation_style=translation_style,
                 custom_style_instructions=custom_style_instructions,
-                terminology_file=terminology_path
+                terminology_file=terminology_path,
+                fused_reflection=fused_reflection
             )
         except Exception as e:
             raise gr.Error(f"Error in multi-model translation: {e}")
@@ -202,7 +203,8 @@ def translate_content(
                 full_response=True,
                 translation_style=translation_style,
                 custom_style_instructions=custom_style_instructions,
-                terminology_file=terminology_path
+                terminology_file=terminology_path,
+                fused_reflection=fused_reflection
             )
         except Exception as e:
             raise gr.Error(f"Error in translation: {e}")
@@ -240,6 +242,7 @@ def translate_pdf(
     
     # PDF file upload
     pdf_file: Optional[tempfile._TemporaryFileWrapper] = None,
+    preserve_layout: bool = False,
 ) -> Tuple[str, str]:
     """Process and translate a PDF file."""
     if not pdf_file:
@@ -284,6 +287,8 @@ def translate_pdf(
     
     # Process PDF file
     try:
+        from src.translator.pdf_processor import process_pdf
+        
         pdf_path, txt_path = process_pdf(
             input_path=file_path,
             output_path=output_path,
@@ -293,11 +298,15 @@ def translate_pdf(
             detect_languages=detect_languages,
             translation_style=translation_style,
             custom_style_instructions=custom_style_instructions,
-            terminology_file=terminology_path
+            terminology_file=terminology_path,
+            preserve_layout=preserve_layout
         )
         
         if not txt_path or not os.path.exists(txt_path):
             raise gr.Error("Translation failed. Please check the logs.")
+        
+        if preserve_layout and pdf_path and os.path.exists(pdf_path):
+            return pdf_path, f"PDF file translated successfully with its original layout."
             
         return txt_path, f"PDF file translated successfully. Text version available for download."
         
@@ -476,6 +485,7 @@ def handle_pdf_ocr_click(pdf_file, lang_name):
     )
 
     # Call the backend OCR processor
+    from app.ocr_processor import process_pdf_ocr
     extracted_text, error_message = process_pdf_ocr(pdf_file_path, lang_code)
 
     # Prepare updates for the UI based on the result
@@ -673,8 +683,8 @@ def create_ui():
                 )
                 
                 terminology_file = gr.File(
-                    label="Custom Terminology File (format: source_term=target_term, one per line)",
-                    file_types=[".txt"],
+                    label="Custom Terminology File (source_term=target_term per line, or TSV/CSV/XLSX with two columns)",
+                    file_types=[".txt", ".tsv", ".csv", ".xlsx"],
                     type="filepath"
                 )
                 
@@ -715,6 +725,12 @@ def create_ui():
                         value=False,
                         info="Enable JSON mode for structured output"
                     )
+                    
+                    fused_reflection = gr.Checkbox(
+                        label="Single-call Reflection",
+                        value=False,
+                        info="Get the reflection and the improved translation from one JSON-mode request (faster)"
+                    )
                 
             # Main content area with tabs
             with gr.Column(scale=4):
@@ -824,6 +840,11 @@ def create_ui():
                             type="filepath"
                         )
                         
+                        pdf_preserve_layout = gr.Checkbox(
+                            label="Giữ nguyên bố cục trang (xuất tệp PDF)",
+                            value=False
+                        )
+                        
                         pdf_message = gr.Textbox(
                             label="Trạng thái",
                             interactive=False
@@ -924,7 +945,7 @@ def create_ui():
                 source_lang, target_lang, source_text, country,
                 max_tokens, temperature, rpm,
                 translation_style, custom_style_instructions, terminology_file,
-                upload_btn
+                upload_btn, fused_reflection
             ],
             outputs=[output_init, output_reflect, output_final, output_diff]
         )
@@ -937,7 +958,7 @@ def create_ui():
                 source_lang, target_lang, country,
                 temperature, rpm, detect_languages,
                 translation_style, custom_style_instructions, terminology_file,
-                pdf_upload
+                pdf_upload, pdf_preserve_layout
             ],
             outputs=[pdf_output, pdf_message]
         )
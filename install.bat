@@ -8,6 +8,9 @@ call myenv\Scripts\activate
 :: Install requirements
 pip install -r requirements.txt
 
+:: Pre-seed tiktoken encodings so token counting works offline
+python run.py setup
+
 echo Installation completed!
 echo Please run run.bat to start the application.
 pause 
\ No newline at end of file
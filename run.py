@@ -41,6 +41,55 @@ def main():
                               default="OpenAI", help="Model provider")
     excel_parser.add_argument("--model", help="Model name (defaults to provider's recommended model)")
     excel_parser.add_argument("--apikey", help="API key (will use from .env if not provided)")
+    excel_parser.add_argument("--engine", choices=["auto", "excel", "openpyxl", "ooxml"], default="auto",
+                              help="Use Microsoft Excel (xlwings), edit files directly with openpyxl, "
+                                   "or translate only the shared strings table (ooxml)")
+    excel_parser.add_argument("--workers", type=int, default=1,
+                              help="Files (with --dir) or batches (with --file) processed concurrently")
+    excel_parser.add_argument("--streaming", action="store_true",
+                              help="Translate very large .xlsx files with bounded memory")
+    excel_parser.add_argument("--resume", metavar="JOB",
+                              help="Continue an interrupted run of the same command from its job journal")
+    excel_parser.add_argument("--incremental", action="store_true",
+                              help="Only translate cells changed since the last run into the same output")
+    
+    # PDF command
+    pdf_parser = subparsers.add_parser("pdf", help="Translate a PDF file")
+    pdf_parser.add_argument("--source", default="English", help="Source language (used with --no-detect)")
+    pdf_parser.add_argument("--target", required=True, help="Target language (e.g., Spanish)")
+    pdf_parser.add_argument("--file", required=True, help="PDF file to translate")
+    pdf_parser.add_argument("--output", help="Output file (a .pdf and a .txt are written)")
+    pdf_parser.add_argument("--country", default="", help="Target country for localization")
+    pdf_parser.add_argument("--endpoint", choices=["OpenAI", "Groq", "TogetherAI", "Ollama", "CUSTOM"],
+                            default="OpenAI", help="Model provider")
+    pdf_parser.add_argument("--model", help="Model name (defaults to provider's recommended model)")
+    pdf_parser.add_argument("--apikey", help="API key (will use from .env if not provided)")
+    pdf_parser.add_argument("--batch-size", type=int, default=100, help="Paragraphs per translation request")
+    pdf_parser.add_argument("--no-detect", action="store_true", help="Translate everything from --source")
+    pdf_parser.add_argument("--terminology", help="Custom terminology file")
+    pdf_mode = pdf_parser.add_mutually_exclusive_group()
+    pdf_mode.add_argument("--preserve-layout", action="store_true",
+                          help="Write the translation into the original pages")
+    pdf_mode.add_argument("--streaming", action="store_true",
+                          help="Translate very large PDFs a window of pages at a time")
+    pdf_parser.add_argument("--window-pages", type=int, default=20, help="Pages per window with --streaming")
+    pdf_parser.add_argument("--resume", metavar="JOB",
+                            help="Continue an interrupted run of the same command from its job journal")
+    
+    # Plan command
+    plan_parser = subparsers.add_parser("plan", help="Estimate tokens, calls, time and cost of a job without translating")
+    plan_parser.add_argument("paths", nargs="+", help="Files or directories to translate (Excel, PDF, Word, text)")
+    plan_parser.add_argument("--source", default="English", help="Source language (e.g., English)")
+    plan_parser.add_argument("--target", required=True, help="Target language (e.g., Spanish)")
+    plan_parser.add_argument("--country", default="", help="Target country for localization")
+    plan_parser.add_argument("--model", default="gpt-4o", help="Model the job will run on (marked in the cost table)")
+    plan_parser.add_argument("--rpm", type=int, default=60, help="Requests per minute limit")
+    plan_parser.add_argument("--tpm", type=int, help="Tokens per minute limit of the provider")
+    plan_parser.add_argument("--batch-size", type=int, default=100, help="Texts per translation request")
+    plan_parser.add_argument("--no-detect", action="store_true", help="Plan without per-text language detection")
+    plan_parser.add_argument("--terminology", help="Custom terminology file")
+    plan_parser.add_argument("--ocr", metavar="LANG",
+                             help="Read PDFs with OCR (Tesseract language code, e.g. eng, vie)")
     
     # Text command
     text_parser = subparsers.add_parser("text", help="Translate text directly from command line")
@@ -55,6 +104,11 @@ def main():
     text_parser.add_argument("--apikey", help="API key (will use from .env if not provided)")
     text_parser.add_argument("--type", choices=["general", "technical", "literary", "business", "legal", "medical"],
                              default="general", help="Type of content to translate")
+    text_parser.add_argument("--resume", metavar="JOB",
+                             help="Continue an interrupted run of the same command from its job journal")
+    
+    # Setup command
+    subparsers.add_parser("setup", help="Download the tokenizer files so token counting works offline")
     
     # Parse arguments
     args = parser.parse_args()
@@ -137,6 +191,13 @@ def main():
                 sys.argv.extend(["--dir", args.dir])
             if args.output:
                 sys.argv.extend(["--output", args.output])
+            sys.argv.extend(["--engine", args.engine, "--workers", str(args.workers)])
+            if args.streaming:
+                sys.argv.append("--streaming")
+            if args.incremental:
+                sys.argv.append("--incremental")
+            if args.resume:
+                sys.argv.extend(["--resume", args.resume])
             
             # Run the Excel CLI
             return excel_main()
@@ -146,6 +207,133 @@ def main():
             print("Please install the required packages: pip install -r requirements.txt")
             return 1
         
+    elif args.command == "pdf":
+        # Check if we need to set a default model based on endpoint
+        model = args.model
+        if not model:
+            endpoint_model_map = {
+                "Groq": "llama3-70b-8192",
+                "OpenAI": "gpt-4o",
+                "Gemini": "gemini-2.5-flash-preview-04-17",
+                "TogetherAI": "Qwen/Qwen2-72B-Instruct", 
+                "Ollama": "llama3",
+                "CUSTOM": "",
+            }
+            model = endpoint_model_map.get(args.endpoint, "gpt-4o")
+        
+        # Add directory to path
+        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+        
+        try:
+            from src.translator import model_load
+            from src.translator.journal import job_id_for, job_journal
+            from src.translator.manifest import translation_settings
+            from src.translator.pdf_processor import process_pdf
+            
+            # Get API key from argument or environment
+            api_key = args.apikey
+            if not api_key and args.endpoint != 'Ollama':
+                from dotenv import load_dotenv
+                load_dotenv()
+                api_key = os.getenv(f"{args.endpoint.upper()}_API_KEY")
+            
+            model_load(endpoint=args.endpoint, model=model, api_key=api_key)
+            
+            # Journal finished batches and detected languages so an interrupted run can be resumed
+            job_id = args.resume or job_id_for(args.file, args.target)
+            if not args.resume:
+                print(f"📓 Job '{job_id}' (if interrupted, rerun with --resume {job_id})")
+            settings = translation_settings(
+                args.source, args.target, args.country,
+                detect_languages=not args.no_detect, terminology_file=args.terminology,
+            )
+            with job_journal(job_id, resume=bool(args.resume), settings=settings) as journal:
+                pdf_path, txt_path = process_pdf(
+                    args.file,
+                    args.output,
+                    source_lang=args.source,
+                    target_lang=args.target,
+                    country=args.country,
+                    batch_size=args.batch_size,
+                    detect_languages=not args.no_detect,
+                    terminology_file=args.terminology,
+                    preserve_layout=args.preserve_layout,
+                    streaming=args.streaming,
+                    window_pages=args.window_pages,
+                    resume=bool(args.resume)
+                )
+                if not pdf_path:
+                    print(f"📓 Finished batches are kept; rerun with --resume {job_id} to continue")
+                    return 1
+                journal.discard()
+            return 0
+            
+        except ImportError as e:
+            print(f"❌ Error: {e}")
+            print("Please install the required packages: pip install -r requirements.txt")
+            return 1
+        except Exception as e:
+            print(f"❌ Error during translation: {e}")
+            return 1
+        
+    elif args.command == "plan":
+        # Add directory to path
+        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+        
+        try:
+            from src.translator.planner import format_plan, plan_job
+            
+            pdf_extractor = None
+            if args.ocr:
+                from app.ocr_processor import process_pdf_ocr
+                
+                def pdf_extractor(path):
+                    text, error = process_pdf_ocr(path, args.ocr)
+                    if error:
+                        print(f"   ⚠️ OCR of {os.path.basename(path)}: {error}")
+                    return text
+            
+            print(f"🧮 Planning translation to {args.target} (nothing is sent to the model)")
+            plan = plan_job(
+                args.paths,
+                source_lang=args.source,
+                target_lang=args.target,
+                country=args.country,
+                batch_size=args.batch_size,
+                detect_languages=not args.no_detect,
+                terminology_file=args.terminology,
+                rpm=args.rpm,
+                tpm=args.tpm,
+                pdf_extractor=pdf_extractor
+            )
+            print()
+            print(format_plan(plan, args.model))
+            return 0 if plan.files else 1
+            
+        except ImportError as e:
+            print(f"❌ Error: {e}")
+            print("Please install the required packages: pip install -r requirements.txt")
+            return 1
+        
+    elif args.command == "setup":
+        # Add directory to path
+        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+        
+        try:
+            from src.translator.translator_core import seed_tiktoken_cache
+            
+            cache_dir = seed_tiktoken_cache()
+            print(f"✅ Tokenizer files cached in: {cache_dir}")
+            return 0
+            
+        except ImportError as e:
+            print(f"❌ Error: {e}")
+            print("Please install the required packages: pip install -r requirements.txt")
+            return 1
+        except Exception as e:
+            print(f"❌ Error downloading tokenizer files: {e}")
+            return 1
+        
     elif args.command == "text":
         # Get input text
         if args.input:
@@ -178,6 +366,8 @@ def main():
         # Translate text
         try:
             from src.translator import model_load, simple_translator
+            from src.translator.journal import job_id_for, job_journal
+            from src.translator.manifest import translation_settings
             
             # Get API key from argument or environment
             api_key = args.apikey
@@ -194,13 +384,19 @@ def main():
                 api_key=api_key
             )
             
-            # Translate the text
-            translation = simple_translator(
-                source_lang=args.source,
-                target_lang=args.target,
-                source_text=source_text,
-                country=args.country
-            )
+            # Translate the text, journaling finished chunks so long runs can be resumed
+            job_id = args.resume or job_id_for(args.input or "stdin", args.target)
+            if not args.resume:
+                print(f"📓 Job '{job_id}' (if interrupted, rerun with --resume {job_id})")
+            settings = translation_settings(args.source, args.target, args.country)
+            with job_journal(job_id, resume=bool(args.resume), settings=settings) as journal:
+                translation = simple_translator(
+                    source_lang=args.source,
+                    target_lang=args.target,
+                    source_text=source_text,
+                    country=args.country
+                )
+                journal.discard()
             
             # Output the translation
             if args.output:
@@ -1,51 +1,57 @@
 """
 Advanced Translation Suite - Translator Module
 Combines Translation Agent with Excel processing capabilities
+
+Submodules are imported lazily on first attribute access so that a plain
+text translation does not pay for Excel, PDF or document dependencies.
 """
 
-from .translator_core import (
-    model_load,
-    get_completion,
-    simple_translator,
-    batch_translate,
-    num_tokens_in_string,
-    calculate_chunk_size
-)
-
-from .excel_processor import (
-    process_excel,
-    process_directory,
-    clean_text,
-    should_translate
-)
-
-from .document_utils import (
-    extract_text,
-    extract_pdf,
-    extract_docx,
-    tokenize,
-    diff_texts
-)
-
-__all__ = [
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
     # Core translation functions
-    'model_load',
-    'get_completion',
-    'simple_translator',
-    'batch_translate',
-    'num_tokens_in_string',
-    'calculate_chunk_size',
-    
+    'model_load': 'translator_core',
+    'get_completion': 'translator_core',
+    'get_hedge_stats': 'translator_core',
+    'simple_translator': 'translator_core',
+    'batch_translate': 'translator_core',
+    'num_tokens_in_string': 'translator_core',
+    'calculate_chunk_size': 'translator_core',
+
     # Excel processing functions
-    'process_excel',
-    'process_directory',
-    'clean_text',
-    'should_translate',
-    
+    'process_excel': 'excel_processor',
+    'process_directory': 'excel_processor',
+    'clean_text': 'excel_processor',
+    'should_translate': 'excel_processor',
+
     # Document utilities
-    'extract_text',
-    'extract_pdf',
-    'extract_docx',
-    'tokenize',
-    'diff_texts',
-] 
\ No newline at end of file
+    'extract_text': 'document_utils',
+    'extract_pdf': 'document_utils',
+    'extract_pdf_pages': 'document_utils',
+    'extract_docx': 'document_utils',
+    'tokenize': 'document_utils',
+    'diff_texts': 'document_utils',
+
+    # Text wrapping for output writers
+    'TextLayout': 'text_layout',
+
+    # Dry-run planning
+    'plan_job': 'planner',
+    'format_plan': 'planner',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
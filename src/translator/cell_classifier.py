@@ -0,0 +1,233 @@
+"""
+Cell Classifier for Advanced Translation Suite
+Sorts spreadsheet cells into translatable text and values that never need a
+request (numbers, dates, codes, text already in the target language), one
+column at a time
+"""
+
+import datetime
+import re
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+# Cell categories
+EMPTY = "empty"
+FORMULA = "formula"
+NUMERIC = "numeric"
+DATE = "date"
+CODE = "code"
+TARGET = "target"
+TEXT = "text"
+
+SKIP_CATEGORIES = (EMPTY, FORMULA, NUMERIC, DATE, CODE, TARGET)
+
+NUMERIC_PATTERN = (
+    r"[-+(]?\s*[$€£¥₫]?\s*\d[\d\s,.']*(?:[eE][-+]?\d+)?\s*"
+    r"(?:%|‰|[$€£¥₫đ]|USD|EUR|GBP|JPY|VND|VNĐ)?\)?"
+)
+DATE_PATTERN = (
+    r"\d{4}[-/.]\d{1,2}[-/.]\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+    r"|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}(?:\s\d{1,2}:\d{2}(?::\d{2})?)?"
+    r"|\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AaPp][Mm])?"
+    r"|[QqHh][1-4][-/ ]?\d{2,4}|\d{4}[-/ ]?[QqHh][1-4]"
+)
+CODE_PATTERN = (
+    # Letters and digits mixed in one token: SKU-1234, X200, INV/2024/001
+    r"(?=\S*\d)(?=\S*[A-Za-z])[A-Za-z0-9][\w./#:+-]*"
+    # Upper-case identifiers with separators: ABC-DEF, US_EAST
+    r"|[A-Z0-9]{2,}(?:[-_/.][A-Z0-9]+)+"
+    # Emails and URLs
+    r"|[\w.+-]+@[\w-]+(?:\.[\w-]+)+|(?:https?://|www\.)\S+"
+    # Single characters
+    r"|\S"
+)
+
+NUMERIC_RE = re.compile(NUMERIC_PATTERN)
+DATE_RE = re.compile(DATE_PATTERN)
+CODE_RE = re.compile(CODE_PATTERN)
+LATIN_RE = re.compile(r"[A-Za-z]")
+
+# Scripts that identify a target language on their own
+SCRIPT_PATTERNS = {
+    "Japanese": r"[぀-ヿ]",
+    "Chinese": r"[一-鿿]",
+    "Korean": r"[가-힯]",
+    "Russian": r"[Ѐ-ӿ]",
+    "Ukrainian": r"[Ѐ-ӿ]",
+    "Bulgarian": r"[Ѐ-ӿ]",
+    "Greek": r"[Ͱ-Ͽ]",
+    "Arabic": r"[؀-ۿ]",
+    "Persian": r"[؀-ۿ]",
+    "Urdu": r"[؀-ۿ]",
+    "Hebrew": r"[֐-׿]",
+    "Thai": r"[฀-๿]",
+    "Hindi": r"[ऀ-ॿ]",
+    "Marathi": r"[ऀ-ॿ]",
+    "Bengali": r"[ঀ-৿]",
+    "Tamil": r"[஀-௿]",
+    # Letters only Vietnamese uses among Latin scripts
+    "Vietnamese": r"[ăđơưĂĐƠƯạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ]",
+}
+
+# Scripts that share Latin letters with the source text
+LATIN_SCRIPT_TARGETS = {"Vietnamese"}
+
+# A column is profiled as an ID/numeric/date column when this share of its
+# body cells (everything below the first non-empty cell) has that category
+COLUMN_PROFILE_SHARE = 0.9
+
+# Short single tokens in a profiled column are treated like its other values
+# (e.g. "N/A", "TBD", "USD" in an ID column)
+COLUMN_TOKEN_MAX_LENGTH = 12
+
+
+class ColumnProfile(NamedTuple):
+    """Category counts for one column and the kind of data it holds."""
+    index: int
+    counts: Dict[str, int]
+    kind: str  # NUMERIC, DATE, CODE or TEXT
+
+
+def _target_script_re(target_lang: Optional[str]):
+    pattern = SCRIPT_PATTERNS.get((target_lang or "").strip().title())
+    return re.compile(pattern) if pattern else None
+
+
+def classify_value(value: Any, target_lang: Optional[str] = None) -> str:
+    """Classify a single cell value.
+
+    Args:
+        value: Cell value as returned by the spreadsheet library
+        target_lang: Target language, used to recognise text already translated
+
+    Returns:
+        One of EMPTY, FORMULA, NUMERIC, DATE, CODE, TARGET or TEXT
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return EMPTY
+    if isinstance(value, bool) or isinstance(value, (int, float)):
+        return NUMERIC
+    if isinstance(value, (datetime.date, datetime.time, datetime.datetime)):
+        return DATE
+
+    text = str(value).strip()
+    if not text:
+        return EMPTY
+    if text.startswith("="):
+        return FORMULA
+    if NUMERIC_RE.fullmatch(text):
+        return NUMERIC
+    if DATE_RE.fullmatch(text):
+        return DATE
+    if CODE_RE.fullmatch(text):
+        return CODE
+    script_re = _target_script_re(target_lang)
+    if script_re is not None and script_re.search(text):
+        if target_lang.strip().title() in LATIN_SCRIPT_TARGETS or not LATIN_RE.search(text):
+            return TARGET
+    return TEXT
+
+
+def _classify_column_pandas(pd, values: Sequence[Any], target_lang: Optional[str]) -> List[str]:
+    # Columns repeat heavily (statuses, units, currencies), so classify each
+    # distinct value once and broadcast the result with a vectorized take
+    import numpy as np
+    codes, uniques = pd.factorize(pd.Series(list(values), dtype=object), use_na_sentinel=True)
+    labels = [classify_value(value, target_lang) for value in uniques] + [EMPTY]  # -1 -> EMPTY
+    return np.asarray(labels, dtype=object).take(codes).tolist()
+
+
+def classify_column(values: Sequence[Any], target_lang: Optional[str] = None) -> List[str]:
+    """Classify every value of a column, deduplicating values with pandas when available.
+
+    Args:
+        values: Cell values of one column, top to bottom
+        target_lang: Target language, used to recognise text already translated
+
+    Returns:
+        One category per value
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+    if pd is not None and len(values) > 1:
+        return _classify_column_pandas(pd, values, target_lang)
+    seen: Dict[Any, str] = {}
+    categories = []
+    for value in values:
+        try:
+            category = seen.get(value)
+        except TypeError:  # Unhashable value
+            category = None
+        if category is None:
+            category = classify_value(value, target_lang)
+            try:
+                seen[value] = category
+            except TypeError:
+                pass
+        categories.append(category)
+    return categories
+
+
+def profile_column(index: int, categories: Sequence[str], has_header: bool = True) -> ColumnProfile:
+    """Work out what kind of data a classified column holds.
+
+    With has_header, the first non-empty cell is taken to be a header and is left out.
+    """
+    body = list(categories)
+    for i, category in enumerate(body if has_header else ()):
+        if category != EMPTY:
+            body = body[i + 1:]
+            break
+    counts = Counter(category for category in body if category != EMPTY)
+    total = sum(counts.values())
+    kind = TEXT
+    if total:
+        top, top_count = max(((c, counts[c]) for c in (NUMERIC, DATE, CODE)), key=lambda item: item[1])
+        if top_count / total >= COLUMN_PROFILE_SHARE:
+            kind = top
+    return ColumnProfile(index, dict(counts), kind)
+
+
+def classify_grid(rows: Sequence[Sequence[Any]], target_lang: Optional[str] = None, has_header: bool = True):
+    """Classify a 2D block of cell values column by column.
+
+    Columns profiled as ID, numeric or date columns are skipped as a whole:
+    below the header, short single-token text that did not match any pattern
+    (e.g. "N/A", "TBD") is given the column's kind as well.
+
+    Args:
+        rows: Cell values as a list of rows
+        target_lang: Target language, used to recognise text already translated
+        has_header: Whether the first non-empty cell of each column is a header
+            (False for blocks further down a sheet)
+
+    Returns:
+        Tuple of (categories as a list of rows, list of ColumnProfile)
+    """
+    if not rows:
+        return [], []
+    width = max(len(row) for row in rows)
+    columns = []
+    profiles = []
+    for c in range(width):
+        values = [row[c] if c < len(row) else None for row in rows]
+        categories = classify_column(values, target_lang)
+        profile = profile_column(c, categories, has_header)
+        if profile.kind != TEXT:
+            header_seen = not has_header
+            for r, category in enumerate(categories):
+                if category == EMPTY:
+                    continue
+                if not header_seen:
+                    header_seen = True
+                    continue
+                if category == TEXT:
+                    text = str(values[r]).strip()
+                    if len(text) <= COLUMN_TOKEN_MAX_LENGTH and not any(ch.isspace() for ch in text):
+                        categories[r] = profile.kind
+        columns.append(categories)
+        profiles.append(profile)
+    grid = [[columns[c][r] for c in range(width)] for r in range(len(rows))]
+    return grid, profiles
@@ -4,8 +4,13 @@ Contains functions for extracting text from different file formats
 """
 
 import re
+from collections import deque
 from difflib import Differ
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional
+
+# Pages extracted per task in the process pool: enough to amortize opening
+# the document in the worker, few enough to keep the workers evenly loaded
+PDF_PAGES_PER_TASK = 50
 
 
 def extract_text(path: str) -> str:
@@ -23,29 +28,93 @@ def extract_text(path: str) -> str:
     return file_text
 
 
-def extract_pdf(path: str) -> str:
+def _open_pdf(path: str):
+    try:
+        import pymupdf
+    except ImportError:
+        raise ImportError(
+            "PyMuPDF is not installed. Please install with: pip install pymupdf"
+        )
+    return pymupdf.open(path)
+
+
+def _extract_page_range(path: str, page_numbers: List[int]) -> List[str]:
+    """Text of some pages, read by a worker process with its own document."""
+    doc = _open_pdf(path)
+    try:
+        return [doc[number].get_text() for number in page_numbers]
+    finally:
+        doc.close()
+
+
+def extract_pdf_pages(
+    path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Yield the text of a PDF page by page, in page order.
+
+    Pages are read lazily, so the whole text is never held at once. With
+    workers > 1 the pages are split into ranges of PDF_PAGES_PER_TASK that
+    worker processes extract in parallel, each with its own PyMuPDF
+    document; only a few ranges per worker are in flight at a time. (As
+    with any process pool, scripts using workers need an
+    ``if __name__ == "__main__":`` guard on Windows and macOS.)
+    
+    Args:
+        path: Path to the PDF file
+        pages: 0-based page numbers to extract (e.g. range(10, 20)); all pages if None
+        workers: Number of processes extracting pages; None or 1 reads them in this process
+        
+    Yields:
+        Text of each requested page
+    """
+    if not workers or workers <= 1:
+        doc = _open_pdf(path)
+        try:
+            for number in (range(doc.page_count) if pages is None else pages):
+                yield doc[number].get_text()
+        finally:
+            doc.close()
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    if pages is None:
+        doc = _open_pdf(path)
+        pages = range(doc.page_count)
+        doc.close()
+    page_numbers = list(pages)
+    ranges = [page_numbers[i:i + PDF_PAGES_PER_TASK] for i in range(0, len(page_numbers), PDF_PAGES_PER_TASK)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        queued = iter(ranges)
+        for page_range in queued:
+            in_flight.append(executor.submit(_extract_page_range, path, page_range))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            texts = in_flight.popleft().result()
+            page_range = next(queued, None)
+            if page_range is not None:
+                in_flight.append(executor.submit(_extract_page_range, path, page_range))
+            yield from texts
+
+
+def extract_pdf(path: str, workers: Optional[int] = None) -> str:
     """
     Extract text from a PDF file.
     
     Args:
         path: Path to the PDF file
+        workers: Number of processes extracting pages (see extract_pdf_pages)
         
     Returns:
         Extracted text content
     """
-    try:
-        import pymupdf
-        
-        doc = pymupdf.open(path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
-        
-    except ImportError:
-        raise ImportError(
-            "PyMuPDF is not installed. Please install with: pip install pymupdf"
-        )
+    return "".join(extract_pdf_pages(path, workers=workers))
 
 
 def extract_docx(path: str) -> str:
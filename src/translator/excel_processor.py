@@ -5,11 +5,21 @@ Handles Excel file reading, cell detection, and translation
 
 import os
 import re
+import sys
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import List, Dict, Any, Callable, Optional, Tuple, TypeVar, Union
 
 # Import translator utilities
-from .translator_core import batch_translate, detect_language
+from .translator_core import batch_translate, detect_text_languages
+from .translation_memory import TranslationMemory
+from .masking import TemplateCache
+from .manifest import TranslationManifest, manifest_path_for, translation_settings
+from .cell_classifier import FORMULA, TEXT, classify_grid, classify_value
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def clean_text(text: str) -> str:
@@ -20,14 +30,344 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
-def should_translate(text: str) -> bool:
+def _column_letter(index: int) -> str:
+    """Convert a 1-based column number to its Excel letter (1 -> A, 28 -> AB)."""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def should_translate(text: str, target_lang: Optional[str] = None) -> bool:
     """Check if a cell needs translation."""
     text = clean_text(text)
     if not text or len(text) < 2:
         return False
-    if re.match(r'^[\d\s,.-]+$', text):  # Contains only numbers and number formatting characters
+    # Numbers, dates, codes, formulas and text already in the target language
+    return classify_value(text, target_lang) == TEXT
+
+
+def translate_cell_texts(
+    texts: List[str],
+    source_lang: str,
+    target_lang: str,
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    translation_memory: Optional[TranslationMemory] = None,
+    template_cache: Optional[TemplateCache] = None,
+    labels: Optional[List[str]] = None,
+    manifest: Optional[TranslationManifest] = None,
+    keys: Optional[List[str]] = None,
+    mixed_languages: bool = True,
+) -> List[Optional[str]]:
+    """
+    Translate cleaned cell/shape texts in batches, grouped by detected language.
+    
+    Shared by the Excel (xlwings) and openpyxl engines.
+    
+    Args:
+        texts: Cleaned texts to translate
+        source_lang: Source language (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of texts to translate in one batch
+        detect_languages: Whether to detect the language of each text
+        translation_style: Style of translation
+        custom_style_instructions: Additional instructions for translation style
+        terminology_file: Path to custom terminology file
+        translation_memory: Memory shared by all batches of the job
+        template_cache: Template cache shared by all batches of the job
+        labels: Optional names of the texts (e.g. cell addresses) for log messages
+        manifest: Manifest of a previous run; unchanged texts reuse its translations
+        keys: Manifest keys of the texts (e.g. "Sheet1!B12"), required with manifest
+        mixed_languages: Fill batches with texts of any detected language, each
+            sent with its own source language, instead of batching every
+            language separately
+        
+    Returns:
+        One translation per text, or None where the text should be left unchanged
+    """
+    results: List[Optional[str]] = [None] * len(texts)
+    pending = list(range(len(texts)))
+    
+    # Reuse translations of cells that did not change since the last run
+    if manifest is not None:
+        pending = []
+        for index, text in enumerate(texts):
+            previous = manifest.get(keys[index], text)
+            if previous is None:
+                pending.append(index)
+            else:
+                results[index] = previous
+        if len(pending) < len(texts):
+            print(f"   ♻️ Reusing {len(texts) - len(pending)} unchanged cells from the last run")
+    
+    # Source language of each text that needs translating
+    text_langs: Dict[int, str] = {}
+    if detect_languages:
+        # A resumed job also keeps the languages it already detected
+        detected_langs = detect_text_languages([texts[index] for index in pending], batch_size)
+        for index, detected_lang in zip(pending, detected_langs):
+            # Skip if already in target language
+            if detected_lang.lower() == target_lang.lower():
+                label = labels[index] if labels else f"text {index + 1}"
+                print(f"   ⏩ Skipping {label} (already in {detected_lang})")
+                continue
+            text_langs[index] = detected_lang
+    else:
+        text_langs = {index: source_lang for index in pending}
+    
+    # Group text indices by source language, or keep one group when languages
+    # share batches (a few cells per language would each cost a request)
+    language_groups: Dict[str, List[int]] = {}
+    for index, lang in text_langs.items():
+        language_groups.setdefault(lang, []).append(index)
+    if mixed_languages and len(language_groups) > 1:
+        print(f"   🌐 Batching {len(language_groups)} source languages together: {', '.join(language_groups)}")
+        language_groups = {"mixed languages": list(text_langs)}
+    
+    for lang, indices in language_groups.items():
+        print(f"   🔄 Translating {len(indices)} cells from {lang} to {target_lang}")
+        total_batches = (len(indices) - 1) // batch_size + 1
+        
+        for i in range(0, len(indices), batch_size):
+            batch_indices = indices[i:i+batch_size]
+            current_batch_num = i // batch_size + 1
+            
+            print(f"   📦 Translating batch {current_batch_num}/{total_batches} ({len(batch_indices)} texts)")
+            
+            # Translate batch - key function that connects to translator_core
+            translated_batch = batch_translate(
+                texts=[texts[j] for j in batch_indices],
+                source_lang=lang,
+                target_lang=target_lang,
+                country=country,
+                translation_style=translation_style,
+                custom_style_instructions=custom_style_instructions,
+                terminology_file=terminology_file,
+                translation_memory=translation_memory,
+                template_cache=template_cache,
+                source_langs=[text_langs[j] for j in batch_indices]
+            )
+            
+            for j, translated in zip(batch_indices, translated_batch):
+                results[j] = translated
+                # Unchanged output may be a failed batch; leave it to be retried next run
+                if manifest is not None and translated != texts[j]:
+                    manifest.record(keys[j], texts[j], translated)
+    
+    return results
+
+
+def open_manifest(
+    output_path: str,
+    source_lang: str,
+    target_lang: str,
+    country: str,
+    detect_languages: bool,
+    translation_style: str,
+    custom_style_instructions: str,
+    terminology_file: Optional[str],
+) -> TranslationManifest:
+    """
+    Load the manifest kept next to output_path by the previous incremental run.
+    
+    The manifest only applies to runs with the same settings; changing the
+    languages, style or terminology file starts a fresh one.
+    """
+    settings = translation_settings(
+        source_lang, target_lang, country, detect_languages,
+        translation_style, custom_style_instructions, terminology_file,
+    )
+    manifest = TranslationManifest.load(manifest_path_for(output_path), settings)
+    if len(manifest):
+        print(f"   📒 Incremental run: {len(manifest)} translated cells in {manifest.path}")
+    return manifest
+
+
+def save_manifest(manifest: Optional[TranslationManifest]) -> None:
+    """Save an incremental run's manifest after its output file has been written."""
+    if manifest is None:
+        return
+    try:
+        manifest.save()
+        print(f"   📒 Manifest saved: {manifest.path} ({manifest.reused} cells reused)")
+    except OSError as e:
+        print(f"   ⚠️ Could not save manifest {manifest.path}: {str(e)}")
+
+
+class BatchPipeline:
+    """
+    Scan -> translate -> write pipeline with a bounded number of batches in flight.
+    
+    Items are added on the calling thread and grouped into batches of
+    batch_size. Full batches are translated on up to `workers` threads while
+    the caller keeps scanning, and write(batch, translations) is called on the
+    calling thread (the only one that touches the workbook) as soon as a batch
+    comes back. add() blocks while max_pending batches are in flight, so the
+    scanner never runs far ahead of translation.
+    """
+    
+    def __init__(
+        self,
+        translate: Callable[[List[T]], List[R]],
+        write: Callable[[List[T], List[R]], None],
+        batch_size: int = 100,
+        workers: int = 1,
+        max_pending: Optional[int] = None,
+    ):
+        self._translate = translate
+        self._write = write
+        self._batch_size = max(1, batch_size)
+        self._max_pending = max_pending or 2 * max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="translate")
+        self._buffer: List[T] = []
+        self._in_flight: Dict[Any, List[T]] = {}
+        self.batches = 0
+    
+    def add(self, item: T) -> None:
+        """Queue one item; a full batch is dispatched at once."""
+        self._buffer.append(item)
+        if len(self._buffer) >= self._batch_size:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Dispatch the items queued so far as a (possibly partial) batch."""
+        if not self._buffer:
+            return
+        while len(self._in_flight) >= self._max_pending:
+            self._write_finished(block=True)
+        batch, self._buffer = self._buffer, []
+        self._in_flight[self._executor.submit(self._translate, batch)] = batch
+        self.batches += 1
+        self._write_finished(block=False)
+    
+    def _write_finished(self, block: bool) -> None:
+        if not self._in_flight:
+            return
+        done, _ = wait(self._in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            batch = self._in_flight.pop(future)
+            self._write(batch, future.result())
+    
+    def close(self) -> None:
+        """Dispatch the last batch and write everything still in flight."""
+        self.flush()
+        while self._in_flight:
+            self._write_finished(block=True)
+        self._executor.shutdown()
+    
+    def __enter__(self) -> "BatchPipeline":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _read_shape_text(shape) -> Optional[str]:
+    """Get the text of an Excel shape through the COM API, trying each text property."""
+    # Method 1: TextFrame
+    try:
+        if hasattr(shape, 'TextFrame') and shape.TextFrame.HasText:
+            return shape.TextFrame.Characters().Text
+    except Exception:
+        pass
+    
+    # Method 2: TextFrame2
+    try:
+        if hasattr(shape, 'TextFrame2'):
+            text = shape.TextFrame2.TextRange.Text
+            if text:
+                return text
+    except Exception:
+        pass
+    
+    # Method 3: AlternativeText
+    try:
+        if hasattr(shape, 'AlternativeText') and shape.AlternativeText:
+            return shape.AlternativeText
+    except Exception:
+        pass
+    
+    # Method 4: OLEFormat (for OLE objects)
+    try:
+        if hasattr(shape, 'OLEFormat') and hasattr(shape.OLEFormat, 'Object'):
+            if hasattr(shape.OLEFormat.Object, 'Text') and shape.OLEFormat.Object.Text:
+                return shape.OLEFormat.Object.Text
+    except Exception:
+        pass
+    
+    # Method 5: TextEffect (for WordArt)
+    try:
+        if hasattr(shape, 'TextEffect') and hasattr(shape.TextEffect, 'Text'):
+            return shape.TextEffect.Text
+    except Exception:
+        pass
+    
+    return None
+
+
+def _write_shape_text(shape, text: str) -> bool:
+    """Set the text of an Excel shape through the COM API; returns whether it worked."""
+    # Method 1: TextFrame
+    try:
+        if hasattr(shape, 'TextFrame') and shape.TextFrame.HasText:
+            shape.TextFrame.Characters().Text = text
+            return True
+    except Exception:
+        pass
+    
+    # Method 2: TextFrame2
+    try:
+        if hasattr(shape, 'TextFrame2'):
+            shape.TextFrame2.TextRange.Text = text
+            return True
+    except Exception:
+        pass
+    
+    # Method 3: AlternativeText
+    try:
+        if hasattr(shape, 'AlternativeText'):
+            shape.AlternativeText = text
+            return True
+    except Exception:
+        pass
+    
+    # Method 4: TextEffect (for WordArt)
+    try:
+        if hasattr(shape, 'TextEffect') and hasattr(shape.TextEffect, 'Text'):
+            shape.TextEffect.Text = text
+            return True
+    except Exception:
+        pass
+    
+    # Method 5: OLEFormat
+    try:
+        if hasattr(shape, 'OLEFormat') and hasattr(shape.OLEFormat, 'Object'):
+            if hasattr(shape.OLEFormat.Object, 'Text'):
+                shape.OLEFormat.Object.Text = text
+                return True
+    except Exception:
+        pass
+    
+    return False
+
+
+def _excel_app_available() -> bool:
+    """Whether xlwings is installed and can drive a local Excel installation."""
+    if sys.platform not in ("win32", "darwin"):
         return False
-    if text.startswith('='):  # Excel formula
+    try:
+        import xlwings  # noqa: F401
+    except ImportError:
         return False
     return True
 
@@ -43,6 +383,11 @@ def process_excel(
     translation_style: str = "General",
     custom_style_instructions: str = "",
     terminology_file: Optional[str] = None,
+    engine: str = "auto",
+    streaming: bool = False,
+    window_rows: int = 1000,
+    workers: int = 1,
+    incremental: bool = False,
 ) -> str:
     """
     Process an Excel file: find text to translate, translate it, and save the result.
@@ -58,26 +403,139 @@ def process_excel(
         translation_style: Style of translation (e.g., "General", "Technical", "Literary")
         custom_style_instructions: Additional instructions for translation style
         terminology_file: Path to custom terminology file
+        engine: "excel" to drive Microsoft Excel through xlwings (also translates
+            shapes), "openpyxl" to edit the file directly without Excel,
+            "ooxml" to translate only the shared strings table of an .xlsx
+            (fastest on large, repetitive workbooks), or "auto" to use Excel
+            when it is available and openpyxl otherwise. Without Excel,
+            legacy .xls files are read with xlrd and saved as .xlsx
+        streaming: Translate very large .xlsx files with bounded memory by
+            reading, translating and writing window_rows rows at a time
+            (openpyxl only; merged cells, column widths and shapes are dropped)
+        window_rows: Rows per window in streaming mode
+        workers: Number of batches translated concurrently while the
+            workbook is still being scanned (requests still share the
+            global rate limit)
+        incremental: Keep a manifest of source hashes and translations next to
+            the output (<output>.manifest.json) and, on later runs, only send
+            cells whose text changed since the previous run (not with streaming)
         
     Returns:
         Path to the saved translated file
     """
+    # Create output file path if not provided
+    if output_path is None:
+        filename = os.path.basename(input_path)
+        base_name, ext = os.path.splitext(filename)
+        
+        # Auto-generate output path
+        dir_name = os.path.dirname(input_path)
+        output_path = os.path.join(dir_name, f"{base_name}-{target_lang}{ext}")
+    
+    if engine not in ("auto", "excel", "openpyxl", "ooxml"):
+        print(f"❌ Unknown Excel engine: {engine} (use 'auto', 'excel', 'openpyxl' or 'ooxml')")
+        return ""
+    
+    # Legacy .xls files are read with xlrd whenever Excel is not used
+    if input_path.lower().endswith(".xls") and (
+        engine in ("openpyxl", "ooxml") or (engine == "auto" and not _excel_app_available())
+    ):
+        if streaming:
+            print("⚠️ Streaming mode only applies to .xlsx files; translating the .xls file in one pass")
+        from .xls_processor import process_xls
+        return process_xls(
+            input_path=input_path,
+            output_path=output_path,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            country=country,
+            batch_size=batch_size,
+            detect_languages=detect_languages,
+            translation_style=translation_style,
+            custom_style_instructions=custom_style_instructions,
+            terminology_file=terminology_file,
+            incremental=incremental,
+        )
+    
+    if engine == "ooxml" and not streaming:
+        from .xlsx_processor import process_xlsx_shared_strings
+        return process_xlsx_shared_strings(
+            input_path=input_path,
+            output_path=output_path,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            country=country,
+            batch_size=batch_size,
+            detect_languages=detect_languages,
+            translation_style=translation_style,
+            custom_style_instructions=custom_style_instructions,
+            terminology_file=terminology_file,
+            incremental=incremental,
+        )
+    
+    if streaming:
+        if engine == "excel":
+            print("⚠️ Streaming mode uses openpyxl; ignoring engine='excel'")
+        if incremental:
+            print("⚠️ Incremental mode keeps every cell in its manifest; ignoring it in streaming mode")
+        from .xlsx_processor import process_xlsx_streaming
+        return process_xlsx_streaming(
+            input_path=input_path,
+            output_path=output_path,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            country=country,
+            batch_size=batch_size,
+            detect_languages=detect_languages,
+            translation_style=translation_style,
+            custom_style_instructions=custom_style_instructions,
+            terminology_file=terminology_file,
+            window_rows=window_rows,
+        )
+    
+    if engine == "openpyxl" or (engine == "auto" and not _excel_app_available()):
+        from .xlsx_processor import process_xlsx
+        return process_xlsx(
+            input_path=input_path,
+            output_path=output_path,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            country=country,
+            batch_size=batch_size,
+            detect_languages=detect_languages,
+            translation_style=translation_style,
+            custom_style_instructions=custom_style_instructions,
+            terminology_file=terminology_file,
+            workers=workers,
+            incremental=incremental,
+        )
+    
     try:
         # Dynamic import to avoid unnecessary dependency if Excel not used
         import xlwings as xw
         
-        # Create output file path if not provided
-        if output_path is None:
-            filename = os.path.basename(input_path)
-            base_name, ext = os.path.splitext(filename)
-            
-            # Auto-generate output path
-            dir_name = os.path.dirname(input_path)
-            output_path = os.path.join(dir_name, f"{base_name}-{target_lang}{ext}")
+        # COM must be initialized on every thread that drives Excel
+        if threading.current_thread() is not threading.main_thread():
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+            except ImportError:
+                pass
         
         print(f"\n🔄 Processing file: {input_path}")
         print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
         
+        # Reuse translations of repeated and near-identical cells across sheets
+        translation_memory = TranslationMemory()
+        # Cells differing only in numbers, dates or codes share one translation
+        template_cache = TemplateCache()
+        manifest = None
+        if incremental:
+            manifest = open_manifest(
+                output_path, source_lang, target_lang, country, detect_languages,
+                translation_style, custom_style_instructions, terminology_file
+            )
+        
         # Open workbook with xlwings to preserve formatting
         app = xw.App(visible=False)
         wb = None
@@ -85,353 +543,123 @@ def process_excel(
         try:
             wb = app.books.open(input_path)
             
-            # Process each sheet
-            for sheet in wb.sheets:
-                print(f"📋 Processing sheet: {sheet.name}")
-                
-                # Collect data from cells that need translation
-                texts_to_translate = []
-                cell_references = []
-                
-                # For language detection
-                language_groups = {} if detect_languages else None
-                
-                # Scan through used data range
-                used_rng = sheet.used_range
-                if used_rng.count > 1 or used_rng.value is not None:
-                    for cell in used_rng:
-                        # Check if cell value exists and should be translated
-                        cell_value_str = str(cell.value) if cell.value is not None else ""
-                        if cell_value_str and should_translate(cell_value_str):
-                            clean_cell_text = clean_text(cell_value_str)
-                            
-                            if detect_languages:
-                                # Detect language for this cell
-                                detected_lang = detect_language(clean_cell_text)
-                                
-                                # Skip if already in target language
-                                if detected_lang.lower() == target_lang.lower():
-                                    print(f"   ⏩ Skipping cell {cell.address} (already in {detected_lang})")
-                                    continue
-                                
-                                # Group by language
-                                if detected_lang not in language_groups:
-                                    language_groups[detected_lang] = []
-                                language_groups[detected_lang].append((clean_cell_text, cell))
-                            else:
-                                # No language detection, just add to translation list
-                                texts_to_translate.append(clean_cell_text)
-                                cell_references.append(cell)
-                else:
-                    print(f"   ⚠️ Sheet '{sheet.name}' is empty or has no data.")
-                
-                # Process shapes with text
-                try:
-                    shapes_collection = sheet.api.Shapes
-                    shapes_count = shapes_collection.Count
-                    
-                    if shapes_count > 0:
-                        print(f"📊 Sheet '{sheet.name}' has {shapes_count} shapes to check")
-                        
-                        # Process each shape by index (Excel COM API indexes from 1)
-                        for i in range(1, shapes_count + 1):
-                            shape = None
+            # Texts are translated in batches on worker threads as soon as the
+            # scan has filled a batch; scanning and writing stay on this thread
+            # because COM objects must not be shared between threads
+            def translate_batch(batch):
+                return translate_cell_texts(
+                    [text for text, _, _, _ in batch], source_lang, target_lang, country, batch_size,
+                    detect_languages, translation_style, custom_style_instructions,
+                    terminology_file, translation_memory, template_cache,
+                    [label for _, _, label, _ in batch], manifest, [key for _, _, _, key in batch]
+                )
+            
+            def write_batch(batch, translations):
+                print(f"   ✍️ Writing {sum(t is not None for t in translations)} translated texts...")
+                for (_, ref, _, _), translated in zip(batch, translations):
+                    if translated is None:
+                        continue
+                    try:
+                        # Update content based on reference type
+                        if isinstance(ref, tuple) and ref[0] == 'shape':
+                            _, sheet_obj, shape_index = ref
                             try:
-                                shape = shapes_collection.Item(i)
-                                shape_text = None
-                                
-                                # Try multiple methods to get text from shape
-                                # Method 1: TextFrame
-                                try:
-                                    if hasattr(shape, 'TextFrame'):
-                                        if shape.TextFrame.HasText:
-                                            shape_text = shape.TextFrame.Characters().Text
-                                except Exception:
-                                    pass
-                                
-                                # Method 2: TextFrame2
-                                if not shape_text:
-                                    try:
-                                        if hasattr(shape, 'TextFrame2'):
-                                            shape_text = shape.TextFrame2.TextRange.Text
-                                    except Exception:
-                                        pass
-                                
-                                # Method 3: AlternativeText
-                                if not shape_text:
-                                    try:
-                                        if hasattr(shape, 'AlternativeText') and shape.AlternativeText:
-                                            shape_text = shape.AlternativeText
-                                    except Exception:
-                                        pass
-                                
-                                # Method 4: OLEFormat (for OLE objects)
-                                if not shape_text:
-                                    try:
-                                        if hasattr(shape, 'OLEFormat') and hasattr(shape.OLEFormat, 'Object'):
-                                            if hasattr(shape.OLEFormat.Object, 'Text'):
-                                                shape_text = shape.OLEFormat.Object.Text
-                                    except Exception:
-                                        pass
-                                
-                                # Method 5: TextEffect (for WordArt)
-                                if not shape_text:
-                                    try:
-                                        if hasattr(shape, 'TextEffect') and hasattr(shape.TextEffect, 'Text'):
-                                            shape_text = shape.TextEffect.Text
-                                    except Exception:
-                                        pass
-                                
-                                # If text is found, add to translation list
-                                if shape_text and should_translate(shape_text):
-                                    clean_shape_text = clean_text(shape_text)
-                                    print(f"   💬 Shape {i}: Found text: {clean_shape_text[:30]}...")
-                                    
-                                    if detect_languages:
-                                        # Detect language for this shape
-                                        detected_lang = detect_language(clean_shape_text)
-                                        
-                                        # Skip if already in target language
-                                        if detected_lang.lower() == target_lang.lower():
-                                            print(f"   ⏩ Skipping shape {i} (already in {detected_lang})")
-                                            continue
-                                        
-                                        # Group by language
-                                        if detected_lang not in language_groups:
-                                            language_groups[detected_lang] = []
-                                        language_groups[detected_lang].append((clean_shape_text, ('shape', sheet, i)))
-                                    else:
-                                        # No language detection, just add to translation list
-                                        texts_to_translate.append(clean_shape_text)
-                                        cell_references.append(('shape', sheet, i))
-                                    
-                            except Exception as outer_e:
-                                print(f"   ⚠️ Error processing shape {i}: {str(outer_e)}")
-                                continue
-                                
-                except Exception as e:
-                    print(f"   ⚠️ Error processing shapes on sheet '{sheet.name}': {str(e)}")
-                
-                # Translate and update content
-                if detect_languages:
-                    # Process each language group separately
-                    for lang, items in language_groups.items():
-                        if not items:
-                            continue
-                            
-                        print(f"   🔄 Translating {len(items)} cells from {lang} to {target_lang}")
-                        
-                        # Extract texts and references for this language
-                        lang_texts = [item[0] for item in items]
-                        lang_refs = [item[1] for item in items]
-                        
-                        # Translate in batches
-                        total_batches = (len(lang_texts) - 1) // batch_size + 1
+                                if _write_shape_text(sheet_obj.api.Shapes.Item(shape_index), translated):
+                                    print(f"   ✅ Updated text for shape {shape_index}")
+                                else:
+                                    print(f"   ⚠️ Could not update text for shape {shape_index}")
+                            except Exception as update_err:
+                                print(f"   ⚠️ Error updating shape {shape_index}: {str(update_err)}")
                         
-                        for i in range(0, len(lang_texts), batch_size):
-                            batch_texts = lang_texts[i:i+batch_size]
-                            batch_refs = lang_refs[i:i+batch_size]
-                            current_batch_num = i // batch_size + 1
-                            
-                            print(f"   📦 Translating batch {current_batch_num}/{total_batches} ({len(batch_texts)} texts)")
-                            
-                            # Translate batch
-                            translated_batch = batch_translate(
-                                texts=batch_texts,
-                                source_lang=lang,
-                                target_lang=target_lang,
-                                country=country,
-                                translation_style=translation_style,
-                                custom_style_instructions=custom_style_instructions,
-                                terminology_file=terminology_file
-                            )
+                        # Handle regular cell updates
+                        elif hasattr(ref, 'value'):
+                            ref.value = translated
+                        else:
+                            print(f"   ⚠️ Unknown reference type: {type(ref)}")
                             
-                            # Update translated content
-                            print(f"   ✍️ Updating content for batch {current_batch_num}...")
-                            for j, ref in enumerate(batch_refs):
-                                if j < len(translated_batch) and translated_batch[j] is not None:
-                                    try:
-                                        # Update content based on reference type
-                                        if isinstance(ref, tuple) and ref[0] == 'shape':
-                                            # Handle shape updates
-                                            _, sheet_obj, shape_index = ref
-                                            try:
-                                                shape_to_update = sheet_obj.api.Shapes.Item(shape_index)
-                                                updated = False
-                                                
-                                                # Try different methods for updating shape text
-                                                # Method 1: TextFrame
-                                                try:
-                                                    if hasattr(shape_to_update, 'TextFrame') and shape_to_update.TextFrame.HasText:
-                                                        shape_to_update.TextFrame.Characters().Text = translated_batch[j]
-                                                        updated = True
-                                                except Exception:
-                                                    pass
-                                                    
-                                                # Method 2: TextFrame2
-                                                if not updated:
-                                                    try:
-                                                        if hasattr(shape_to_update, 'TextFrame2'):
-                                                            shape_to_update.TextFrame2.TextRange.Text = translated_batch[j]
-                                                            updated = True
-                                                    except Exception:
-                                                        pass
-                                                        
-                                                # Method 3: AlternativeText
-                                                if not updated:
-                                                    try:
-                                                        if hasattr(shape_to_update, 'AlternativeText'):
-                                                            shape_to_update.AlternativeText = translated_batch[j]
-                                                            updated = True
-                                                    except Exception:
-                                                        pass
-                                                        
-                                                # Method 4: TextEffect (for WordArt)
-                                                if not updated:
-                                                    try:
-                                                        if hasattr(shape_to_update, 'TextEffect') and hasattr(shape_to_update.TextEffect, 'Text'):
-                                                            shape_to_update.TextEffect.Text = translated_batch[j]
-                                                            updated = True
-                                                    except Exception:
-                                                        pass
-                                                        
-                                                # Method 5: OLEFormat
-                                                if not updated:
-                                                    try:
-                                                        if hasattr(shape_to_update, 'OLEFormat') and hasattr(shape_to_update.OLEFormat, 'Object'):
-                                                            if hasattr(shape_to_update.OLEFormat.Object, 'Text'):
-                                                                shape_to_update.OLEFormat.Object.Text = translated_batch[j]
-                                                                updated = True
-                                                    except Exception:
-                                                        pass
-                                                        
-                                                if updated:
-                                                    print(f"   ✅ Updated text for shape {shape_index}")
-                                                else:
-                                                    print(f"   ⚠️ Could not update text for shape {shape_index}")
-                                                    
-                                            except Exception as update_err:
-                                                print(f"   ⚠️ Error updating shape {shape_index}: {str(update_err)}")
-                                        
-                                        # Handle regular cell updates
-                                        elif hasattr(ref, 'value'):
-                                            # Is a cell
-                                            ref.value = translated_batch[j]
-                                        else:
-                                            print(f"   ⚠️ Unknown reference type: {type(ref)}")
-                                            
-                                    except Exception as update_single_err:
-                                        ref_info = f"Shape index {ref[2]}" if isinstance(ref, tuple) else f"Cell {ref.address}"
-                                        print(f"   ⚠️ Could not update content for {ref_info}: {str(update_single_err)}")
-                else:
-                    # No language detection, process all cells with the specified source language
-                    if not texts_to_translate:
-                        print(f"   ✅ No text to translate on sheet '{sheet.name}'.")
-                        continue
-                    
-                    total_batches = (len(texts_to_translate) - 1) // batch_size + 1
-                    print(f"   📦 Preparing to translate {len(texts_to_translate)} text segments in {total_batches} batches.")
+                    except Exception as update_single_err:
+                        ref_info = f"Shape index {ref[2]}" if isinstance(ref, tuple) else f"Cell {ref.address}"
+                        print(f"   ⚠️ Could not update content for {ref_info}: {str(update_single_err)}")
+            
+            with BatchPipeline(translate_batch, write_batch, batch_size, workers) as pipeline:
+                for sheet in wb.sheets:
+                    print(f"📋 Processing sheet: {sheet.name}")
                     
-                    for i in range(0, len(texts_to_translate), batch_size):
-                        batch_texts = texts_to_translate[i:i+batch_size]
-                        batch_refs = cell_references[i:i+batch_size]
-                        current_batch_num = i // batch_size + 1
+                    # Read the used range in one call and classify it column by column
+                    used_rng = sheet.used_range
+                    values = used_rng.options(ndim=2).value if (used_rng.count > 1 or used_rng.value is not None) else None
+                    if values:
+                        categories, profiles = classify_grid(values, target_lang)
+                        for profile in profiles:
+                            if profile.kind != TEXT:
+                                column = _column_letter(used_rng.column + profile.index)
+                                print(f"   ⏩ Skipping column {column} ({profile.kind} column)")
+                        
+                        # Values of formula cells are results; never overwrite the formula
+                        formulas = used_rng.formula
+                        if isinstance(formulas, str):
+                            formulas = ((formulas,),)
+                        for r, formula_row in enumerate(formulas):
+                            for c, formula in enumerate(formula_row):
+                                if isinstance(formula, str) and formula.startswith("="):
+                                    categories[r][c] = FORMULA
+                        skipped = {}
+                        texts_found = 0
                         
-                        print(f"   🔄 Translating batch {current_batch_num}/{total_batches} ({len(batch_texts)} texts)")
+                        for r, row in enumerate(values):
+                            for c, value in enumerate(row):
+                                category = categories[r][c]
+                                if category != TEXT:
+                                    skipped[category] = skipped.get(category, 0) + 1
+                                    continue
+                                clean_cell_text = clean_text(str(value))
+                                if len(clean_cell_text) < 2:
+                                    continue
+                                ref = used_rng[r, c]
+                                address = ref.get_address(False, False)
+                                pipeline.add((clean_cell_text, ref, f"cell {address}", f"{sheet.name}!{address}"))
+                                texts_found += 1
                         
-                        # Translate batch - key function that connects to translator_core
-                        translated_batch = batch_translate(
-                            texts=batch_texts,
-                            source_lang=source_lang,
-                            target_lang=target_lang,
-                            country=country,
-                            translation_style=translation_style,
-                            custom_style_instructions=custom_style_instructions,
-                            terminology_file=terminology_file
-                        )
+                        skipped.pop("empty", None)
+                        if skipped:
+                            summary = ", ".join(f"{count} {category}" for category, count in sorted(skipped.items()))
+                            print(f"   ⏩ Skipped cells that need no translation: {summary}")
+                        if not texts_found:
+                            print(f"   ✅ No text to translate in the cells of sheet '{sheet.name}'.")
+                    else:
+                        print(f"   ⚠️ Sheet '{sheet.name}' is empty or has no data.")
+                    
+                    # Process shapes with text
+                    try:
+                        shapes_collection = sheet.api.Shapes
+                        shapes_count = shapes_collection.Count
                         
-                        # Update translated content
-                        print(f"   ✍️ Updating content for batch {current_batch_num}...")
-                        for j, ref in enumerate(batch_refs):
-                            if j < len(translated_batch) and translated_batch[j] is not None:
+                        if shapes_count > 0:
+                            print(f"📊 Sheet '{sheet.name}' has {shapes_count} shapes to check")
+                            
+                            # Process each shape by index (Excel COM API indexes from 1)
+                            for i in range(1, shapes_count + 1):
                                 try:
-                                    # Update content based on reference type
-                                    if isinstance(ref, tuple) and ref[0] == 'shape':
-                                        # Handle shape updates
-                                        _, sheet_obj, shape_index = ref
-                                        try:
-                                            shape_to_update = sheet_obj.api.Shapes.Item(shape_index)
-                                            updated = False
-                                            
-                                            # Try different methods for updating shape text
-                                            # Method 1: TextFrame
-                                            try:
-                                                if hasattr(shape_to_update, 'TextFrame') and shape_to_update.TextFrame.HasText:
-                                                    shape_to_update.TextFrame.Characters().Text = translated_batch[j]
-                                                    updated = True
-                                            except Exception:
-                                                pass
-                                                
-                                            # Method 2: TextFrame2
-                                            if not updated:
-                                                try:
-                                                    if hasattr(shape_to_update, 'TextFrame2'):
-                                                        shape_to_update.TextFrame2.TextRange.Text = translated_batch[j]
-                                                        updated = True
-                                                except Exception:
-                                                    pass
-                                                    
-                                            # Method 3: AlternativeText
-                                            if not updated:
-                                                try:
-                                                    if hasattr(shape_to_update, 'AlternativeText'):
-                                                        shape_to_update.AlternativeText = translated_batch[j]
-                                                        updated = True
-                                                except Exception:
-                                                    pass
-                                                    
-                                            # Method 4: TextEffect (for WordArt)
-                                            if not updated:
-                                                try:
-                                                    if hasattr(shape_to_update, 'TextEffect') and hasattr(shape_to_update.TextEffect, 'Text'):
-                                                        shape_to_update.TextEffect.Text = translated_batch[j]
-                                                        updated = True
-                                                except Exception:
-                                                    pass
-                                                    
-                                            # Method 5: OLEFormat
-                                            if not updated:
-                                                try:
-                                                    if hasattr(shape_to_update, 'OLEFormat') and hasattr(shape_to_update.OLEFormat, 'Object'):
-                                                        if hasattr(shape_to_update.OLEFormat.Object, 'Text'):
-                                                            shape_to_update.OLEFormat.Object.Text = translated_batch[j]
-                                                            updated = True
-                                                except Exception:
-                                                    pass
-                                                    
-                                            if updated:
-                                                print(f"   ✅ Updated text for shape {shape_index}")
-                                            else:
-                                                print(f"   ⚠️ Could not update text for shape {shape_index}")
-                                                
-                                        except Exception as update_err:
-                                            print(f"   ⚠️ Error updating shape {shape_index}: {str(update_err)}")
+                                    shape_text = _read_shape_text(shapes_collection.Item(i))
                                     
-                                    # Handle regular cell updates
-                                    elif hasattr(ref, 'value'):
-                                        # Is a cell
-                                        ref.value = translated_batch[j]
-                                    else:
-                                        print(f"   ⚠️ Unknown reference type: {type(ref)}")
+                                    # If text is found, add to translation list
+                                    if shape_text and should_translate(shape_text, target_lang):
+                                        clean_shape_text = clean_text(shape_text)
+                                        print(f"   💬 Shape {i}: Found text: {clean_shape_text[:30]}...")
+                                        pipeline.add((clean_shape_text, ('shape', sheet, i), f"shape {i}", f"{sheet.name}!shape{i}"))
                                         
-                                except Exception as update_single_err:
-                                    ref_info = f"Shape index {ref[2]}" if isinstance(ref, tuple) else f"Cell {ref.address}"
-                                    print(f"   ⚠️ Could not update content for {ref_info}: {str(update_single_err)}")
+                                except Exception as outer_e:
+                                    print(f"   ⚠️ Error processing shape {i}: {str(outer_e)}")
+                                    continue
+                                    
+                    except Exception as e:
+                        print(f"   ⚠️ Error processing shapes on sheet '{sheet.name}': {str(e)}")
             
             # Save file with original format
             print(f"\n💾 Saving translated file to: {output_path}")
             wb.save(output_path)
             print(f"✅ File saved successfully: {output_path}")
+            save_manifest(manifest)
             
             return output_path
             
@@ -472,6 +700,10 @@ def process_directory(
     target_lang: str = "Spanish",
     country: str = "",
     detect_languages: bool = True,
+    engine: str = "auto",
+    streaming: bool = False,
+    workers: int = 1,
+    incremental: bool = False,
 ) -> List[str]:
     """
     Process all Excel files in a directory.
@@ -483,6 +715,12 @@ def process_directory(
         target_lang: Target language for translation
         country: Optional country context for translation style
         detect_languages: Whether to detect languages in different cells
+        engine: Excel engine passed to process_excel ("auto", "excel", "openpyxl" or "ooxml")
+        streaming: Use the bounded-memory streaming mode of process_excel
+        workers: Number of files translated concurrently. Files are isolated:
+            an error in one workbook is reported and the others continue
+        incremental: Re-translate only cells changed since the previous run
+            (each output keeps its own manifest)
         
     Returns:
         List of paths to successfully translated files
@@ -510,12 +748,9 @@ def process_directory(
     
     print(f"🔍 Found {len(excel_files)} Excel files in input directory")
     
-    # Process each file
-    successful_files = []
-    failed_files = []
-    
+    # Skip temporary files
+    jobs = []
     for file_path in excel_files:
-        # Skip temporary files
         if os.path.basename(file_path).startswith('~$'):
             print(f"   ⏩ Skipping temporary file: {os.path.basename(file_path)}")
             continue
@@ -523,22 +758,40 @@ def process_directory(
         # Create output path
         filename = os.path.basename(file_path)
         base_name, ext = os.path.splitext(filename)
-        output_path = os.path.join(output_dir, f"{base_name}-{target_lang}{ext}")
-        
-        # Process the file
-        result_path = process_excel(
-            input_path=file_path,
-            output_path=output_path,
-            source_lang=source_lang,
-            target_lang=target_lang,
-            country=country,
-            detect_languages=detect_languages
-        )
-        
-        if result_path:
-            successful_files.append(result_path)
-        else:
-            failed_files.append(file_path)
+        jobs.append((file_path, os.path.join(output_dir, f"{base_name}-{target_lang}{ext}")))
+    
+    def process_file(job):
+        file_path, output_path = job
+        try:
+            return process_excel(
+                input_path=file_path,
+                output_path=output_path,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                country=country,
+                detect_languages=detect_languages,
+                engine=engine,
+                streaming=streaming,
+                incremental=incremental
+            )
+        except Exception as e:
+            print(f"❌ Error processing {os.path.basename(file_path)}: {str(e)}")
+            return ""
+    
+    # Process the files, several at a time if requested
+    successful_files = []
+    failed_files = []
+    
+    if workers > 1:
+        print(f"🧵 Processing up to {workers} files at a time")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(process_file, job): job[0] for job in jobs}
+        for future in as_completed(futures):
+            result_path = future.result()
+            if result_path:
+                successful_files.append(result_path)
+            else:
+                failed_files.append(futures[future])
     
     # Print summary
     print("\n--- Directory processing completed ---")
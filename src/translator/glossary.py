@@ -0,0 +1,219 @@
+"""
+Glossary Loader for Advanced Translation Suite
+Parses custom terminology files once and shares the compiled result
+"""
+
+import csv
+import os
+import re
+import unicodedata
+from collections.abc import Mapping
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Delimiters tried when detecting the format of a text glossary, in priority order
+DELIMITERS = ("=", "\t", ";", "|", ",")
+
+# Header cells that mark the header rows of a CSV/TSV/XLSX glossary (compared in NFC)
+HEADER_NAMES = {"source", "target", "term", "terms", "source_term", "target_term",
+                "translation", "english", "vietnamese", "en", "vi",
+                "tiếng anh", "tiếng việt", "tên tiếng anh", "tên tiếng việt",
+                "thuật ngữ", "nghĩa", "bản dịch", "nguồn", "đích"}
+
+# Characters stripped around terms (quotes left over from spreadsheet exports)
+QUOTE_CHARS = " \t\"'“”‘’"
+
+WORD_RE = re.compile(r"\w+")
+CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+class Glossary(Mapping):
+    """Immutable, indexed source term -> target term mapping.
+
+    Renders as "- source → target" lines when formatted into a prompt.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str]], path: str = ""):
+        terms: Dict[str, str] = {}
+        for source, target in entries:
+            terms[source] = target
+        self.path = path
+        self._terms = MappingProxyType(terms)
+
+        # Index terms by their first word so lookups only check likely candidates
+        index: Dict[str, List[Tuple[str, str]]] = {}
+        for source in terms:
+            words = WORD_RE.findall(source.lower())
+            key = words[0] if words else ""
+            index.setdefault(key, []).append((source.lower(), source))
+        self._index = index
+        self._text = "".join(f"- {source} → {target}\n" for source, target in terms.items())
+
+    def __getitem__(self, key: str) -> str:
+        return self._terms[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __str__(self) -> str:
+        return self._text
+
+    def __repr__(self) -> str:
+        return f"Glossary({len(self)} terms from {self.path or '<memory>'})"
+
+    def subset_for(self, text: str) -> "Glossary":
+        """Return only the terms that occur in text (case-insensitive)."""
+        text_lower = text.lower()
+        if CJK_RE.search(text_lower):
+            # No word boundaries to index on: check every term
+            candidates = [c for bucket in self._index.values() for c in bucket]
+        else:
+            candidates = list(self._index.get("", []))
+            for word in set(WORD_RE.findall(text_lower)):
+                candidates.extend(self._index.get(word, ()))
+        matched = {source for source_lower, source in candidates if source_lower in text_lower}
+        return Glossary([(s, t) for s, t in self._terms.items() if s in matched], self.path)
+
+
+def _decode(raw: bytes) -> str:
+    """Decode glossary bytes, detecting BOMs and BOM-less UTF-16."""
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8")
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return raw.decode("utf-16")
+    sample = raw[:200]
+    if sample and sample.count(b"\x00") > len(sample) // 4:
+        # UTF-16 without a BOM: ASCII characters leave every other byte empty
+        return raw.decode("utf-16-le" if sample[1:2] == b"\x00" else "utf-16-be")
+    for encoding in ("utf-8", "cp1258"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("latin-1")
+
+
+def _unquote_line(line: str) -> str:
+    """Undo the whole-line quoting spreadsheet exports add ('\"\"\"a\"\" =\"\"b\"\"\"')."""
+    if len(line) >= 2 and line[0] == '"' and line[-1] == '"':
+        return line[1:-1].replace('""', '"')
+    return line
+
+
+def _detect_delimiter(lines: List[str]) -> str:
+    sample = lines[:50]
+    counts = {d: sum(1 for line in sample if d in line) for d in DELIMITERS}
+    best = max(DELIMITERS, key=lambda d: counts[d])  # Ties keep priority order
+    return best if counts[best] else "="
+
+
+def _clean_term(term: str) -> str:
+    return term.strip(QUOTE_CHARS)
+
+
+def _is_header(row: List[str]) -> bool:
+    return bool(row) and all(
+        unicodedata.normalize("NFC", _clean_term(cell)).lower() in HEADER_NAMES for cell in row[:2]
+    )
+
+
+def _drop_headers(rows: List[List[str]]) -> List[List[str]]:
+    """Remove header rows; glossaries split into titled sections repeat them in each section."""
+    return [row for row in rows if not _is_header([cell for cell in row if _clean_term(cell)])]
+
+
+def _parse_text(text: str) -> List[Tuple[str, str]]:
+    lines = [_unquote_line(line.strip()) for line in text.splitlines()]
+    lines = [line for line in lines if line and not line.startswith("#")]
+    if not lines:
+        return []
+
+    delimiter = _detect_delimiter(lines)
+    if delimiter == "=":
+        rows = [line.split("=", 1) for line in lines if "=" in line]
+    else:
+        rows = list(csv.reader(lines, delimiter=delimiter))
+
+    rows = _drop_headers(rows)
+
+    entries = []
+    for row in rows:
+        cells = [_clean_term(cell) for cell in row if _clean_term(cell)]
+        if len(cells) >= 2:
+            entries.append((cells[0], cells[1]))
+    return entries
+
+
+def _parse_xlsx(path: str) -> List[Tuple[str, str]]:
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("openpyxl is not installed. Please install with: pip install openpyxl")
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = []
+        for row in wb.worksheets[0].iter_rows(max_col=2, values_only=True):
+            cells = [str(value) for value in row if value is not None]
+            if cells:
+                rows.append(cells)
+    finally:
+        wb.close()
+
+    rows = _drop_headers(rows)
+    return [
+        (_clean_term(row[0]), _clean_term(row[1]))
+        for row in rows
+        if len(row) >= 2 and _clean_term(row[0]) and _clean_term(row[1])
+    ]
+
+
+_cache: Dict[str, Tuple[Tuple[int, int], Glossary]] = {}
+_cache_lock = Lock()
+
+
+def load_glossary(path: str) -> Glossary:
+    """Load a glossary file (TXT, TSV, CSV or XLSX), reusing the compiled result.
+
+    The parsed glossary is cached by path, modification time and size, so all
+    batches and threads of a job share one instance.
+
+    Args:
+        path: Path to the glossary file
+
+    Returns:
+        The compiled Glossary
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        if path.lower().endswith((".xlsx", ".xlsm")):
+            entries = _parse_xlsx(path)
+        else:
+            with open(path, "rb") as f:
+                entries = _parse_text(_decode(f.read()))
+
+        glossary = Glossary(entries, path)
+        _cache[path] = (stamp, glossary)
+        return glossary
+
+
+def try_load_glossary(path: Optional[str]) -> Optional[Glossary]:
+    """Load a glossary, printing the error and returning None if it cannot be read."""
+    if not path:
+        return None
+    try:
+        return load_glossary(path)
+    except Exception as e:
+        print(f"Error loading terminology file: {e}")
+        return None
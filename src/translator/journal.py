@@ -0,0 +1,180 @@
+"""
+Job Journal for Advanced Translation Suite
+Append-only record of every completed translation batch, so an interrupted
+job can be resumed without paying for the same requests again
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".translation_jobs")
+
+# Completed batches are flushed to the OS at once but only forced to disk
+# this often, so journaling stays cheap next to the requests it records
+FSYNC_INTERVAL = 1.0  # seconds
+
+_active_journal = None
+_active_lock = Lock()
+
+
+def segment_id(source_lang: str, target_lang: str, text: str) -> str:
+    """Content-derived id of a segment, stable across runs of the same job."""
+    key = f"{source_lang}\x1f{target_lang}\x1f{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def job_id_for(input_path: str, target_lang: str) -> str:
+    """Default job name for translating input_path into target_lang."""
+    name = os.path.basename(os.path.normpath(input_path)) or "stdin"
+    return re.sub(r"[^\w.-]+", "_", f"{name}-{target_lang}")
+
+
+class JobJournal:
+    """Completed segments of one job, appended to a JSONL file batch by batch.
+
+    The first line records the job's settings: {"settings": {...}}. Each
+    following line holds one batch: {"batch": n, "segments": [[id, translation], ...]}.
+    Only batches that were translated successfully are written, so anything
+    missing from the journal is translated again on resume. A line cut short
+    by a crash is ignored. A journal written with other settings (style,
+    country, instructions, terminology) is not resumed but started over.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        directory: str = JOURNAL_DIR,
+        resume: bool = False,
+        settings: Optional[Dict[str, Any]] = None,
+    ):
+        self.job_id = job_id
+        self.path = os.path.join(directory, f"{job_id}.jsonl")
+        self.settings = settings
+        self._segments: Dict[str, str] = {}
+        self._batches = 0
+        self._lock = Lock()
+        self._last_sync = time.monotonic()
+        self.reused = 0
+
+        os.makedirs(directory, exist_ok=True)
+        if resume and os.path.exists(self.path) and self._load() != settings:
+            print(f"⚠️ Translation settings changed since job '{job_id}' was started; translating everything again")
+            self._segments.clear()
+            self._batches = 0
+            resume = False
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if not resume:
+            self._file.write(json.dumps({"settings": settings}, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        """Read the finished batches and return the settings the journal was written with."""
+        settings = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn write at the point of the crash
+                if "settings" in record:
+                    settings = record["settings"]
+                    continue
+                self._batches += 1
+                for sid, translation in record.get("segments", []):
+                    self._segments[sid] = translation
+        return settings
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def batches(self) -> int:
+        return self._batches
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """Return the journaled translation of a segment, or None if it was not finished."""
+        translation = self._segments.get(segment_id(source_lang, target_lang, text))
+        if translation is not None:
+            with self._lock:
+                self.reused += 1
+        return translation
+
+    def record_batch(self, source_lang: str, target_lang: str, pairs: Sequence[Tuple[str, str]]) -> None:
+        """Append one completed batch of (source text, translation) pairs."""
+        if not pairs:
+            return
+        segments = [[segment_id(source_lang, target_lang, text), translation] for text, translation in pairs]
+        with self._lock:
+            if self._file.closed:
+                return
+            self._batches += 1
+            line = json.dumps({"batch": self._batches, "segments": segments}, ensure_ascii=False)
+            self._file.write(line + "\n")
+            self._file.flush()
+            for sid, translation in segments:
+                self._segments[sid] = translation
+            if time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Force the journal to disk and close it; it stays available for --resume."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def discard(self) -> None:
+        """Close and delete the journal once the job has finished."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def get_active_journal() -> Optional[JobJournal]:
+    """Journal that batch_translate and simple_translator currently record into."""
+    return _active_journal
+
+
+def set_active_journal(journal: Optional[JobJournal]) -> None:
+    global _active_journal
+    with _active_lock:
+        _active_journal = journal
+
+
+@contextmanager
+def job_journal(
+    job_id: str,
+    resume: bool = False,
+    directory: str = JOURNAL_DIR,
+    settings: Optional[Dict[str, Any]] = None,
+) -> Iterator[JobJournal]:
+    """Journal all translations made inside the block under job_id.
+
+    With resume, segments finished by an earlier run of the job are reused
+    instead of translated, provided it ran with the same settings (see
+    manifest.translation_settings). The journal is kept when the block
+    raises, so the job can be resumed; call discard() once its output is
+    written.
+    """
+    if not resume and os.path.exists(os.path.join(directory, f"{job_id}.jsonl")):
+        print(f"⚠️ Starting job '{job_id}' over; pass --resume {job_id} to continue the unfinished run")
+    journal = JobJournal(job_id, directory, resume, settings)
+    if resume:
+        print(f"📓 Resuming job '{job_id}': {len(journal)} segments from {journal.batches} batches already done")
+    set_active_journal(journal)
+    try:
+        yield journal
+    finally:
+        set_active_journal(None)
+        journal.close()
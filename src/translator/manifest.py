@@ -0,0 +1,127 @@
+"""
+Translation Manifest for Advanced Translation Suite
+Sidecar record of what each cell said and how it was translated, so that a
+revised workbook only sends changed cells to the model
+"""
+
+import hashlib
+import json
+import os
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+def manifest_path_for(output_path: str) -> str:
+    """Path of the manifest kept next to a translated file."""
+    return output_path + MANIFEST_SUFFIX
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def file_hash(path: Optional[str]) -> str:
+    """Hash of a file's contents, or "" if there is no file."""
+    if not path or not os.path.exists(path):
+        return ""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+def translation_settings(
+    source_lang: str,
+    target_lang: str,
+    country: Optional[str] = "",
+    detect_languages: bool = False,
+    translation_style: str = "General",
+    custom_style_instructions: Optional[str] = "",
+    terminology_file: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Settings that change the translations of a job; earlier results only carry over when they match."""
+    return {
+        "source_lang": source_lang if not detect_languages else "auto",
+        "target_lang": target_lang,
+        "country": country,
+        "translation_style": translation_style,
+        "custom_style_instructions": custom_style_instructions,
+        "terminology": file_hash(terminology_file),
+    }
+
+
+class TranslationManifest:
+    """Cell key -> (source hash, translation) from the previous run of a job.
+
+    A cell is reused when its key still holds the same source text; text that
+    moved to another cell (inserted rows, reordered sheets) is found by its
+    hash. Entries not seen during a run are dropped when it is saved. Safe to
+    share between threads.
+    """
+
+    def __init__(self, path: str, settings: Dict[str, Any]):
+        self.path = path
+        self.settings = settings
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._seen: Dict[str, Tuple[str, str]] = {}
+        self._lock = Lock()
+        self.reused = 0
+
+    @classmethod
+    def load(cls, path: str, settings: Dict[str, Any]) -> "TranslationManifest":
+        """Load a manifest; a missing file or one made with other settings gives an empty one."""
+        manifest = cls(path, settings)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+            return manifest
+        if data.get("version") != MANIFEST_VERSION or data.get("settings") != settings:
+            print("⚠️ Translation settings changed since the last run; translating everything again")
+            return manifest
+        for key, (source_hash, target) in data.get("cells", {}).items():
+            manifest._entries[key] = (source_hash, target)
+            manifest._by_hash[source_hash] = target
+        return manifest
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, text: str) -> Optional[str]:
+        """Return the previous translation of text at key, or None if it must be translated."""
+        source_hash = text_hash(text)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == source_hash:
+            target = entry[1]
+        else:
+            target = self._by_hash.get(source_hash)
+        if target is not None:
+            with self._lock:
+                self._seen[key] = (source_hash, target)
+                self.reused += 1
+        return target
+
+    def record(self, key: str, text: str, translation: str) -> None:
+        """Remember the translation made for text at key in this run."""
+        with self._lock:
+            self._seen[key] = (text_hash(text), translation)
+
+    def save(self) -> None:
+        """Write the cells seen in this run, replacing the file atomically."""
+        with self._lock:
+            cells = {key: list(entry) for key, entry in self._seen.items()}
+        data = {"version": MANIFEST_VERSION, "settings": self.settings, "cells": cells}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,129 @@
+"""
+Placeholder Masking for Advanced Translation Suite
+Replaces numbers, dates, amounts, codes, URLs and emails with compact
+placeholders before text is sent to the model, and restores them afterwards
+"""
+
+import re
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Placeholder types, in matching priority order
+PLACEHOLDER_PATTERNS = [
+    # URLs
+    ("U", r"(?:https?://|www\.)[^\s<>\"']+[^\s<>\"'.,;:!?)\]]"),
+    # Email addresses
+    ("E", r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"),
+    # Inline code
+    ("X", r"`[^`\n]+`"),
+    # Dates: 2024-05-01, 01/05/2024, 1.5.24
+    ("D", r"(?<![\w.])(?:\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})(?![\w.])"),
+    # Currency amounts: $1,200.50, 1.000.000 VND, €12
+    ("C", r"(?:[$€£¥₫]\s?[-+]?\d[\d,.]*\d|[$€£¥₫]\s?\d|(?<![\w.])[-+]?\d[\d,.]*\s?(?:USD|EUR|GBP|JPY|VND|VNĐ|₫|đ)(?!\w))"),
+    # SKUs, model numbers and IDs: letters and digits mixed (AB-1234, X200), not ordinals (2nd)
+    ("K", r"\b(?!\d+(?:st|nd|rd|th)\b)(?=[\w-]*\d)(?=[\w-]*[A-Za-z])[A-Za-z0-9]+(?:[-_/][A-Za-z0-9]+)*\b"),
+    # Plain numbers and percentages: 12, -3.5, 1,234,567, 45%
+    ("N", r"(?<![\w.])[-+]?\d+(?:[.,]\d+)*%?(?![\w])"),
+]
+
+MASK_RE = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in PLACEHOLDER_PATTERNS))
+PLACEHOLDER_RE = re.compile(r"\[\[([A-Z])(\d+)\]\]")
+
+# Instruction added to the system message when placeholders are used
+PLACEHOLDER_INSTRUCTION = (
+    "Placeholders such as [[N1]] or [[D2]] stand for numbers, dates, amounts, codes, URLs "
+    "and emails. Copy every placeholder exactly once and unchanged; do not translate, "
+    "renumber or remove them"
+)
+
+
+class MaskedText(NamedTuple):
+    """Text with placeholders and the original values they stand for."""
+    text: str
+    values: Tuple[str, ...]
+    kinds: Tuple[str, ...]
+
+    @property
+    def placeholders(self) -> List[str]:
+        return [f"[[{kind}{i}]]" for i, kind in enumerate(self.kinds, 1)]
+
+
+def mask_text(text: str) -> MaskedText:
+    """Replace maskable tokens in text with numbered, typed placeholders.
+
+    Text that already contains "[[" is returned unmasked.
+    """
+    if "[[" in text:
+        return MaskedText(text, (), ())
+
+    values: List[str] = []
+    kinds: List[str] = []
+
+    def replace(match):
+        values.append(match.group(0))
+        kinds.append(match.lastgroup)
+        return f"[[{match.lastgroup}{len(values)}]]"
+
+    masked = MASK_RE.sub(replace, text)
+    return MaskedText(masked, tuple(values), tuple(kinds))
+
+
+def unmask_text(translated: str, masked: MaskedText) -> str:
+    """Restore the original values of the placeholders in a translation."""
+    if not masked.values:
+        return translated
+
+    def restore(match):
+        index = int(match.group(2)) - 1
+        if 0 <= index < len(masked.values) and masked.kinds[index] == match.group(1):
+            return masked.values[index]
+        return match.group(0)
+
+    return PLACEHOLDER_RE.sub(restore, translated)
+
+
+def placeholders_intact(translated: str, masked: MaskedText) -> bool:
+    """Check that a translation contains every placeholder once and no unknown ones."""
+    found = [m.group(0) for m in PLACEHOLDER_RE.finditer(translated)]
+    return sorted(found) == sorted(masked.placeholders)
+
+
+def needs_translation(masked: MaskedText) -> bool:
+    """Whether anything translatable is left once placeholders are removed."""
+    remainder = PLACEHOLDER_RE.sub("", masked.text)
+    return any(char.isalpha() for char in remainder)
+
+
+class TemplateCache:
+    """Translations of masked templates, shared by every segment that masks to the same text.
+
+    "Invoice 10023 due on 2024-05-01" and "Invoice 10487 due on 2024-06-12"
+    both mask to "Invoice [[N1]] due on [[D2]]", so one translation of the
+    template is re-instantiated locally for each variant. Safe to share
+    between threads.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self._templates: Dict[str, str] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(self, masked: MaskedText) -> Optional[str]:
+        """Return the translation of masked with its own values filled in, or None."""
+        template = self._templates.get(masked.text)
+        if template is None:
+            return None
+        return unmask_text(template, masked)
+
+    def put(self, masked: MaskedText, translated_template: str) -> None:
+        """Store the translation of a masked template (placeholders still in place).
+
+        Once max_entries templates are stored, new ones are ignored.
+        """
+        if masked.values and placeholders_intact(translated_template, masked):
+            with self._lock:
+                if self.max_entries is None or len(self._templates) < self.max_entries:
+                    self._templates[masked.text] = translated_template
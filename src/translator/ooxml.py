@@ -0,0 +1,702 @@
+"""
+OOXML Utilities for Advanced Translation Suite
+Streams the XML parts of Office Open XML packages (.xlsx, .docx, .pptx)
+directly, without loading documents, and repackages them without
+recompressing unchanged parts
+"""
+
+import html
+import itertools
+import posixpath
+import re
+import struct
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from copy import deepcopy
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from xml.sax.saxutils import escape, quoteattr
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+XML_SPACE = f"{{{XML_NS}}}space"
+OFFICE_DOCUMENT_REL = "/officeDocument"
+SHARED_STRINGS_REL = "/sharedStrings"
+
+ROOT_START_RE = re.compile(rb"<(?:\w+:)?sst\b[^>]*>")
+XMLNS_RE = re.compile(rb"\sxmlns(?::([\w.-]+))?\s*=\s*([\"'])(.*?)\2", re.S)
+
+# Parts holding text outside the cells, by content type
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+TEXT_PART_KINDS = {
+    "application/vnd.openxmlformats-officedocument.drawing+xml": "shape",
+    "application/vnd.openxmlformats-officedocument.drawingml.chart+xml": "chart",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.comments+xml": "comment",
+    "application/vnd.ms-excel.threadedcomments+xml": "comment",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml": "header",
+}
+# The same parts by relationship type (end of the type URI), for packages that
+# only give them a generic content type through a <Default Extension="xml">
+TEXT_PART_RELS = {
+    "/drawing": "shape",
+    "/chart": "chart",
+    "/comments": "comment",
+    "/threadedComment": "comment",
+    "/worksheet": "header",
+}
+
+# DrawingML paragraphs (<a:p>) and text runs (<a:t>, <t>); the lookbehind
+# leaves out empty elements such as <a:p/>
+PARAGRAPH_RE = re.compile(r"<((?:\w+:)?)p\b[^>]*(?<!/)>(.*?)</\1p>", re.S)
+TEXT_RUN_RE = re.compile(r"<((?:\w+:)?)t\b(?:\s[^>]*)?(?<!/)>(.*?)</\1t>", re.S)
+RICH_RUN_RE = re.compile(r"<((?:\w+:)?)r\b(?:\s[^>]*)?(?<!/)>(.*?)</\1r>", re.S)
+BOLD_RE = re.compile(r"<(?:\w+:)?b(?:\s[^>]*)?/>")
+COMMENT_TEXT_RE = re.compile(r"<((?:\w+:)?)text\b[^>]*(?<!/)>(.*?)</\1text>", re.S)
+HEADER_FOOTER_RE = re.compile(r"<((?:\w+:)?)((?:odd|even|first)(?:Header|Footer))\b[^>]*(?<!/)>(.*?)</\1\2>", re.S)
+HEADER_FOOTER_START_RE = re.compile(rb"<(?:\w+:)?headerFooter\b")
+HEADER_FOOTER_END_RE = re.compile(rb"</(?:\w+:)?headerFooter>")
+# Formatting and field codes of header/footer text (&L, &P, &"Arial,Bold", &12, ...)
+HEADER_CODE_RE = re.compile(r'(&(?:"[^"]*"|\d+|K[0-9A-Fa-f]{6}|K\d\d[+-]\d{3}|.))', re.S)
+
+# ZIP record layouts (PKWARE APPNOTE 4.3.7, 4.3.12, 4.3.16)
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+LOCAL_SIGNATURE = b"PK\x03\x04"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+END_SIGNATURE = b"PK\x05\x06"
+DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+ZIP32_LIMIT = 0xFFFFFFFF
+COPY_CHUNK = 1 << 20
+
+# New content for a part: bytes, or a function returning chunks of bytes
+PartContent = Union[bytes, Callable[[], Iterable[bytes]]]
+
+
+def _q(tag: str) -> str:
+    return f"{{{MAIN_NS}}}{tag}"
+
+
+def _si_text(si: ET.Element) -> str:
+    """Plain text of a shared string item: its <t> or the <t> of each rich-text run.
+
+    Phonetic runs (<rPh>) are not part of the displayed text and are skipped.
+    """
+    parts = []
+    for child in si:
+        if child.tag == _q("t"):
+            parts.append(child.text or "")
+        elif child.tag == _q("r"):
+            t = child.find(_q("t"))
+            if t is not None:
+                parts.append(t.text or "")
+    return "".join(parts)
+
+
+def _set_si_text(si: ET.Element, text: str) -> None:
+    """Replace the text of a shared string item.
+
+    Rich text keeps the formatting of its first non-empty run for the whole
+    translation, since run boundaries do not survive translation. Phonetic
+    runs belong to the old text and are dropped.
+    """
+    runs = [child for child in si if child.tag == _q("r")]
+    phonetic_props = [child for child in si if child.tag == _q("phoneticPr")]
+
+    t = ET.Element(_q("t"))
+    t.text = text
+    if text != text.strip() or "\n" in text:
+        t.set(XML_SPACE, "preserve")
+
+    if runs:
+        styled = next((r for r in runs if (r.findtext(_q("t")) or "").strip()), runs[0])
+        run = ET.Element(_q("r"))
+        rpr = styled.find(_q("rPr"))
+        if rpr is not None:
+            run.append(deepcopy(rpr))
+        run.append(t)
+        new_children = [run]
+    else:
+        new_children = [t]
+
+    for child in list(si):
+        si.remove(child)
+    for child in new_children + phonetic_props:
+        si.append(child)
+
+
+def root_prefixes(start_tag: bytes) -> Dict[str, str]:
+    """Namespace URI -> prefix ("" for the default namespace) declared on a root start tag."""
+    prefixes = {XML_NS: "xml"}
+    for match in XMLNS_RE.finditer(start_tag):
+        prefixes.setdefault(match.group(3).decode("utf-8"), (match.group(1) or b"").decode("utf-8"))
+    return prefixes
+
+
+def _name(qualified: str, prefixes: Dict[str, str], local_decls: Dict[str, str], attribute: bool = False) -> str:
+    """Prefixed name of an ElementTree "{uri}local" name.
+
+    Namespaces the root does not declare get a prefix declared on the
+    element itself (collected in local_decls). Attributes cannot use the
+    default namespace, so they get a declared prefix too.
+    """
+    if not qualified.startswith("{"):
+        return qualified
+    uri, local = qualified[1:].split("}", 1)
+    prefix = prefixes.get(uri)
+    if prefix is None or (attribute and not prefix):
+        prefix = local_decls.get(uri)
+        if prefix is None:
+            taken = set(prefixes.values()) | set(local_decls.values())
+            prefix = next(f"ns{k}" for k in itertools.count() if f"ns{k}" not in taken)
+            local_decls[uri] = prefix
+    return f"{prefix}:{local}" if prefix else local
+
+
+def _serialize(elem: ET.Element, prefixes: Optional[Dict[str, str]] = None) -> bytes:
+    """Serialize an element without repeating the namespace declarations of the root.
+
+    The enclosing root element is copied byte for byte and already declares
+    the namespaces, which ElementTree cannot assume; prefixes maps each
+    namespace URI to the prefix the root declares for it (by default the
+    main namespace is the default namespace), so children land in the same
+    namespace whether the root is written <sst> or <x:sst>.
+    """
+    if prefixes is None:
+        prefixes = {MAIN_NS: "", XML_NS: "xml"}
+    local_decls: Dict[str, str] = {}
+    name = _name(elem.tag, prefixes, local_decls)
+    attrs = "".join(
+        f" {_name(key, prefixes, local_decls, attribute=True)}={quoteattr(value)}"
+        for key, value in elem.attrib.items()
+    )
+    attrs += "".join(f" xmlns:{prefix}={quoteattr(uri)}" for uri, prefix in local_decls.items())
+    if local_decls:
+        prefixes = {**prefixes, **local_decls}
+    if not elem.text and len(elem) == 0:
+        return f"<{name}{attrs}/>".encode() + escape(elem.tail or "").encode()
+    parts = [f"<{name}{attrs}>".encode(), escape(elem.text or "").encode()]
+    for child in elem:
+        parts.append(_serialize(child, prefixes))
+    parts.append(f"</{name}>".encode())
+    parts.append(escape(elem.tail or "").encode())
+    return b"".join(parts)
+
+
+def _iter_children(stream):
+    """Yield each direct child of the root of a stream (<si>, <extLst>, ...), then free it."""
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            yield elem
+            root.clear()
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _relationships(zf: zipfile.ZipFile, part: str) -> List[Tuple[str, str]]:
+    """(type URI, target part) of the internal relationships of a part ("" for the package)."""
+    rels = _rels_path(part) if part else "_rels/.rels"
+    if rels not in zf.NameToInfo:
+        return []
+    base = posixpath.dirname(part)
+    relationships = []
+    for rel in ET.fromstring(zf.read(rels)).iter(f"{{{REL_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(base, target))
+        relationships.append((rel.get("Type", ""), target))
+    return relationships
+
+
+def _related_parts(zf: zipfile.ZipFile, part: str, rel_type: str) -> List[str]:
+    """Names of the parts a part links to with relationships of the given type.
+
+    part is "" for the package itself; rel_type matches the end of the type URI.
+    """
+    return [target for type_uri, target in _relationships(zf, part) if type_uri.endswith(rel_type)]
+
+
+def shared_strings_part(zf: zipfile.ZipFile) -> Optional[str]:
+    """Name of the shared strings part of an open .xlsx package, if it has one."""
+    names = set(zf.namelist())
+    for workbook in _related_parts(zf, "", OFFICE_DOCUMENT_REL) or ["xl/workbook.xml"]:
+        for part in _related_parts(zf, workbook, SHARED_STRINGS_REL):
+            if part in names:
+                return part
+    return "xl/sharedStrings.xml" if "xl/sharedStrings.xml" in names else None
+
+
+def has_shared_strings(path: str) -> bool:
+    """Whether an .xlsx file has a shared strings part."""
+    with zipfile.ZipFile(path) as zf:
+        return shared_strings_part(zf) is not None
+
+
+def read_shared_strings(path: str) -> List[str]:
+    """Read the plain text of every shared string of an .xlsx file, in index order.
+
+    The part is parsed incrementally, so memory use follows the number of
+    unique strings rather than the size of the XML.
+
+    Args:
+        path: Path to the .xlsx file
+
+    Returns:
+        List of strings; empty if the workbook has no shared strings part
+    """
+    with zipfile.ZipFile(path) as zf:
+        part = shared_strings_part(zf)
+        if part is None:
+            return []
+        with zf.open(part) as stream:
+            return [_si_text(child) for child in _iter_children(stream) if child.tag == _q("si")]
+
+
+def write_shared_strings(input_path: str, output_path: str, replacements: Dict[int, str]) -> None:
+    """Copy an .xlsx file, replacing the text of some shared strings.
+
+    Only the shared strings part is rewritten (streamed item by item); every
+    other part, including the sheet XML, is copied unchanged.
+
+    Args:
+        input_path: Path to the source .xlsx file
+        output_path: Path of the file to write
+        replacements: New text by shared string index
+    """
+    repackage(input_path, output_path, shared_strings_replacement(input_path, replacements))
+
+
+def shared_strings_replacement(input_path: str, replacements: Dict[int, str]) -> Dict[str, PartContent]:
+    """Replacement of the shared strings part for repackage, or {} if there is nothing to replace."""
+    with zipfile.ZipFile(input_path) as zf:
+        part = shared_strings_part(zf)
+    if part is None or not replacements:
+        return {}
+
+    def shared_strings():
+        with zipfile.ZipFile(input_path) as zin:
+            # Keep the original root element (namespaces, counts) byte for byte
+            with zin.open(part) as stream:
+                head = stream.read(65536)
+            match = ROOT_START_RE.search(head)
+            if match is None or head[match.end() - 2:match.end()] == b"/>":
+                yield zin.read(part)
+                return
+
+            prefixes = root_prefixes(match.group(0))
+            with zin.open(part) as stream:
+                yield head[:match.end()]
+                # Children other than <si> (e.g. <extLst>) are copied as they are
+                index = 0
+                for child in _iter_children(stream):
+                    if child.tag == _q("si"):
+                        if index in replacements:
+                            _set_si_text(child, replacements[index])
+                        index += 1
+                    child.tail = None
+                    yield _serialize(child, prefixes)
+            yield b"</" + head[match.start() + 1:match.end()].split()[0].rstrip(b">") + b">"
+
+    return {part: shared_strings}
+
+
+class TextUnit(NamedTuple):
+    """A piece of text outside the cells: one paragraph, comment or header section."""
+    part: str    # Package part holding the text
+    index: int   # Position among the units of that part
+    kind: str    # "shape", "chart", "comment" or "header"
+    text: str
+
+
+def _text_parts(zf: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """(part, kind) of every drawing, chart, comments and worksheet part of a package.
+
+    A part's content type comes from its <Override> entry or else from the
+    <Default> entry for its extension; parts whose content type says nothing
+    (e.g. a Default of "application/xml") are recognised by the type of the
+    relationships pointing at them.
+    """
+    names = zf.namelist()
+    if "[Content_Types].xml" not in names:
+        return []
+    types = ET.fromstring(zf.read("[Content_Types].xml"))
+    defaults = {
+        default.get("Extension", "").lower(): default.get("ContentType", "")
+        for default in types.iter(f"{{{CONTENT_TYPES_NS}}}Default")
+    }
+    overrides = {
+        override.get("PartName", "").lstrip("/"): override.get("ContentType", "")
+        for override in types.iter(f"{{{CONTENT_TYPES_NS}}}Override")
+    }
+
+    by_relationship: Dict[str, str] = {}
+    for rels in names:
+        directory, name = posixpath.split(rels)
+        if posixpath.basename(directory) != "_rels" or not name.endswith(".rels"):
+            continue
+        source = posixpath.join(posixpath.dirname(directory), name[:-len(".rels")])
+        for type_uri, part in _relationships(zf, source):
+            kind = TEXT_PART_RELS.get(type_uri[type_uri.rfind("/"):])
+            if kind:
+                by_relationship.setdefault(part, kind)
+
+    parts = []
+    for part in names:
+        content_type = overrides.get(part)
+        if content_type is None:
+            content_type = defaults.get(posixpath.splitext(part)[1].lstrip(".").lower(), "")
+        kind = TEXT_PART_KINDS.get(content_type) or by_relationship.get(part)
+        if kind:
+            parts.append((part, kind))
+    return parts
+
+
+def _fill_runs(body: str, spans: List[Tuple[int, int]], text: str) -> str:
+    """Put text into the first non-empty run of body and empty the other runs.
+
+    Run boundaries do not survive translation, so the whole translation takes
+    the formatting of the first run that had text. Whitespace around the
+    original text (e.g. the line break after a comment's author) is kept.
+    """
+    texts = [html.unescape(body[start:end]) for start, end in spans]
+    joined = "".join(texts)
+    lead = joined[:len(joined) - len(joined.lstrip())]
+    trail = joined[len(joined.rstrip()):]
+    first = next((k for k, t in enumerate(texts) if t.strip()), 0)
+    out = []
+    pos = 0
+    for k, (start, end) in enumerate(spans):
+        out.append(body[pos:start])
+        if k == first:
+            out.append(escape(lead + text.strip() + trail))
+        pos = end
+    out.append(body[pos:])
+    return "".join(out)
+
+
+def _rewrite_text(xml: str, kind: str, replace: Callable[[int, str], Optional[str]]) -> str:
+    """Walk the text units of a part in order, replacing those replace() returns text for.
+
+    replace(index, text) returns the new text of a unit or None to keep it;
+    reading and writing share this walk so that unit indices always agree.
+    """
+    counter = itertools.count()
+
+    def unit(body: str, spans: List[Tuple[int, int]]) -> str:
+        text = "".join(html.unescape(body[start:end]) for start, end in spans)
+        if not text.strip():
+            return body
+        new_text = replace(next(counter), text)
+        return body if new_text is None else _fill_runs(body, spans, new_text)
+
+    def run_spans(body: str) -> List[Tuple[int, int]]:
+        return [m.span(2) for m in TEXT_RUN_RE.finditer(body)]
+
+    def paragraph(m):
+        start, end = m.span(2)
+        whole = m.group(0)
+        offset = m.start()
+        body = m.group(2)
+        return whole[:start - offset] + unit(body, run_spans(body)) + whole[end - offset:]
+
+    def comment(m):
+        body = m.group(2)
+        runs = list(RICH_RUN_RE.finditer(body))
+        if runs:
+            # Legacy comments start with the author's name in a bold run ("Jane:")
+            first_run = runs[0].group(2)
+            first_text = "".join(html.unescape(t.group(2)) for t in TEXT_RUN_RE.finditer(first_run))
+            if len(runs) > 1 and BOLD_RE.search(first_run) and first_text.rstrip().endswith(":"):
+                runs = runs[1:]
+            spans = [
+                (run.start(2) + t.start(2), run.start(2) + t.end(2))
+                for run in runs for t in TEXT_RUN_RE.finditer(run.group(2))
+            ]
+        elif TEXT_RUN_RE.search(body):
+            spans = run_spans(body)
+        else:
+            spans = [(0, len(body))]  # Threaded comments hold plain text
+        start, end = m.span(2)
+        offset = m.start()
+        return m.group(0)[:start - offset] + unit(body, spans) + m.group(0)[end - offset:]
+
+    def header_footer(m):
+        pieces = HEADER_CODE_RE.split(html.unescape(m.group(3)))
+        changed = False
+        for k in range(0, len(pieces), 2):  # Even pieces are text, odd ones codes
+            piece = pieces[k]
+            if not piece.strip():
+                continue
+            new_text = replace(next(counter), piece)
+            if new_text is not None:
+                lead = piece[:len(piece) - len(piece.lstrip())]
+                trail = piece[len(piece.rstrip()):]
+                # A single "&" would start a code; "&&" prints an ampersand
+                pieces[k] = lead + new_text.strip().replace("&", "&&") + trail
+                changed = True
+        if not changed:
+            return m.group(0)
+        start, end = m.span(3)
+        offset = m.start()
+        return m.group(0)[:start - offset] + escape("".join(pieces)) + m.group(0)[end - offset:]
+
+    if kind in ("shape", "chart"):
+        return PARAGRAPH_RE.sub(paragraph, xml)
+    if kind == "comment":
+        return COMMENT_TEXT_RE.sub(comment, xml)
+    return HEADER_FOOTER_RE.sub(header_footer, xml)
+
+
+def _header_footer_span(zf: zipfile.ZipFile, part: str) -> Optional[Tuple[int, bytes]]:
+    """Offset and bytes of a worksheet's <headerFooter> element, if it has one.
+
+    Worksheets can be very large and the element comes after the cell data,
+    so the part is scanned in chunks instead of being loaded.
+    """
+    position = 0
+    tail = b""
+    with zf.open(part) as stream:
+        while True:
+            chunk = stream.read(COPY_CHUNK)
+            if not chunk:
+                return None
+            data = tail + chunk
+            match = HEADER_FOOTER_START_RE.search(data)
+            if match is not None:
+                rest = data[match.start():] + stream.read()
+                end = HEADER_FOOTER_END_RE.search(rest)
+                if end is None:
+                    return None
+                return position - len(tail) + match.start(), rest[:end.end()]
+            position += len(chunk)
+            tail = data[-32:]
+
+
+def read_text_units(path: str) -> List[TextUnit]:
+    """Read the text of shapes, charts, comments and headers/footers of an .xlsx file.
+
+    Works on the package parts directly: DrawingML paragraphs of drawings and
+    charts, legacy and threaded comments (without the author prefix) and the
+    text sections of worksheet headers and footers (without their codes).
+    Text that comes from cells, such as cached chart labels, is left out.
+
+    Args:
+        path: Path to the .xlsx file
+
+    Returns:
+        List of TextUnit in package order
+    """
+    units = []
+    with zipfile.ZipFile(path) as zf:
+        for part, kind in _text_parts(zf):
+            if kind == "header":
+                found = _header_footer_span(zf, part)
+                if found is None:
+                    continue
+                xml = found[1].decode("utf-8")
+            else:
+                xml = zf.read(part).decode("utf-8")
+            _rewrite_text(xml, kind, lambda index, text: units.append(TextUnit(part, index, kind, text)))
+    return units
+
+
+def text_part_replacements(input_path: str, translations: Dict[Tuple[str, int], str]) -> Dict[str, PartContent]:
+    """Replacements for repackage that write translated text units back.
+
+    Args:
+        input_path: Path to the source .xlsx file
+        translations: New text by (part, unit index) as returned by read_text_units
+
+    Returns:
+        New content by part name; worksheets are streamed with only their
+        <headerFooter> element changed
+    """
+    by_part: Dict[str, Dict[int, str]] = {}
+    for (part, index), text in translations.items():
+        by_part.setdefault(part, {})[index] = text
+
+    replacements: Dict[str, PartContent] = {}
+    with zipfile.ZipFile(input_path) as zf:
+        for part, kind in _text_parts(zf):
+            if part not in by_part:
+                continue
+            new_texts = by_part[part]
+            if kind != "header":
+                xml = zf.read(part).decode("utf-8")
+                replacements[part] = _rewrite_text(xml, kind, lambda index, text: new_texts.get(index)).encode("utf-8")
+                continue
+
+            found = _header_footer_span(zf, part)
+            if found is None:
+                continue
+            offset, old = found
+            new = _rewrite_text(old.decode("utf-8"), kind, lambda index, text: new_texts.get(index)).encode("utf-8")
+
+            def spliced(part=part, offset=offset, old=old, new=new):
+                with zipfile.ZipFile(input_path) as zin, zin.open(part) as stream:
+                    remaining = offset
+                    while remaining > 0:
+                        chunk = stream.read(min(COPY_CHUNK, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        yield chunk
+                    stream.read(len(old))
+                    yield new
+                    while True:
+                        chunk = stream.read(COPY_CHUNK)
+                        if not chunk:
+                            break
+                        yield chunk
+
+            replacements[part] = spliced
+    return replacements
+
+
+class _Zip64Required(Exception):
+    """The package needs ZIP64 records, which the raw writer does not produce."""
+
+
+def _chunks(content: PartContent) -> Iterable[bytes]:
+    return [content] if isinstance(content, bytes) else content()
+
+
+def _dos_datetime(date_time) -> tuple:
+    year, month, day, hour, minute, second = date_time
+    return ((hour << 11) | (minute << 5) | (second // 2),
+            ((max(year, 1980) - 1980) << 9) | (month << 5) | day)
+
+
+def _raw_repackage(input_path: str, output_path: str, replacements: Dict[str, PartContent]) -> None:
+    with zipfile.ZipFile(input_path) as zf:
+        infos = zf.infolist()
+    if len(infos) >= 0xFFFF:
+        raise _Zip64Required()
+    for info in infos:
+        if max(info.header_offset, info.compress_size, info.file_size) >= ZIP32_LIMIT:
+            raise _Zip64Required()
+        if info.flag_bits & 0x1:
+            raise _Zip64Required()  # Encrypted members: leave to zipfile
+
+    central = []
+    with open(input_path, "rb") as src, open(output_path, "wb") as out:
+        for info in infos:
+            offset = out.tell()
+            if offset >= ZIP32_LIMIT:
+                raise _Zip64Required()
+            name = info.filename.encode("utf-8" if info.flag_bits & 0x800 else "cp437")
+
+            if info.filename in replacements:
+                # Deflate the new content, then patch sizes and CRC into the header
+                flags = info.flag_bits & 0x800
+                dos_time, dos_date = _dos_datetime(info.date_time)
+                out.write(LOCAL_HEADER.pack(LOCAL_SIGNATURE, 20, flags, zipfile.ZIP_DEFLATED,
+                                            dos_time, dos_date, 0, 0, 0, len(name), 0))
+                out.write(name)
+                compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+                crc = size = compressed = 0
+                for chunk in _chunks(replacements[info.filename]):
+                    crc = zlib.crc32(chunk, crc)
+                    size += len(chunk)
+                    data = compressor.compress(chunk)
+                    compressed += len(data)
+                    out.write(data)
+                data = compressor.flush()
+                compressed += len(data)
+                out.write(data)
+                if max(size, compressed) >= ZIP32_LIMIT:
+                    raise _Zip64Required()
+                end = out.tell()
+                out.seek(offset + 14)
+                out.write(struct.pack("<3L", crc, compressed, size))
+                out.seek(end)
+                central.append((info, name, offset, flags, zipfile.ZIP_DEFLATED, 20, crc, compressed, size))
+                continue
+
+            # Copy the local header, compressed data and data descriptor as they are
+            src.seek(info.header_offset)
+            header = src.read(LOCAL_HEADER.size)
+            if header[:4] != LOCAL_SIGNATURE:
+                raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+            name_length, extra_length = struct.unpack("<2H", header[26:30])
+            length = LOCAL_HEADER.size + name_length + extra_length + info.compress_size
+            if info.flag_bits & 0x8:
+                src.seek(info.header_offset + length)
+                length += 16 if src.read(4) == DESCRIPTOR_SIGNATURE else 12
+            src.seek(info.header_offset)
+            while length > 0:
+                chunk = src.read(min(COPY_CHUNK, length))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+                out.write(chunk)
+                length -= len(chunk)
+            central.append((info, name, offset, info.flag_bits, info.compress_type,
+                            info.extract_version, info.CRC, info.compress_size, info.file_size))
+
+        directory_offset = out.tell()
+        for info, name, offset, flags, method, version, crc, compressed, size in central:
+            dos_time, dos_date = _dos_datetime(info.date_time)
+            extra = info.extra if isinstance(info.extra, bytes) else b""
+            comment = info.comment or b""
+            out.write(CENTRAL_HEADER.pack(
+                CENTRAL_SIGNATURE, (info.create_system << 8) | info.create_version, version,
+                flags, method, dos_time, dos_date, crc, compressed, size,
+                len(name), len(extra), len(comment), 0, info.internal_attr, info.external_attr, offset
+            ))
+            out.write(name + extra + comment)
+        directory_size = out.tell() - directory_offset
+        if directory_offset + directory_size >= ZIP32_LIMIT:
+            raise _Zip64Required()
+        out.write(END_RECORD.pack(END_SIGNATURE, 0, 0, len(central), len(central),
+                                  directory_size, directory_offset, 0))
+
+
+def _zipfile_repackage(input_path: str, output_path: str, replacements: Dict[str, PartContent]) -> None:
+    with zipfile.ZipFile(input_path) as zin, \
+            zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zout:
+        for item in zin.infolist():
+            if item.filename not in replacements:
+                zout.writestr(item, zin.read(item.filename))
+                continue
+            item.compress_type = zipfile.ZIP_DEFLATED
+            with zout.open(item, "w", force_zip64=True) as out:
+                for chunk in _chunks(replacements[item.filename]):
+                    out.write(chunk)
+
+
+def repackage(input_path: str, output_path: str, replacements: Dict[str, PartContent]) -> None:
+    """Copy an OOXML package (.xlsx, .docx, .pptx), replacing some of its parts.
+
+    Unchanged members are copied byte for byte, compressed data included, so
+    images, embedded objects and pivot caches are never decompressed or
+    recompressed. Replaced parts are deflated as they are streamed in. Members
+    keep their order, names, timestamps and attributes. Packages that need
+    ZIP64 records (over 4 GB or 65535 members) or contain encrypted members
+    are rewritten with zipfile instead.
+
+    Args:
+        input_path: Path to the source package
+        output_path: Path of the package to write (must differ from input_path)
+        replacements: New content by part name, as bytes or as a function
+            returning an iterable of byte chunks
+    """
+    try:
+        _raw_repackage(input_path, output_path, replacements)
+    except _Zip64Required:
+        _zipfile_repackage(input_path, output_path, replacements)
@@ -3,20 +3,40 @@ PDF Processor for Advanced Translation Suite
 Handles PDF file reading, language detection, and translation
 """
 
+import json
 import os
 import re
+import shutil
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import translator utilities
-from .translator_core import batch_translate, detect_language
-from .document_utils import extract_pdf
-
-# Import reportlab dependencies
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from .translator_core import LANGUAGE_CODES, batch_translate, detect_text_languages
+from .translation_memory import TranslationMemory
+from .masking import TemplateCache
+from .document_utils import extract_pdf, extract_pdf_pages
+from .cell_classifier import TEXT, classify_value
+from .text_layout import TextLayout
+
+# Fonts used for text written back into the page by the layout-preserving mode
+LAYOUT_FONT_DIR = "font"
+LAYOUT_FONT = "DejaVuSans.ttf"
+LAYOUT_BOLD_FONT = "DejaVuSansCondensed-Bold.ttf"
+# Translations that do not fit their box are shrunk down to this share of the original size
+MIN_FONT_SCALE = 0.5
+FONT_SHRINK_STEP = 0.9
+# PyMuPDF span flag of bold text
+BOLD_FLAG = 16
+
+# Streaming mode: window checkpoint and per-window PDF parts kept next to the output
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+PARTS_SUFFIX = ".parts"
+# Largest number of templates kept by the streaming mode
+STREAMING_TEMPLATE_LIMIT = 50000
+# Longest unfinished paragraph carried into the next window; longer text is
+# cut at the window boundary so a PDF without blank lines cannot grow the window
+MAX_CARRY_CHARS = 20000
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
 
 # Define a function to register fonts from a directory
 def register_fonts_from_directory(font_dir: str):
@@ -26,6 +46,9 @@ def register_fonts_from_directory(font_dir: str):
     Args:
         font_dir: The directory containing the font files.
     """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
     font_dir_path = Path(font_dir)
     if not font_dir_path.exists() or not font_dir_path.is_dir():
         print(f"Warning: Font directory not found or is not a directory: {font_dir}")
@@ -40,6 +63,163 @@ def register_fonts_from_directory(font_dir: str):
             print(f"Warning: Could not register font {font_name} from {font_file}: {e}")
 
 
+def _translate_paragraphs(
+    paragraphs: List[str],
+    source_lang: str,
+    target_lang: str,
+    country: str,
+    batch_size: int,
+    detect_languages: bool,
+    translation_style: str,
+    custom_style_instructions: Optional[str],
+    terminology_file: Optional[str],
+    mixed_languages: bool,
+    translation_memory: Optional[TranslationMemory],
+    template_cache: Optional[TemplateCache],
+) -> List[str]:
+    """Translate paragraphs in batches, grouped by detected language; returns them in order."""
+    translated_paragraphs = []
+
+    if detect_languages:
+        # Group paragraphs by detected language
+        language_groups = {}
+
+        print("   🔍 Detecting languages in paragraphs...")
+        # Skip very short paragraphs
+        detectable = [i for i, paragraph in enumerate(paragraphs) if len(paragraph) >= 10]
+        detected_langs = detect_text_languages([paragraphs[i] for i in detectable], batch_size)
+        for i, detected_lang in zip(detectable, detected_langs):
+            paragraph = paragraphs[i]
+            if detected_lang not in language_groups:
+                language_groups[detected_lang] = []
+            language_groups[detected_lang].append((i, paragraph))
+
+        print(f"   ✅ Detected {len(language_groups)} different languages in the PDF")
+
+        # Few paragraphs per language would each cost a request; let them share batches
+        paragraph_langs = {}
+        for lang, para_indices in language_groups.items():
+            if lang.lower() != target_lang.lower():
+                paragraph_langs.update((i, lang) for i, _ in para_indices)
+        if mixed_languages and len(paragraph_langs) and len(set(paragraph_langs.values())) > 1:
+            print("   🌐 Batching paragraphs of all source languages together")
+            language_groups = {
+                "mixed languages": [(i, paragraphs[i]) for i in sorted(paragraph_langs)],
+                **{lang: group for lang, group in language_groups.items() if lang.lower() == target_lang.lower()},
+            }
+
+        # Initialize translated paragraphs with original text
+        translated_paragraphs = paragraphs.copy()
+
+        # Translate each language group separately
+        for lang, para_indices in language_groups.items():
+            if lang.lower() == target_lang.lower():
+                print(f"   ⏩ Skipping paragraphs in target language: {lang}")
+                continue
+
+            print(f"   🔄 Translating {len(para_indices)} paragraphs from {lang} to {target_lang}")
+
+            # Extract paragraphs for this language
+            lang_paragraphs = [p[1] for p in para_indices]
+
+            # Translate in batches
+            total_batches = (len(lang_paragraphs) - 1) // batch_size + 1
+
+            for batch_idx in range(total_batches):
+                start_idx = batch_idx * batch_size
+                end_idx = min((batch_idx + 1) * batch_size, len(lang_paragraphs))
+                batch = lang_paragraphs[start_idx:end_idx]
+
+                print(f"      📦 Processing batch {batch_idx+1}/{total_batches} ({len(batch)} paragraphs)")
+
+                # Translate the batch
+                translated_batch = batch_translate(
+                    source_lang=lang,
+                    target_lang=target_lang,
+                    source_texts=batch,
+                    country=country,
+                    translation_style=translation_style,
+                    custom_style_instructions=custom_style_instructions,
+                    terminology_file=terminology_file,
+                    translation_memory=translation_memory,
+                    template_cache=template_cache,
+                    source_langs=[paragraph_langs[i] for i, _ in para_indices[start_idx:end_idx]]
+                )
+
+                # Update the translated paragraphs
+                for i, (orig_idx, _) in enumerate(para_indices[start_idx:end_idx]):
+                    translated_paragraphs[orig_idx] = translated_batch[i]
+    else:
+        # Translate all paragraphs without language detection
+        print(f"   🔄 Translating {len(paragraphs)} paragraphs from {source_lang} to {target_lang}")
+
+        # Translate in batches
+        total_batches = (len(paragraphs) - 1) // batch_size + 1
+
+        for batch_idx in range(total_batches):
+            start_idx = batch_idx * batch_size
+            end_idx = min((batch_idx + 1) * batch_size, len(paragraphs))
+            batch = paragraphs[start_idx:end_idx]
+
+            print(f"      📦 Processing batch {batch_idx+1}/{total_batches} ({len(batch)} paragraphs)")
+
+            # Translate the batch
+            translated_batch = batch_translate(
+                source_lang=source_lang,
+                target_lang=target_lang,
+                source_texts=batch,
+                country=country,
+                translation_style=translation_style,
+                custom_style_instructions=custom_style_instructions,
+                terminology_file=terminology_file,
+                translation_memory=translation_memory,
+                template_cache=template_cache
+            )
+
+            translated_paragraphs.extend(translated_batch)
+
+    return translated_paragraphs
+
+
+def _render_pdf(output_path: str, paragraphs: List[str], language: Optional[str] = None) -> None:
+    """Write paragraphs as wrapped 12-pt lines on letter pages with reportlab.
+
+    language is the code of the text's language (e.g. "es"); with pyphen
+    installed, long words are hyphenated by its dictionary.
+    """
+    # reportlab is only needed for the PDF output, so import it here
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+
+    # Register fonts from the "font/" directory (once per process)
+    if 'DejaVuSans' not in pdfmetrics.getRegisteredFontNames():
+        font_dir = "font"  # Assuming the font directory is named "font" and is in the same directory as the script
+        register_fonts_from_directory(font_dir)
+
+    c = canvas.Canvas(output_path, pagesize=letter)
+    # Prioritize DejaVuSans and its variants if they are registered, else fall back to Helvetica
+    default_font = 'DejaVuSans' if 'DejaVuSans' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
+    c.setFont(default_font, 12)
+
+    # Lines fit the page width minus margins; each word is measured once
+    layout = TextLayout(lambda text: pdfmetrics.stringWidth(text, default_font, 12), 500, language=language)
+
+    # Add translated text to PDF
+    y = 750  # Start from top of page
+    for paragraph in paragraphs:
+        # Write lines to PDF
+        for line in layout.wrap(paragraph):
+            if y < 50:  # Start new page if near bottom
+                c.showPage()
+                y = 750
+                c.setFont(default_font, 12)
+            c.drawString(50, y, line)
+            y -= 15  # Line spacing
+
+    c.save()
+
+
 def process_pdf(
     input_path: str,
     output_path: Optional[str] = None,
@@ -51,10 +231,20 @@ def process_pdf(
     translation_style: str = "General",
     custom_style_instructions: Optional[str] = None,
     terminology_file: Optional[str] = None,
+    mixed_languages: bool = True,
+    preserve_layout: bool = False,
+    streaming: bool = False,
+    window_pages: int = 20,
+    resume: bool = False,
 ) -> Tuple[str, str]:
     """
     Process a PDF file: extract text, detect languages, translate, and save the result.
 
+    By default the text is extracted and re-rendered as plain lines on new
+    pages. With preserve_layout, the translation is written into the original
+    pages instead (see process_pdf_layout); with streaming, the document is
+    handled a window of pages at a time (see process_pdf_streaming).
+
     Args:
         input_path: Path to the PDF file to translate
         output_path: Path where to save the translated file (if None, auto-generated)
@@ -66,10 +256,31 @@ def process_pdf(
         translation_style: Style of translation to use (e.g., "Literary", "Technical")
         custom_style_instructions: Additional custom instructions for the style
         terminology_file: Path to custom terminology file
+        mixed_languages: With language detection, fill batches with paragraphs
+            of any language (each sent with its own source language) instead
+            of batching every language separately
+        preserve_layout: Keep the original pages, images and text positions
+        streaming: Translate and write window_pages pages at a time with bounded memory
+        window_pages: Pages per window in streaming mode
+        resume: In streaming mode, continue from the checkpoint of an interrupted run
 
     Returns:
         Tuple of (PDF output path, TXT output path)
     """
+    if preserve_layout:
+        if streaming:
+            print("⚠️ The layout-preserving mode already works page by page; ignoring streaming")
+        return process_pdf_layout(
+            input_path, output_path, source_lang, target_lang, country, batch_size,
+            detect_languages, translation_style, custom_style_instructions, terminology_file
+        )
+    if streaming:
+        return process_pdf_streaming(
+            input_path, output_path, source_lang, target_lang, country, batch_size,
+            detect_languages, translation_style, custom_style_instructions, terminology_file,
+            mixed_languages, window_pages, resume
+        )
+
     try:
         # Extract text from PDF
         print(f"\n🔄 Processing PDF file: {input_path}")
@@ -102,134 +313,416 @@ def process_pdf(
             output_path_pdf = f"{base_name}.pdf"
             output_path_txt = f"{base_name}.txt"
 
-        # Process paragraphs
-        translated_paragraphs = []
+        # Reuse translations of repeated and near-identical paragraphs
+        translation_memory = TranslationMemory()
+        # Paragraphs differing only in numbers, dates or codes share one translation
+        template_cache = TemplateCache()
 
-        if detect_languages:
-            # Group paragraphs by detected language
-            language_groups = {}
+        translated_paragraphs = _translate_paragraphs(
+            paragraphs, source_lang, target_lang, country, batch_size, detect_languages,
+            translation_style, custom_style_instructions, terminology_file, mixed_languages,
+            translation_memory, template_cache
+        )
 
-            print("   🔍 Detecting languages in paragraphs...")
-            for i, paragraph in enumerate(paragraphs):
-                if len(paragraph) < 10:  # Skip very short paragraphs
-                    continue
+        # Save the translated text to TXT file
+        with open(output_path_txt, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(translated_paragraphs))
 
-                detected_lang = detect_language(paragraph)
-                if detected_lang not in language_groups:
-                    language_groups[detected_lang] = []
-                language_groups[detected_lang].append((i, paragraph))
+        _render_pdf(output_path_pdf, translated_paragraphs, LANGUAGE_CODES.get(target_lang))
 
-            print(f"   ✅ Detected {len(language_groups)} different languages in the PDF")
+        print(f"   ✅ Translation completed and saved to:")
+        print(f"      PDF: {output_path_pdf}")
+        print(f"      TXT: {output_path_txt}")
+        return output_path_pdf, output_path_txt
 
-            # Initialize translated paragraphs with original text
-            translated_paragraphs = paragraphs.copy()
+    except Exception as e:
+        print(f"❌ Error processing PDF: {str(e)}")
+        return "", ""
 
-            # Translate each language group separately
-            for lang, para_indices in language_groups.items():
-                if lang.lower() == target_lang.lower():
-                    print(f"   ⏩ Skipping paragraphs in target language: {lang}")
-                    continue
 
-                print(f"   🔄 Translating {len(para_indices)} paragraphs from {lang} to {target_lang}")
+def _save_checkpoint(path: str, data: Dict[str, Any]) -> None:
+    """Replace the streaming checkpoint atomically."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
 
-                # Extract paragraphs for this language
-                lang_paragraphs = [p[1] for p in para_indices]
 
-                # Translate in batches
-                total_batches = (len(lang_paragraphs) - 1) // batch_size + 1
+def process_pdf_streaming(
+    input_path: str,
+    output_path: Optional[str] = None,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: Optional[str] = None,
+    terminology_file: Optional[str] = None,
+    mixed_languages: bool = True,
+    window_pages: int = 20,
+    resume: bool = False,
+    extract_workers: Optional[int] = None,
+) -> Tuple[str, str]:
+    """
+    Translate a large PDF window by window with bounded memory.
+
+    Pages are extracted lazily, window_pages at a time. Each window is split
+    into paragraphs, translated, appended to the TXT output and rendered to
+    its own PDF part, so results can be read while the job runs. A paragraph
+    that runs past the end of a window is carried over to the next one.
+    After every window the TXT file is forced to disk and a checkpoint
+    (<output>.pdf.checkpoint.json) records the next page, so an interrupted
+    run continues there with resume. The parts are merged into the output
+    PDF at the end. Repeated paragraphs are reused through a capped template
+    cache rather than a translation memory, which would grow with the
+    document.
 
-                for batch_idx in range(total_batches):
-                    start_idx = batch_idx * batch_size
-                    end_idx = min((batch_idx + 1) * batch_size, len(lang_paragraphs))
-                    batch = lang_paragraphs[start_idx:end_idx]
+    Args:
+        input_path: Path to the PDF file to translate
+        output_path: Path where to save the translated file (if None, auto-generated)
+        source_lang: Source language of the content (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of paragraphs to translate in one batch
+        detect_languages: Whether to detect languages in different sections of the PDF
+        translation_style: Style of translation to use (e.g., "Literary", "Technical")
+        custom_style_instructions: Additional custom instructions for the style
+        terminology_file: Path to custom terminology file
+        mixed_languages: Fill batches with paragraphs of any detected language
+        window_pages: Number of pages extracted, translated and written at a time
+        resume: Continue from the checkpoint left by an interrupted run
+        extract_workers: Processes extracting page text (see extract_pdf_pages)
 
-                    print(f"      📦 Processing batch {batch_idx+1}/{total_batches} ({len(batch)} paragraphs)")
+    Returns:
+        Tuple of (PDF output path, TXT output path)
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        print("❌ PyMuPDF is not installed. Please install with: pip install pymupdf")
+        return "", ""
 
-                    # Translate the batch
-                    translated_batch = batch_translate(
-                        source_lang=lang,
-                        target_lang=target_lang,
-                        source_texts=batch,
-                        country=country,
-                        translation_style=translation_style,
-                        custom_style_instructions=custom_style_instructions,
-                        terminology_file=terminology_file
-                    )
+    try:
+        print(f"\n🔄 Processing PDF file: {input_path} (streaming, {window_pages} pages per window)")
+        print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
+        print(f"   Style: {translation_style}")
 
-                    # Update the translated paragraphs
-                    for i, (orig_idx, _) in enumerate(para_indices[start_idx:end_idx]):
-                        translated_paragraphs[orig_idx] = translated_batch[i]
+        if output_path is None:
+            base_name, _ = os.path.splitext(os.path.basename(input_path))
+            base_name = os.path.join(os.path.dirname(input_path), f"{base_name}-{target_lang}")
         else:
-            # Translate all paragraphs without language detection
-            print(f"   🔄 Translating {len(paragraphs)} paragraphs from {source_lang} to {target_lang}")
+            base_name, _ = os.path.splitext(output_path)
+        output_path_pdf = f"{base_name}.pdf"
+        output_path_txt = f"{base_name}.txt"
+        checkpoint_path = output_path_pdf + CHECKPOINT_SUFFIX
+        parts_dir = output_path_pdf + PARTS_SUFFIX
+
+        with pymupdf.open(input_path) as doc:
+            page_count = doc.page_count
+
+        settings = {
+            "input": os.path.abspath(input_path),
+            "size": os.path.getsize(input_path),
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "country": country,
+            "detect_languages": detect_languages,
+            "translation_style": translation_style,
+            "custom_style_instructions": custom_style_instructions or "",
+            "terminology_file": terminology_file or "",
+        }
+        state = {"settings": settings, "next_page": 0, "parts": 0, "paragraphs": 0, "carry": "", "txt_bytes": 0}
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("settings") == settings:
+                state = saved
+                print(f"   📓 Resuming at page {state['next_page'] + 1} of {page_count}")
+            else:
+                print("   ⚠️ Checkpoint was made with other settings; starting over")
+        elif resume:
+            print("   ⚠️ No checkpoint found; starting from the first page")
+
+        if state["next_page"] == 0:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+            open(output_path_txt, "w", encoding="utf-8").close()
+        elif "txt_bytes" in state and os.path.exists(output_path_txt):
+            # Drop text written after the checkpoint, e.g. by a window that crashed
+            # before its checkpoint was saved, so it is not appended twice
+            os.truncate(output_path_txt, state["txt_bytes"])
+        os.makedirs(parts_dir, exist_ok=True)
+
+        template_cache = TemplateCache(max_entries=STREAMING_TEMPLATE_LIMIT)
+
+        def flush(window: List[str], last: bool, txt_file) -> None:
+            text = state["carry"] + "".join(window)
+            state["carry"] = ""
+            if not last:
+                # Text after the last blank line may be a paragraph that goes on in the next window
+                breaks = list(PARAGRAPH_BREAK_RE.finditer(text))
+                tail_start = breaks[-1].end() if breaks else 0
+                if len(text) - tail_start <= MAX_CARRY_CHARS:
+                    state["carry"] = text[tail_start:]
+                    text = text[:tail_start]
+            paragraphs = [p.strip() for p in PARAGRAPH_BREAK_RE.split(text) if p.strip()]
+
+            if paragraphs:
+                translated = _translate_paragraphs(
+                    paragraphs, source_lang, target_lang, country, batch_size, detect_languages,
+                    translation_style, custom_style_instructions, terminology_file, mixed_languages,
+                    None, template_cache
+                )
+                if state["paragraphs"]:
+                    txt_file.write("\n\n")
+                txt_file.write("\n\n".join(translated))
+                state["paragraphs"] += len(translated)
+                state["parts"] += 1
+                _render_pdf(
+                    os.path.join(parts_dir, f"part-{state['parts']:05d}.pdf"), translated,
+                    LANGUAGE_CODES.get(target_lang)
+                )
 
-            # Translate in batches
-            total_batches = (len(paragraphs) - 1) // batch_size + 1
+            txt_file.flush()
+            os.fsync(txt_file.fileno())
+            state["txt_bytes"] = os.fstat(txt_file.fileno()).st_size
+            _save_checkpoint(checkpoint_path, state)
+
+        with open(output_path_txt, "a", encoding="utf-8") as txt_file:
+            window = []
+            page_number = state["next_page"]
+            pages = range(state["next_page"], page_count)
+            for page_text in extract_pdf_pages(input_path, pages, workers=extract_workers):
+                window.append(page_text)
+                page_number += 1
+                if len(window) >= window_pages or page_number == page_count:
+                    state["next_page"] = page_number
+                    flush(window, page_number == page_count, txt_file)
+                    print(f"   ✍️ Pages 1-{page_number} of {page_count} done "
+                          f"({state['paragraphs']} paragraphs written)")
+                    window = []
+
+        if not state["paragraphs"]:
+            print("❌ No text content found in the PDF")
+            return "", ""
 
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min((batch_idx + 1) * batch_size, len(paragraphs))
-                batch = paragraphs[start_idx:end_idx]
+        # Merge the window parts; PyMuPDF copies their objects without re-rendering
+        with pymupdf.open() as merged:
+            for index in range(1, state["parts"] + 1):
+                merged.insert_file(os.path.join(parts_dir, f"part-{index:05d}.pdf"))
+            merged.save(output_path_pdf, garbage=1, deflate=True)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        os.remove(checkpoint_path)
 
-                print(f"      📦 Processing batch {batch_idx+1}/{total_batches} ({len(batch)} paragraphs)")
+        print(f"   ✅ Translation completed and saved to:")
+        print(f"      PDF: {output_path_pdf}")
+        print(f"      TXT: {output_path_txt}")
+        return output_path_pdf, output_path_txt
 
-                # Translate the batch
-                translated_batch = batch_translate(
+    except Exception as e:
+        print(f"❌ Error processing PDF: {str(e)}")
+        return "", ""
+
+
+def _block_text(block: Dict[str, Any]) -> str:
+    """Text of a PyMuPDF text block, with its lines joined and end-of-line hyphens removed."""
+    text = ""
+    for line in block["lines"]:
+        line_text = "".join(span["text"] for span in line["spans"]).strip()
+        if not line_text:
+            continue
+        if text.endswith("-") and line_text[0].islower():
+            text = text[:-1] + line_text
+        elif text:
+            text += " " + line_text
+        else:
+            text = line_text
+    return text
+
+
+def _layout_fonts(font_file: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Regular and bold font files for written-back text (None means PyMuPDF's Helvetica)."""
+    if font_file:
+        return font_file, font_file
+    regular = os.path.join(LAYOUT_FONT_DIR, LAYOUT_FONT)
+    bold = os.path.join(LAYOUT_FONT_DIR, LAYOUT_BOLD_FONT)
+    if not os.path.exists(regular):
+        print("   ⚠️ No Unicode font found in font/; non-Latin text may not display")
+        return None, None
+    return regular, bold if os.path.exists(bold) else regular
+
+
+def _write_block(page, pymupdf, block: Dict[str, Any], text: str, fonts: Tuple[Optional[str], Optional[str]]) -> None:
+    """Write translated text into the box of a text block, shrinking the font until it fits."""
+    span = max((s for line in block["lines"] for s in line["spans"]), key=lambda s: len(s["text"]))
+    bold = bool(span["flags"] & BOLD_FLAG)
+    font_file = fonts[1] if bold else fonts[0]
+    font_name = ("F1" if bold else "F0") if font_file else ("hebo" if bold else "helv")
+    color = pymupdf.sRGB_to_pdf(span["color"])
+    rect = pymupdf.Rect(block["bbox"])
+
+    size = span["size"]
+    while True:
+        result = page.insert_textbox(
+            rect, text, fontsize=size, fontname=font_name, fontfile=font_file, color=color
+        )
+        if result >= 0:
+            return
+        if size * FONT_SHRINK_STEP < span["size"] * MIN_FONT_SCALE:
+            break
+        size *= FONT_SHRINK_STEP
+    # Still too long at the smallest size: let the text run down the page
+    rect.y1 = page.rect.y1
+    page.insert_textbox(rect, text, fontsize=size, fontname=font_name, fontfile=font_file, color=color)
+
+
+def process_pdf_layout(
+    input_path: str,
+    output_path: Optional[str] = None,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: Optional[str] = None,
+    terminology_file: Optional[str] = None,
+    font_file: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Translate a PDF in place, keeping its pages, images and text positions.
+
+    Each horizontal text block of a page is one segment. Blocks of
+    consecutive pages are packed into batches of up to batch_size; once a
+    batch is translated, the original lines of its pages are redacted and
+    each translation is inserted into its block's box with the original size,
+    color and weight, shrinking the font until it fits. Pages are handled
+    as their batch completes, so only one batch of blocks is held at a time
+    and the TXT output grows as the job runs.
+
+    Args:
+        input_path: Path to the PDF file to translate
+        output_path: Path where to save the translated file (if None, auto-generated)
+        source_lang: Source language of the content (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of text blocks to translate in one batch
+        detect_languages: Whether to detect the language of each block
+        translation_style: Style of translation to use (e.g., "Literary", "Technical")
+        custom_style_instructions: Additional custom instructions for the style
+        terminology_file: Path to custom terminology file
+        font_file: TrueType font for the translated text (defaults to
+            DejaVu Sans from the font/ directory)
+
+    Returns:
+        Tuple of (PDF output path, TXT output path)
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        print("❌ PyMuPDF is not installed. Please install with: pip install pymupdf")
+        return "", ""
+
+    doc = None
+    try:
+        print(f"\n🔄 Processing PDF file: {input_path} (layout preserved)")
+        print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
+        print(f"   Style: {translation_style}")
+
+        if output_path is None:
+            base_name, _ = os.path.splitext(os.path.basename(input_path))
+            base_name = os.path.join(os.path.dirname(input_path), f"{base_name}-{target_lang}")
+        else:
+            base_name, _ = os.path.splitext(output_path)
+        output_path_pdf = f"{base_name}.pdf"
+        output_path_txt = f"{base_name}.txt"
+
+        doc = pymupdf.open(input_path)
+        fonts = _layout_fonts(font_file)
+        translation_memory = TranslationMemory()
+        template_cache = TemplateCache()
+        stats = {"blocks": 0, "translated": 0}
+
+        # (page number, [(block, text, source language)]) of pages waiting for their batch
+        pending: List[Tuple[int, List[Tuple[Dict[str, Any], str, Optional[str]]]]] = []
+
+        def flush(txt_file) -> None:
+            to_translate = [
+                (k, item) for k, (_, items) in enumerate(pending) for item in items if item[2] is not None
+            ]
+            translations = {}
+            for start in range(0, len(to_translate), batch_size):
+                batch = to_translate[start:start + batch_size]
+                print(f"      📦 Translating {len(batch)} blocks from pages "
+                      f"{pending[batch[0][0]][0] + 1}-{pending[batch[-1][0]][0] + 1}")
+                results = batch_translate(
                     source_lang=source_lang,
                     target_lang=target_lang,
-                    source_texts=batch,
+                    source_texts=[item[1] for _, item in batch],
                     country=country,
                     translation_style=translation_style,
                     custom_style_instructions=custom_style_instructions,
-                    terminology_file=terminology_file
+                    terminology_file=terminology_file,
+                    translation_memory=translation_memory,
+                    template_cache=template_cache,
+                    source_langs=[item[2] for _, item in batch]
                 )
-
-                translated_paragraphs.extend(translated_batch)
-
-        # Save the translated text to TXT file
-        with open(output_path_txt, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(translated_paragraphs))
-
-        # Create PDF with translated text
-        # Register fonts from the "font/" directory
-        font_dir = "font"  # Assuming the font directory is named "font" and is in the same directory as the script
-        register_fonts_from_directory(font_dir)
-
-        c = canvas.Canvas(output_path_pdf, pagesize=letter)
-        # Prioritize DejaVuSans and its variants if they are registered, else fall back to Helvetica
-        default_font = 'DejaVuSans' if 'DejaVuSans' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
-        c.setFont(default_font, 12)
-
-        # Add translated text to PDF
-        y = 750  # Start from top of page
-        for paragraph in translated_paragraphs:
-            # Split paragraph into lines that fit the page width
-            words = paragraph.split()
-            lines = []
-            current_line = []
-
-            for word in words:
-                current_line.append(word)
-                # Use default_font to check the width
-                line_width = c.stringWidth(' '.join(current_line), default_font, 12)
-                if line_width > 500:  # Page width minus margins
-                    current_line.pop()
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-
-            if current_line:
-                lines.append(' '.join(current_line))
-
-            # Write lines to PDF
-            for line in lines:
-                if y < 50:  # Start new page if near bottom
-                    c.showPage()
-                    y = 750
-                    c.setFont(default_font, 12)
-                c.drawString(50, y, line)
-                y -= 15  # Line spacing
-
-        c.save()
+                translations.update((id(item[0]), text) for (_, item), text in zip(batch, results))
+
+            for page_number, items in pending:
+                page = doc[page_number]
+                written = [(block, translations[id(block)]) for block, _, _ in items
+                           if translations.get(id(block))]
+                for block, _ in written:
+                    for line in block["lines"]:
+                        page.add_redact_annot(line["bbox"], fill=False)
+                if written:
+                    # Keep images and drawings; only the text under the lines goes
+                    page.apply_redactions(images=pymupdf.PDF_REDACT_IMAGE_NONE)
+                    for block, text in written:
+                        _write_block(page, pymupdf, block, text, fonts)
+                stats["translated"] += len(written)
+                page_text = [translations.get(id(block)) or text for block, text, _ in items]
+                txt_file.write("\n\n".join(page_text) + "\n\n")
+            txt_file.flush()
+            pending.clear()
+
+        with open(output_path_txt, "w", encoding="utf-8") as txt_file:
+            queued = 0
+            for page_number in range(doc.page_count):
+                page = doc[page_number]
+                items = []
+                for block in page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]:
+                    if block.get("type") != 0 or not block.get("lines"):
+                        continue
+                    text = _block_text(block)
+                    if not text:
+                        continue
+                    lang = source_lang
+                    # Rotated lines cannot be written back into their box
+                    horizontal = all(abs(line["dir"][1]) < 1e-3 for line in block["lines"])
+                    if not horizontal or classify_value(text, target_lang) != TEXT:
+                        lang = None
+                    items.append((block, text, lang))
+                if detect_languages:
+                    detectable = [k for k, (_, text, lang) in enumerate(items) if lang is not None and len(text) >= 10]
+                    detected_langs = detect_text_languages([items[k][1] for k in detectable], batch_size)
+                    for k, lang in zip(detectable, detected_langs):
+                        block, text, _ = items[k]
+                        items[k] = (block, text, None if lang.lower() == target_lang.lower() else lang)
+                stats["blocks"] += len(items)
+                pending.append((page_number, items))
+                queued += sum(1 for _, _, lang in items if lang is not None)
+                if queued >= batch_size:
+                    flush(txt_file)
+                    queued = 0
+            if pending:
+                flush(txt_file)
+
+        print(f"   ✍️ Rewrote {stats['translated']} of {stats['blocks']} text blocks on {doc.page_count} pages")
+        if fonts[0]:
+            doc.subset_fonts()  # Embed only the glyphs the translation uses
+        doc.save(output_path_pdf, garbage=3, deflate=True)
 
         print(f"   ✅ Translation completed and saved to:")
         print(f"      PDF: {output_path_pdf}")
@@ -238,4 +731,8 @@ def process_pdf(
 
     except Exception as e:
         print(f"❌ Error processing PDF: {str(e)}")
-        return "", ""
\ No newline at end of file
+        return "", ""
+
+    finally:
+        if doc is not None:
+            doc.close()
@@ -0,0 +1,388 @@
+"""
+Job Planner for Advanced Translation Suite
+Dry run of a translation job: extracts, classifies, deduplicates and packs
+batches exactly as the processors would, then estimates tokens, calls, time
+and cost without sending anything to the model
+"""
+
+import math
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cell_classifier import EMPTY, TEXT, classify_grid
+from .document_utils import extract_docx, extract_pdf, extract_text
+from .glossary import try_load_glossary
+from .masking import mask_text, needs_translation
+from .translator_core import _batch_prompts, current_config, get_style_prompt, num_tokens_in_string
+
+# USD per million (prompt, completion) tokens; list prices at the time of
+# writing, pass prices= to plan_job for current or negotiated rates
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "llama3-70b-8192": (0.59, 0.79),
+    "gemini-2.5-flash-preview-04-17": (0.15, 0.60),
+    "Qwen/Qwen2-72B-Instruct": (0.90, 0.90),
+}
+
+# Completion tokens per source token; languages written with more tokens
+# per word than English cost more to produce
+DEFAULT_COMPLETION_RATIO = 1.2
+COMPLETION_RATIOS = {
+    "Vietnamese": 1.6,
+    "Thai": 2.0,
+    "Hindi": 2.0,
+    "Korean": 1.5,
+    "Japanese": 1.4,
+    "Chinese": 1.2,
+    "Russian": 1.4,
+    "Arabic": 1.5,
+}
+
+# Chat formatting added to every request
+MESSAGE_OVERHEAD_TOKENS = 7
+# Prompt of one detect_language call without the text, and its answer
+DETECT_PROMPT_TOKENS = 70
+DETECT_COMPLETION_TOKENS = 3
+
+SPREADSHEET_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+PLANNED_EXTENSIONS = SPREADSHEET_EXTENSIONS + (".pdf", ".docx", ".txt", ".md")
+
+
+class JobPlan(NamedTuple):
+    """Estimated size of a translation job."""
+    files: int
+    segments: int           # Texts that reach the translator
+    unique_segments: int    # Distinct templates actually sent
+    skipped: int            # Cells/texts that need no request (numbers, codes, ...)
+    calls: int              # Translation requests
+    detect_calls: int       # Language detection requests
+    prompt_tokens: int
+    completion_tokens: int
+    minutes: float          # Wall time at the rate limits
+    costs: Dict[str, float] # Model -> USD
+
+
+def extract_segments(
+    path: str,
+    target_lang: str,
+    pdf_extractor: Optional[Callable[[str], str]] = None,
+) -> Tuple[List[str], int]:
+    """Extract the texts a processor would send for a file, without translating.
+
+    Spreadsheet cells go through the cell classifier like in process_excel;
+    PDF and Word documents are split into paragraphs like in process_pdf.
+    pdf_extractor replaces extract_pdf, e.g. with OCR for scanned PDFs.
+
+    Returns:
+        Tuple of (segments, number of non-empty texts that need no translation)
+    """
+    from .excel_processor import clean_text
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in SPREADSHEET_EXTENSIONS:
+        segments = []
+        skipped = 0
+        for rows in _sheet_rows(path):
+            categories, _ = classify_grid(rows, target_lang)
+            for row, row_categories in zip(rows, categories):
+                for value, category in zip(row, row_categories):
+                    if category == TEXT:
+                        text = clean_text(str(value))
+                        if len(text) >= 2:
+                            segments.append(text)
+                    elif category != EMPTY:
+                        skipped += 1
+        return segments, skipped
+
+    if ext == ".pdf":
+        text = (pdf_extractor or extract_pdf)(path)
+    elif ext == ".docx":
+        text = extract_docx(path)
+    else:
+        text = extract_text(path)
+    return split_paragraphs(text), 0
+
+
+def _sheet_rows(path: str) -> Iterator[List[list]]:
+    """Yield the cell values of each sheet of a spreadsheet as a list of rows."""
+    if path.lower().endswith(".xls"):
+        try:
+            import xlrd
+        except ImportError:
+            raise ImportError("xlrd is not installed. Please install with: pip install xlrd")
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            for index in range(book.nsheets):
+                sheet = book.sheet_by_index(index)
+                yield [
+                    [None if ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK) else value
+                     for ctype, value in zip(sheet.row_types(row), sheet.row_values(row))]
+                    for row in range(sheet.nrows)
+                ]
+                book.unload_sheet(index)
+        finally:
+            book.release_resources()
+        return
+
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("openpyxl is not installed. Please install with: pip install openpyxl")
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield [list(row) for row in ws.iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split extracted or OCR text into paragraphs the way process_pdf does."""
+    return [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+
+
+def _detect_counts(segments: Iterable[str]) -> Tuple[int, int]:
+    calls = 0
+    tokens = 0
+    for text in segments:
+        if len(text.strip()) >= 10:  # Shorter texts are never sent
+            calls += 1
+            tokens += DETECT_PROMPT_TOKENS + num_tokens_in_string(text[:500])
+    return calls, tokens
+
+
+def _finish(
+    files: int,
+    segments: int,
+    unique_segments: int,
+    skipped: int,
+    calls: int,
+    detect_calls: int,
+    prompt_tokens: int,
+    completion_tokens: int,
+    rpm: Optional[int],
+    tpm: Optional[int],
+    prices: Dict[str, Tuple[float, float]],
+) -> JobPlan:
+    rpm = rpm or current_config["rpm"]
+    minutes = (calls + detect_calls) / rpm if rpm else 0.0
+    if tpm:
+        minutes = max(minutes, (prompt_tokens + completion_tokens) / tpm)
+    costs = {
+        model: (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+        for model, (prompt_price, completion_price) in prices.items()
+    }
+    return JobPlan(
+        files, segments, unique_segments, skipped, calls, detect_calls,
+        prompt_tokens, completion_tokens, minutes, costs
+    )
+
+
+def plan_segments(
+    segments: Sequence[str],
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    skipped: int = 0,
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> JobPlan:
+    """
+    Plan batch translation (batch_translate) of segments.
+
+    Segments are masked and deduplicated by template like batch_translate
+    with a template cache, packed into batches of batch_size and priced with
+    the real batch prompts.
+
+    Args:
+        segments: Texts to translate
+        source_lang: Source language (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of texts per request
+        detect_languages: Whether one detect_language call per text is made first
+        translation_style: Style of translation
+        custom_style_instructions: Additional instructions for translation style
+        terminology_file: Path to custom terminology file
+        skipped: Texts left out before planning, for the report
+        rpm: Requests per minute (defaults to the configured limit)
+        tpm: Optional tokens per minute limit of the provider
+        prices: Model -> (prompt, completion) USD per million tokens
+
+    Returns:
+        JobPlan with the estimates
+    """
+    prices = MODEL_PRICES if prices is None else prices
+    glossary = try_load_glossary(terminology_file) if terminology_file and os.path.exists(terminology_file) else None
+    ratio = COMPLETION_RATIOS.get(target_lang.strip().title(), DEFAULT_COMPLETION_RATIO)
+
+    # Texts with nothing left to translate after masking are never sent, and
+    # variants of one template are translated once
+    unique: Dict[str, None] = {}
+    for text in segments:
+        masked = mask_text(text)
+        if needs_translation(masked):
+            unique.setdefault(masked.text)
+    templates = list(unique)
+
+    calls = 0
+    prompt_tokens = 0
+    completion_tokens = 0
+    for i in range(0, len(templates), batch_size):
+        batch = templates[i:i + batch_size]
+        system_message, user_prompt = _batch_prompts(
+            batch, source_lang, target_lang, country, "|||", translation_style,
+            custom_style_instructions or "", glossary, None, masked=True
+        )
+        calls += 1
+        prompt_tokens += num_tokens_in_string(system_message) + num_tokens_in_string(user_prompt)
+        prompt_tokens += MESSAGE_OVERHEAD_TOKENS
+        completion_tokens += math.ceil(num_tokens_in_string("|||".join(batch)) * ratio)
+
+    detect_calls, detect_tokens = _detect_counts(segments) if detect_languages else (0, 0)
+    return _finish(
+        1, len(segments), len(templates), skipped, calls, detect_calls,
+        prompt_tokens + detect_tokens, completion_tokens + detect_calls * DETECT_COMPLETION_TOKENS,
+        rpm, tpm, prices
+    )
+
+
+def plan_document(
+    text: str,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    max_tokens: int = 1000,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> JobPlan:
+    """
+    Plan translating a whole text with simple_translator (run.py text).
+
+    The text is sent in chunks of about max_tokens tokens, one request each.
+    """
+    prices = MODEL_PRICES if prices is None else prices
+    ratio = COMPLETION_RATIOS.get(target_lang.strip().title(), DEFAULT_COMPLETION_RATIO)
+    text_tokens = num_tokens_in_string(text)
+    chunks = max(1, math.ceil(text_tokens / max_tokens)) if text.strip() else 0
+    instructions = f"Translate the following text from {source_lang} to {target_lang}."
+    if country:
+        instructions += f" Adapt the translation for {country}."
+    instructions += "\n\n" + get_style_prompt(translation_style, custom_style_instructions) + "\n\nText to translate:\n"
+    overhead = num_tokens_in_string(instructions) + MESSAGE_OVERHEAD_TOKENS
+    return _finish(
+        1, chunks, chunks, 0, chunks, 0,
+        text_tokens + chunks * overhead, math.ceil(text_tokens * ratio),
+        rpm, tpm, prices
+    )
+
+
+def combine_plans(
+    plans: Sequence[JobPlan],
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> JobPlan:
+    """Add up the plans of several files; time and cost are recomputed for the total."""
+    totals = [sum(plan[i] for plan in plans) for i in range(8)]
+    return _finish(*totals, rpm, tpm, MODEL_PRICES if prices is None else prices)
+
+
+def plan_job(
+    paths: Sequence[str],
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    pdf_extractor: Optional[Callable[[str], str]] = None,
+) -> JobPlan:
+    """
+    Estimate a translation job over files without calling the model.
+
+    Excel, PDF and Word files are planned as batch translation (process_excel,
+    process_pdf); other files as plain text sent through simple_translator.
+    Unreadable files are reported and left out.
+
+    Args:
+        paths: Files or directories to translate
+        pdf_extractor: Optional replacement for extract_pdf (e.g. OCR)
+        (other arguments as in plan_segments)
+
+    Returns:
+        JobPlan for all files together
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(PLANNED_EXTENSIONS) and not name.startswith("~$")
+            )
+        else:
+            files.append(path)
+
+    plans = []
+    for path in files:
+        try:
+            ext = os.path.splitext(path)[1].lower()
+            if ext in SPREADSHEET_EXTENSIONS + (".pdf", ".docx"):
+                segments, skipped = extract_segments(path, target_lang, pdf_extractor)
+                plan = plan_segments(
+                    segments, source_lang, target_lang, country, batch_size, detect_languages,
+                    translation_style, custom_style_instructions, terminology_file, skipped,
+                    rpm, tpm, prices
+                )
+            else:
+                plan = plan_document(
+                    extract_text(path), source_lang, target_lang, country,
+                    translation_style=translation_style,
+                    custom_style_instructions=custom_style_instructions,
+                    rpm=rpm, tpm=tpm, prices=prices
+                )
+            print(f"   📄 {os.path.basename(path)}: {plan.segments} segments, {plan.calls} calls")
+            plans.append(plan)
+        except Exception as e:
+            print(f"   ⚠️ Could not plan {os.path.basename(path)}: {str(e)}")
+    return combine_plans(plans, rpm, tpm, prices)
+
+
+def format_plan(plan: JobPlan, model: Optional[str] = None) -> str:
+    """Render a plan as a short report; model marks the configured model's cost."""
+    hours, minutes = divmod(math.ceil(plan.minutes), 60)
+    lines = [
+        f"Files:              {plan.files}",
+        f"Segments:           {plan.segments} ({plan.skipped} skipped, need no translation)",
+        f"Unique segments:    {plan.unique_segments}",
+        f"Translation calls:  {plan.calls}",
+        f"Detection calls:    {plan.detect_calls}",
+        f"Prompt tokens:      {plan.prompt_tokens:,}",
+        f"Completion tokens:  {plan.completion_tokens:,}",
+        f"Estimated time:     {hours}h {minutes:02d}m",
+        "Estimated cost:",
+    ]
+    for name, cost in sorted(plan.costs.items(), key=lambda item: item[1]):
+        marker = "  <- configured" if name == model else ""
+        lines.append(f"   {name:<34} ${cost:,.2f}{marker}")
+    if model and model not in plan.costs:
+        lines.append(f"   {model:<34} (no price known)")
+    return "\n".join(lines)
@@ -0,0 +1,139 @@
+"""
+Text Layout for Advanced Translation Suite
+Greedy line wrapping for the output writers, measuring each word once
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Scripts written without spaces, where a line may break between any two characters
+CJK_CHARS = (
+    "⺀-⿟"   # CJK radicals
+    "　-〿"   # CJK symbols and punctuation
+    "぀-ヿ"   # Hiragana, Katakana
+    "㄀-ㄯ"   # Bopomofo
+    "㐀-䶿"   # CJK extension A
+    "一-鿿"   # CJK unified ideographs
+    "豈-﫿"   # CJK compatibility ideographs
+    "＀-￯"   # Fullwidth forms
+)
+TOKEN_RE = re.compile(rf"(\s*)([{CJK_CHARS}]|[^\s{CJK_CHARS}]+)")
+
+# Closing punctuation that must not start a line; it hangs past the margin instead
+NO_LINE_START = set("、。，．・：；？！）」』】〕〉》”’ー…‥ゝゞヽヾ々〻,.:;?!)]}")
+
+# Existing break opportunities inside a word (after the character)
+WORD_BREAK_RE = re.compile(r"[-/‐–—]")
+
+# Words shorter than this are moved to the next line rather than hyphenated
+HYPHENATE_MIN_LENGTH = 6
+
+# Word widths kept per layout before the cache is cleared
+WIDTH_CACHE_LIMIT = 100000
+
+
+class TextLayout:
+    """Wraps text into lines no wider than max_width.
+
+    Each distinct word is measured once and line widths are accumulated word
+    by word, so wrapping is linear in the length of the text. Words break at
+    spaces, between CJK characters, at hyphens and slashes inside words, and
+    (when pyphen is installed and a language is given) at dictionary
+    hyphenation points. A word longer than a whole line is split wherever
+    it has to be.
+
+    Args:
+        measure: Width of a string, e.g. a font's stringWidth at a given size
+        max_width: Largest line width, in the units of measure
+        language: Hyphenation language such as "en" or "es" (used with pyphen)
+    """
+
+    def __init__(self, measure: Callable[[str], float], max_width: float, language: Optional[str] = None):
+        self.measure = measure
+        self.max_width = max_width
+        self._widths: Dict[str, float] = {}
+        self.space_width = measure(" ")
+        self._hyphenator = None
+        if language:
+            try:
+                import pyphen
+                if pyphen.language_fallback(language):
+                    self._hyphenator = pyphen.Pyphen(lang=language)
+            except ImportError:
+                pass  # Optional: words then only break at hyphens and slashes
+
+    def width(self, text: str) -> float:
+        """Width of a word, measured on first use."""
+        width = self._widths.get(text)
+        if width is None:
+            if len(self._widths) >= WIDTH_CACHE_LIMIT:
+                self._widths.clear()
+            width = self._widths[text] = self.measure(text)
+        return width
+
+    def _break_points(self, word: str) -> List[Tuple[int, bool]]:
+        """(position, needs hyphen) where word may be split, last first."""
+        points = [(m.end(), False) for m in WORD_BREAK_RE.finditer(word) if 0 < m.end() < len(word)]
+        if self._hyphenator is not None and len(word) >= HYPHENATE_MIN_LENGTH:
+            points.extend((position, True) for position in self._hyphenator.positions(word))
+        return sorted(set(points), reverse=True)
+
+    def _split_word(self, word: str, room: float) -> Optional[Tuple[str, str]]:
+        """Split word so its head (with a hyphen if needed) fits in room, or None."""
+        for position, hyphen in self._break_points(word):
+            head = word[:position] + ("-" if hyphen else "")
+            if self.measure(head) <= room:
+                return head, word[position:]
+        return None
+
+    def _force_split(self, word: str) -> Tuple[str, str]:
+        """Longest head of a word wider than a line that fits on one line by itself."""
+        low, high = 1, len(word) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.measure(word[:middle]) <= self.max_width:
+                low = middle
+            else:
+                high = middle - 1
+        return word[:low], word[low:]
+
+    def wrap(self, text: str) -> List[str]:
+        """Wrap one paragraph; line breaks inside it are treated as spaces."""
+        lines: List[str] = []
+        line: List[str] = []
+        line_width = 0.0
+
+        for match in TOKEN_RE.finditer(text):
+            word = match.group(2)
+            spaced = bool(match.group(1)) and bool(line)
+            while True:
+                gap = self.space_width if spaced else 0.0
+                word_width = self.width(word)
+                if line_width + gap + word_width <= self.max_width or (line and word in NO_LINE_START):
+                    if spaced:
+                        line.append(" ")
+                    line.append(word)
+                    line_width += gap + word_width
+                    break
+
+                if line:
+                    split = self._split_word(word, self.max_width - line_width - gap)
+                    if split is not None:
+                        head, word = split
+                        if spaced:
+                            line.append(" ")
+                        line.append(head)
+                    lines.append("".join(line))
+                    line, line_width, spaced = [], 0.0, False
+                    continue
+
+                # Alone on the line and still too wide
+                split = self._split_word(word, self.max_width)
+                head, word = split if split is not None else self._force_split(word)
+                lines.append(head)
+                if not word:
+                    break
+
+        if line:
+            lines.append("".join(line))
+        return lines
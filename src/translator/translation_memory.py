@@ -0,0 +1,332 @@
+"""
+Translation Memory for Advanced Translation Suite
+Fuzzy lookup of previously translated segments via a substring partition index
+"""
+
+import json
+import math
+import os
+from array import array
+from collections import Counter
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+# Upper bound on the number of candidate segments examined per lookup
+MAX_CANDIDATES = 256
+
+
+class TMMatch(NamedTuple):
+    """A prior translation found in the memory."""
+    source: str
+    target: str
+    similarity: float
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the longest common prefix, by binary search on slice equality."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, or max_distance + 1 as soon as it is exceeded.
+
+    Uses the bit-parallel algorithm of Myers (in Hyyrö's formulation): each
+    column of the edit-distance matrix is updated as a whole with integer
+    operations, and the loop stops once the remaining characters can no
+    longer bring the distance back within max_distance.
+    """
+    over = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return over
+    if a == b:
+        return 0
+
+    # Near-duplicate rows differ in a short stretch; drop the common ends
+    # so the per-character loop only runs over that stretch
+    prefix = _common_prefix_length(a, b)
+    a, b = a[prefix:], b[prefix:]
+    suffix = _common_prefix_length(a[::-1], b[::-1])
+    if suffix:
+        a, b = a[:-suffix], b[:-suffix]
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) <= 1:
+        # The rest of b is inserted around a's character, kept if b has it
+        return min(len(b) - (1 if a and a in b else 0), over)
+    if max_distance < 2:
+        # One edit leaves at most one differing character on either side
+        return over
+
+    match_masks: Dict[str, int] = {}
+    for i, char in enumerate(a):
+        match_masks[char] = match_masks.get(char, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    positive, negative = mask, 0
+    distance = len(a)
+    remaining = len(b)
+    for char in b:
+        eq = match_masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_pos = (negative | ~(xh | positive)) & mask
+        horizontal_neg = positive & xh
+        if horizontal_pos & last:
+            distance += 1
+        elif horizontal_neg & last:
+            distance -= 1
+        remaining -= 1
+        if distance - remaining > max_distance:
+            return over
+        horizontal_pos = ((horizontal_pos << 1) | 1) & mask
+        horizontal_neg = (horizontal_neg << 1) & mask
+        positive = (horizontal_neg | ~(xv | horizontal_pos)) & mask
+        negative = horizontal_pos & xv
+    return min(distance, over)
+
+
+def _missing_pieces(query: str, candidate: str, pieces: List[Tuple[int, int]], limit: int) -> int:
+    """Count the candidate's pieces not found within `limit` positions in the query.
+
+    Stops counting once the count exceeds limit.
+    """
+    missing = 0
+    for start, size in pieces:
+        if query.find(candidate[start:start + size], max(0, start - limit), start + size + limit) < 0:
+            missing += 1
+            if missing > limit:
+                break
+    return missing
+
+
+def _shift(offset: int, start: int, delta: int) -> int:
+    """How far a piece found at offset lies outside start..start + delta."""
+    return max(min(start, start + delta) - offset, offset - max(start, start + delta), 0)
+
+
+def _partition(length: int, parts: int) -> List[Tuple[int, int]]:
+    """Split range(length) into `parts` near-equal (start, size) pieces."""
+    base, extra = divmod(length, parts)
+    pieces = []
+    start = 0
+    for i in range(parts):
+        size = base + (1 if i >= parts - extra else 0)
+        pieces.append((start, size))
+        start += size
+    return pieces
+
+
+class TranslationMemory:
+    """Store of source/target segment pairs with fuzzy lookup.
+
+    Each stored segment of length L is split into tau + 1 pieces, where tau is
+    the largest edit distance a match at the memory's threshold can have. Any
+    text within tau edits must contain one of those pieces unchanged near its
+    original position (pigeonhole principle), so a lookup only probes a few
+    hash keys per candidate length and verifies what it finds with a banded
+    edit distance.
+    """
+
+    def __init__(self, threshold: float = 0.85):
+        self.threshold = threshold
+        self._sources: List[str] = []
+        self._targets: List[str] = []
+        self._norms: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._pieces: Dict[Tuple[int, int, str], array] = {}
+        self._lengths = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def _max_distance(self, length: int) -> int:
+        # The other string is at most length / threshold long
+        return int((1.0 - self.threshold) * length / self.threshold + 1e-9)
+
+    def add(self, source: str, target: str) -> None:
+        """Add or update a translated segment."""
+        norm = _normalize(source)
+        if not norm:
+            return
+        with self._lock:
+            existing = self._exact.get(norm)
+            if existing is not None:
+                self._targets[existing] = target
+                return
+            segment_id = len(self._sources)
+            self._sources.append(source)
+            self._targets.append(target)
+            self._norms.append(norm)
+            self._exact[norm] = segment_id
+            length = len(norm)
+            self._lengths.add(length)
+            for i, (start, size) in enumerate(_partition(length, self._max_distance(length) + 1)):
+                key = (length, i, norm[start:start + size])
+                postings = self._pieces.get(key)
+                if postings is None:
+                    postings = self._pieces[key] = array("I")
+                postings.append(segment_id)
+
+    def lookup(self, text: str, threshold: Optional[float] = None) -> Optional[TMMatch]:
+        """Return the most similar stored segment at or above the threshold.
+
+        Similarity is 1 - edit_distance / max(len(a), len(b)) on normalized
+        text. Thresholds below the memory's own threshold are clamped to it.
+        """
+        threshold = self.threshold if threshold is None else max(self.threshold, threshold)
+        norm = _normalize(text)
+        if not norm:
+            return None
+
+        exact = self._exact.get(norm)
+        if exact is not None:
+            return TMMatch(self._sources[exact], self._targets[exact], 1.0)
+
+        query_length = len(norm)
+        max_distance = int((1.0 - threshold) * query_length / threshold + 1e-9)
+
+        # Posting lists of every piece the query can share with segments of
+        # each candidate length, one group per (length, piece)
+        groups = []
+        pieces = {}
+        for length in range(max(1, query_length - max_distance), query_length + max_distance + 1):
+            if length not in self._lengths:
+                continue
+            tau = self._max_distance(length)
+            delta = query_length - length
+            pieces[length] = [piece for piece in _partition(length, tau + 1) if piece[1]]
+            for i, (start, size) in enumerate(_partition(length, tau + 1)):
+                if size == 0:
+                    continue
+                # Positions where piece i can start if all other edits fall
+                # outside it (multi-match-aware window from Pass-Join)
+                low = max(0, start - i, start + delta - (tau - i))
+                high = min(query_length - size, start + i, start + delta + (tau - i))
+                # Substitutions leave pieces in place, so unshifted offsets come first
+                lists = []
+                for offset in sorted(range(low, high + 1), key=lambda offset: _shift(offset, start, delta)):
+                    postings = self._pieces.get((length, i, norm[offset:offset + size]))
+                    if postings:
+                        lists.append(postings)
+                groups.append((sum(len(postings) for postings in lists), length, lists))
+
+        best, similarity = self._search(norm, groups, pieces, threshold, max_distance)
+        if best is None:
+            return None
+        return TMMatch(self._sources[best], self._targets[best], similarity)
+
+    def _search(self, norm: str, groups: list, pieces: Dict[int, List[Tuple[int, int]]],
+                threshold: float, max_distance: int) -> Tuple[Optional[int], float]:
+        """Verify candidates from the posting list groups, best match first found.
+
+        A segment within d edits keeps all but d of its pieces, so it shares
+        one of any d + 1 groups of its length. Probing the rarest groups
+        first and stopping per length once d + 1 were probed skips the pieces
+        nearly every segment shares (e.g. "total revenue" on financial rows);
+        d shrinks as better matches are found, and at most MAX_CANDIDATES
+        segments are examined.
+        """
+        query_length = len(norm)
+        groups.sort(key=lambda group: group[0])
+        rank = Counter()
+        ranked = []
+        for total, length, lists in groups:
+            # Rarest group of every length first, nearest lengths before the others
+            ranked.append((rank[length], abs(query_length - length), total, length, lists))
+            rank[length] += 1
+        ranked.sort(key=lambda item: item[:3])
+
+        best = None
+        best_similarity = threshold
+
+        def allowed_distance(longest: int) -> int:
+            # At the threshold itself any match counts; after that only better ones
+            bound = (1.0 - best_similarity) * longest
+            return int(bound + 1e-9) if best is None else math.ceil(bound - 1e-9) - 1
+
+        def verify(segment_id: int, longest: int, allowed: int) -> bool:
+            nonlocal best, best_similarity
+            distance = _bounded_levenshtein(norm, self._norms[segment_id], allowed)
+            if distance > allowed:
+                return False
+            best, best_similarity = segment_id, 1.0 - distance / longest
+            return True
+
+        widest = query_length + max_distance
+        probed = Counter()
+        seen = set()
+        examined = 0
+        for _, _, _, length, lists in ranked:
+            longest = max(query_length, length)
+            allowed = allowed_distance(longest)
+            if probed[length] > allowed or abs(query_length - length) > allowed:
+                continue
+            probed[length] += 1
+            for postings in lists:
+                if probed[length] > allowed + 1 or abs(query_length - length) > allowed:
+                    break
+                # Each edit breaks at most one piece and shifts the others by
+                # at most one position, so the pieces missing from the query
+                # bound the distance from below. Near duplicates are verified
+                # at once, the rest closest first once the list is read
+                scored = []
+                # Newest segments first: with a capped budget, recent rows are the likeliest matches
+                for segment_id in reversed(postings):
+                    if segment_id in seen:
+                        continue
+                    seen.add(segment_id)
+                    examined += 1
+                    missing = _missing_pieces(norm, self._norms[segment_id], pieces[length], allowed)
+                    if missing <= min(1, allowed):
+                        if verify(segment_id, longest, allowed):
+                            allowed = allowed_distance(longest)
+                    elif missing <= allowed:
+                        scored.append((missing, segment_id))
+                    if best is not None and allowed_distance(widest) < 1:
+                        # Only an exact match could be better, and there is none
+                        return best, best_similarity
+                    if examined >= MAX_CANDIDATES:
+                        break
+                scored.sort()
+                for missing, segment_id in scored:
+                    if missing > allowed:
+                        break
+                    if verify(segment_id, longest, allowed):
+                        allowed = allowed_distance(longest)
+                if examined >= MAX_CANDIDATES:
+                    return best, best_similarity
+        return best, best_similarity
+
+    def save(self, path: str) -> None:
+        """Write all segments to a JSON Lines file."""
+        with self._lock:
+            pairs = list(zip(self._sources, self._targets))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for source, target in pairs:
+                f.write(json.dumps({"source": source, "target": target}, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.85) -> "TranslationMemory":
+        """Load segments written by save(); a missing file gives an empty memory."""
+        memory = cls(threshold=threshold)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        memory.add(record["source"], record["target"])
+        return memory
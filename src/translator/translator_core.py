@@ -4,14 +4,20 @@ Combines the best of Translation Agent and Excel Translator
 """
 
 import os
+import json
 import time
-from functools import wraps
-from threading import Lock
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache, wraps
+from threading import Event, Lock
 from typing import List, Optional, Union, Dict, Any, Tuple
 
-import tiktoken
 from dotenv import load_dotenv
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from .glossary import Glossary, try_load_glossary
+from .journal import get_active_journal
+from .masking import PLACEHOLDER_INSTRUCTION, TemplateCache, mask_text, needs_translation, placeholders_intact, unmask_text
+from .translation_memory import TMMatch, TranslationMemory
 
 # Load environment variables
 load_dotenv()
@@ -24,7 +30,12 @@ DEFAULT_CONFIG = {
     "rpm": 60,
     "max_tokens": 1000,
     "json_mode": False,
-    "base_url": None
+    "base_url": None,
+    "backup_endpoint": None,
+    "backup_model": None,
+    "hedge_percentile": 95.0,
+    "hedge_budget": 0.1,
+    "hedge_workers": 16
 }
 
 # Global client and configuration
@@ -142,6 +153,49 @@ LANGUAGE_CODES = {
 }
 
 
+def _create_client(
+    endpoint: str,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+):
+    """Create an OpenAI-compatible client for the given endpoint."""
+    # Dynamic import to avoid unnecessary dependencies
+    import openai
+    
+    # Configure client based on endpoint
+    match endpoint:
+        case "OpenAI":
+            return openai.OpenAI(api_key=api_key if api_key else os.getenv("OPENAI_API_KEY"))
+        case "Groq":
+            return openai.OpenAI(
+                api_key=api_key if api_key else os.getenv("GROQ_API_KEY"),
+                base_url="https://api.groq.com/openai/v1",
+            )
+        case "Gemini":
+            return openai.OpenAI(
+                api_key=api_key if api_key else os.getenv("GEMINI_API_KEY"),
+                base_url="https://generativelanguage.googleapis.com/v1beta",
+            )
+        case "TogetherAI":
+            return openai.OpenAI(
+                api_key=api_key if api_key else os.getenv("TOGETHER_API_KEY"),
+                base_url="https://api.together.xyz/v1",
+            )
+        case "CUSTOM":
+            if not base_url:
+                raise ValueError("Base URL is required for CUSTOM endpoint")
+            return openai.OpenAI(api_key=api_key, base_url=base_url)
+        case "Ollama":
+            return openai.OpenAI(
+                api_key="ollama", base_url="http://localhost:11434/v1"
+            )
+        case _:
+            # Default to OpenAI
+            return openai.OpenAI(
+                api_key=api_key if api_key else os.getenv("OPENAI_API_KEY")
+            )
+
+
 def model_load(
     endpoint: str,
     model: str,
@@ -150,6 +204,13 @@ def model_load(
     temperature: float = 0.3,
     rpm: int = 360,
     json_mode: bool = False,
+    backup_endpoint: Optional[str] = None,
+    backup_model: Optional[str] = None,
+    backup_api_key: Optional[str] = None,
+    backup_base_url: Optional[str] = None,
+    hedge_percentile: float = 95.0,
+    hedge_budget: float = 0.1,
+    hedge_workers: int = 16,
 ) -> Dict[str, Any]:
     """
     Load and configure the language model client.
@@ -162,11 +223,20 @@ def model_load(
         temperature: Temperature parameter for text generation
         rpm: Rate limit (requests per minute)
         json_mode: Whether to use JSON mode for responses
+        backup_endpoint: Optional second provider used for hedged requests
+        backup_model: Model name on the backup endpoint (defaults to model)
+        backup_api_key: API key for the backup endpoint
+        backup_base_url: Custom base URL for the backup endpoint
+        hedge_percentile: Latency percentile after which a request is hedged
+        hedge_budget: Maximum fraction of calls that may be hedged
+        hedge_workers: Threads running the primary requests of hedged calls, and
+            as many again for backups; use at least the number of concurrent
+            translations
         
     Returns:
         Dictionary with current configuration
     """
-    global client, current_config
+    global client, backup_client, current_config, _hedge_executor, _backup_executor
     
     # Update configuration
     current_config["endpoint"] = endpoint
@@ -174,46 +244,29 @@ def model_load(
     current_config["temperature"] = temperature
     current_config["rpm"] = rpm
     current_config["json_mode"] = json_mode
+    current_config["backup_endpoint"] = backup_endpoint
+    current_config["backup_model"] = backup_model or model
+    current_config["hedge_percentile"] = hedge_percentile
+    current_config["hedge_budget"] = hedge_budget
+    current_config["hedge_workers"] = hedge_workers
     
     if base_url:
         current_config["base_url"] = base_url
     
     try:
-        # Dynamic import to avoid unnecessary dependencies
-        import openai
-        
-        # Configure client based on endpoint
-        match endpoint:
-            case "OpenAI":
-                client = openai.OpenAI(api_key=api_key if api_key else os.getenv("OPENAI_API_KEY"))
-            case "Groq":
-                client = openai.OpenAI(
-                    api_key=api_key if api_key else os.getenv("GROQ_API_KEY"),
-                    base_url="https://api.groq.com/openai/v1",
-                )
-            case "Gemini":
-                client = openai.OpenAI(
-                    api_key=api_key if api_key else os.getenv("GEMINI_API_KEY"),
-                    base_url="https://generativelanguage.googleapis.com/v1beta",
-                )
-            case "TogetherAI":
-                client = openai.OpenAI(
-                    api_key=api_key if api_key else os.getenv("TOGETHER_API_KEY"),
-                    base_url="https://api.together.xyz/v1",
-                )
-            case "CUSTOM":
-                if not base_url:
-                    raise ValueError("Base URL is required for CUSTOM endpoint")
-                client = openai.OpenAI(api_key=api_key, base_url=base_url)
-            case "Ollama":
-                client = openai.OpenAI(
-                    api_key="ollama", base_url="http://localhost:11434/v1"
-                )
-            case _:
-                # Default to OpenAI
-                client = openai.OpenAI(
-                    api_key=api_key if api_key else os.getenv("OPENAI_API_KEY")
-                )
+        client = _create_client(endpoint, api_key, base_url)
+        backup_client = (
+            _create_client(backup_endpoint, backup_api_key, backup_base_url)
+            if backup_endpoint else None
+        )
+        hedge_stats.reset()
+        for executor in (_hedge_executor, _backup_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        _hedge_executor = _backup_executor = None
+        if backup_client is not None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=max(1, hedge_workers), thread_name_prefix="hedge")
+            _backup_executor = ThreadPoolExecutor(max_workers=max(1, hedge_workers), thread_name_prefix="hedge-backup")
         
         return current_config
     
@@ -226,30 +279,207 @@ def model_load(
 
 
 def rate_limit(get_max_per_minute):
-    """Rate limiting decorator to control API request rate"""
+    """Rate limiting decorator to control API request rate.
+
+    Calls start at most max_per_minute times per minute across all threads.
+    Each caller reserves the next start slot under the lock, then waits and
+    runs outside it, so concurrent requests overlap instead of queueing
+    behind each other's responses.
+    """
     def decorator(func):
         lock = Lock()
-        last_called = [0.0]
+        next_slot = [0.0]
 
         @wraps(func)
         def wrapper(*args, **kwargs):
             with lock:
-                max_per_minute = get_max_per_minute()
-                min_interval = 60.0 / max_per_minute
-                elapsed = time.time() - last_called[0]
-                left_to_wait = min_interval - elapsed
-
-                if left_to_wait > 0:
-                    time.sleep(left_to_wait)
+                min_interval = 60.0 / get_max_per_minute()
+                now = time.monotonic()
+                slot = max(now, next_slot[0])
+                next_slot[0] = slot + min_interval
 
-                ret = func(*args, **kwargs)
-                last_called[0] = time.time()
-                return ret
+            left_to_wait = slot - time.monotonic()
+            if left_to_wait > 0:
+                time.sleep(left_to_wait)
+            return func(*args, **kwargs)
 
         return wrapper
     return decorator
 
 
+class HedgeStats:
+    """Latency history and counters for hedged requests."""
+
+    def __init__(self, history_size: int = 200):
+        self._lock = Lock()
+        self.latencies = deque(maxlen=history_size)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies.clear()
+            self.calls = 0
+            self.hedged = 0
+            self.backup_wins = 0
+            self.saved_seconds = 0.0
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def start_call(self, budget: float) -> bool:
+        """Count a new call; return whether hedging it would stay within the budget."""
+        with self._lock:
+            self.calls += 1
+            return self.hedged < self.calls * budget
+
+    def record_hedge(self) -> None:
+        with self._lock:
+            self.hedged += 1
+
+    def record_backup_win(self) -> None:
+        with self._lock:
+            self.backup_wins += 1
+
+    def record_saved(self, seconds: float) -> None:
+        """Add the time a winning backup saved over its primary."""
+        with self._lock:
+            self.saved_seconds += seconds
+
+    def hedge_delay(self, percentile: float) -> float:
+        """Delay after which a request is hedged, from recent primary latencies."""
+        with self._lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY
+            ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100.0))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self.latencies)
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+                "backup_wins": self.backup_wins,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "p50_latency": ordered[len(ordered) // 2] if ordered else None,
+                "p99_latency": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else None,
+            }
+
+
+# Hedging defaults: hedge after this many seconds until enough latencies are known
+HEDGE_DEFAULT_DELAY = 10.0
+HEDGE_MIN_SAMPLES = 20
+
+backup_client = None
+hedge_stats = HedgeStats()
+# Created by model_load() when a backup endpoint is configured. Backups get
+# their own pool so that losing requests still running on one side never
+# hold up the other
+_hedge_executor = None
+_backup_executor = None
+
+
+def get_hedge_stats() -> Dict[str, Any]:
+    """Return hedge rate and tail-latency savings for the current model configuration."""
+    return hedge_stats.summary()
+
+
+def _request_completion(
+    api_client,
+    model: str,
+    temperature: float,
+    json_mode: bool,
+    system_message: str,
+    prompt: str,
+) -> str:
+    """Send a single chat completion request and return the message content."""
+    if json_mode:
+        response = api_client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            top_p=1,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ],
+        )
+    else:
+        response = api_client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            top_p=1,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ],
+        )
+    
+    return response.choices[0].message.content
+
+
+@rate_limit(lambda: current_config["rpm"])
+def _backup_completion(*args) -> str:
+    """A request to the backup endpoint, rate limited like get_completion but separately."""
+    return _request_completion(*args)
+
+
+def _hedged_completion(model: str, temperature: float, json_mode: bool, system_message: str, prompt: str) -> str:
+    """Race the primary endpoint against the backup once the primary is slower than usual."""
+    # The clock starts when a worker picks the request up, so time spent
+    # queued behind other calls is neither recorded nor counted towards hedging
+    running = Event()
+    started = [0.0]
+
+    def timed_primary():
+        started[0] = time.monotonic()
+        running.set()
+        result = _request_completion(client, model, temperature, json_mode, system_message, prompt)
+        hedge_stats.record_latency(time.monotonic() - started[0])
+        return result
+
+    primary = _hedge_executor.submit(timed_primary)
+
+    within_budget = hedge_stats.start_call(current_config["hedge_budget"])
+
+    delay = hedge_stats.hedge_delay(current_config["hedge_percentile"])
+    running.wait()
+    done, _ = wait([primary], timeout=max(0.0, delay - (time.monotonic() - started[0])))
+    if done or not within_budget:
+        return primary.result()
+
+    hedge_stats.record_hedge()
+    backup = _backup_executor.submit(
+        _backup_completion, backup_client, current_config["backup_model"],
+        temperature, json_mode, system_message, prompt
+    )
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            # The loser keeps running in the background; its result is discarded
+            for other in pending:
+                other.cancel()
+            if future is backup:
+                won_at = time.monotonic()
+
+                def on_late_primary(late, won_at=won_at):
+                    if late.exception() is None:
+                        hedge_stats.record_saved(time.monotonic() - won_at)
+
+                hedge_stats.record_backup_win()
+                primary.add_done_callback(on_late_primary)
+            return future.result()
+    raise error
+
+
 @rate_limit(lambda: current_config["rpm"])
 def get_completion(
     prompt: str,
@@ -261,6 +491,10 @@ def get_completion(
     """
     Generate a completion using the configured language model.
     
+    If a backup endpoint was configured in model_load(), a request that takes
+    longer than the configured latency percentile is re-sent to the backup and
+    whichever answer arrives first is used.
+    
     Args:
         prompt: The user's prompt or query
         system_message: Context for the assistant
@@ -282,39 +516,96 @@ def get_completion(
     json_mode = json_mode if json_mode is not None else current_config["json_mode"]
     
     try:
-        if json_mode:
-            response = client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                top_p=1,
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt},
-                ],
-            )
-        else:
-            response = client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                top_p=1,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt},
-                ],
-            )
+        if backup_client is not None:
+            return _hedged_completion(model, temperature, json_mode, system_message, prompt)
         
-        return response.choices[0].message.content
+        return _request_completion(client, model, temperature, json_mode, system_message, prompt)
     
     except Exception as e:
         raise RuntimeError(f"API request failed: {str(e)}")
 
 
+# Bundled tiktoken cache so BPE files are downloaded at most once (or seeded
+# with "python run.py setup" for offline hosts).
+# An explicitly configured TIKTOKEN_CACHE_DIR takes precedence.
+TIKTOKEN_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiktoken_cache")
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", TIKTOKEN_CACHE_DIR)
+
+TIKTOKEN_ENCODING_URLS = {
+    "cl100k_base": "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken",
+    "o200k_base": "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken",
+}
+
+# Model name prefixes that use the o200k_base encoding
+O200K_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1", "gpt-4.5", "gpt-5", "o1", "o3", "o4", "chatgpt-4o")
+
+
+def encoding_name_for_model(model: Optional[str] = None) -> str:
+    """Pick the tiktoken encoding for a model (cl100k_base for non-OpenAI models)."""
+    model = (model or current_config["model"] or "").lower()
+    if model.startswith(O200K_MODEL_PREFIXES):
+        return "o200k_base"
+    return "cl100k_base"
+
+
+def _tiktoken_cache_file(encoding_name: str) -> str:
+    """Path where tiktoken caches the BPE file of an encoding."""
+    import hashlib
+    
+    cache_key = hashlib.sha1(TIKTOKEN_ENCODING_URLS[encoding_name].encode()).hexdigest()
+    return os.path.join(os.environ["TIKTOKEN_CACHE_DIR"], cache_key)
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    """Load an encoding once per process, or None if it cannot be loaded.
+    
+    tiktoken reads the BPE file from the cache or downloads it into the
+    cache on first use; only when that fails (e.g. offline with an empty
+    cache) does token counting fall back to an estimate.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        hint = ""
+        if encoding_name in TIKTOKEN_ENCODING_URLS and not os.path.exists(_tiktoken_cache_file(encoding_name)):
+            hint = " Run 'python run.py setup' once while online to cache it."
+        print(f"Could not load tiktoken encoding '{encoding_name}': {e}; using an approximate token count.{hint}")
+        return None
+
+
+def seed_tiktoken_cache(encoding_names: Optional[List[str]] = None) -> str:
+    """Download the BPE files into the bundled cache so later runs work offline.
+    
+    Args:
+        encoding_names: Encodings to fetch (defaults to all supported encodings)
+        
+    Returns:
+        The cache directory
+    """
+    import tiktoken
+    
+    os.makedirs(os.environ["TIKTOKEN_CACHE_DIR"], exist_ok=True)
+    for encoding_name in encoding_names or TIKTOKEN_ENCODING_URLS:
+        tiktoken.get_encoding(encoding_name)
+        print(f"Cached tiktoken encoding: {encoding_name}")
+    _get_encoding.cache_clear()
+    return os.environ["TIKTOKEN_CACHE_DIR"]
+
+
 def num_tokens_in_string(
-    input_str: str, encoding_name: str = "cl100k_base"
+    input_str: str, encoding_name: Optional[str] = None
 ) -> int:
-    """Count the number of tokens in a string."""
-    encoding = tiktoken.get_encoding(encoding_name)
+    """Count the number of tokens in a string.
+    
+    Uses the encoding of the configured model unless encoding_name is given.
+    Falls back to an estimate of ~4 characters per token when the encoding
+    is not available offline.
+    """
+    encoding = _get_encoding(encoding_name or encoding_name_for_model())
+    if encoding is None:
+        return (len(input_str) + 3) // 4
     num_tokens = len(encoding.encode(input_str))
     return num_tokens
 
@@ -339,27 +630,29 @@ def calculate_chunk_size(token_count: int, token_limit: int) -> int:
     return chars_per_chunk
 
 
+def split_text_into_chunks(source_text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of roughly max_tokens tokens each."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=max_tokens,
+        chunk_overlap=0,
+        length_function=num_tokens_in_string,
+    )
+    return text_splitter.split_text(source_text)
+
+
 def load_custom_terminology(terminology_file: str) -> Dict[str, str]:
     """Load custom terminology from a file.
     
     Args:
-        terminology_file: Path to the terminology file
+        terminology_file: Path to the terminology file (TXT, TSV, CSV or XLSX)
         
     Returns:
         Dictionary mapping source terms to target terms
     """
-    terminology = {}
-    try:
-        with open(terminology_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and '=' in line:
-                    source, target = line.split('=', 1)
-                    terminology[source.strip()] = target.strip()
-        return terminology
-    except Exception as e:
-        print(f"Error loading terminology file: {e}")
-        return {}
+    glossary = try_load_glossary(terminology_file)
+    return dict(glossary) if glossary else {}
 
 
 def get_style_prompt(style: str, custom_instructions: str = None) -> str:
@@ -387,7 +680,8 @@ def simple_translator(
     full_response: bool = False,
     translation_style: str = "General",
     custom_style_instructions: str = None,
-    terminology_file: str = None
+    terminology_file: str = None,
+    fused_reflection: bool = False
 ) -> Union[str, Tuple[str, str, str]]:
     """Translate text with options for returning the final translation or all steps.
     
@@ -401,15 +695,16 @@ def simple_translator(
         translation_style: Style of translation to use
         custom_style_instructions: Additional custom instructions for the style
         terminology_file: Path to custom terminology file
+        fused_reflection: Get the reflection and the improved translation from a
+            single JSON-mode call instead of two sequential calls
         
     Returns:
         If full_response is False, returns the final translation.
         If full_response is True, returns a tuple of (initial_translation, reflection, final_translation).
     """
-    # Load custom terminology if provided
-    terminology = {}
-    if terminology_file:
-        terminology = load_custom_terminology(terminology_file)
+    # Load custom terminology if provided (compiled once and cached per file)
+    glossary = try_load_glossary(terminology_file)
+    terminology = glossary.subset_for(source_text) if glossary else {}
     
     # Get style prompt
     style_prompt = get_style_prompt(translation_style, custom_style_instructions)
@@ -419,17 +714,22 @@ def simple_translator(
         # Split text into chunks
         chunks = split_text_into_chunks(source_text, max_tokens)
         
-        # Translate each chunk
+        # Translate each chunk, skipping chunks a resumed job already finished
+        journal = get_active_journal()
         translations = []
         for chunk in chunks:
-            translation = one_chunk_initial_translation(
-                source_lang=source_lang,
-                target_lang=target_lang,
-                source_text=chunk,
-                country=country,
-                style_prompt=style_prompt,
-                terminology=terminology
-            )
+            translation = journal.get(source_lang, target_lang, chunk) if journal is not None else None
+            if translation is None:
+                translation = one_chunk_initial_translation(
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    source_text=chunk,
+                    country=country,
+                    style_prompt=style_prompt,
+                    terminology=glossary.subset_for(chunk) if glossary else {}
+                )
+                if journal is not None and translation:
+                    journal.record_batch(source_lang, target_lang, [(chunk, translation)])
             translations.append(translation)
         
         # Combine translations
@@ -448,6 +748,20 @@ def simple_translator(
     if not full_response:
         return initial_translation
     
+    if fused_reflection:
+        # Reflect and improve in one round trip
+        reflection, final_translation = one_chunk_reflect_and_improve(
+            source_lang=source_lang,
+            target_lang=target_lang,
+            source_text=source_text,
+            initial_translation=initial_translation,
+            country=country,
+            translation_style=translation_style,
+            custom_style_instructions=custom_style_instructions,
+            terminology=terminology
+        )
+        return initial_translation, reflection, final_translation
+    
     # Get reflection on translation
     reflection = one_chunk_reflect_on_translation(
         source_lang=source_lang,
@@ -632,6 +946,146 @@ Please provide an improved translation that addresses the issues identified in t
     return response.strip()
 
 
+def _batch_prompts(
+    segments: List[str],
+    source_lang: str,
+    target_lang: str,
+    country: str = "",
+    separator: str = "|||",
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    glossary: Optional[Glossary] = None,
+    references: Optional[List[TMMatch]] = None,
+    masked: bool = False,
+    source_langs: Optional[List[str]] = None,
+) -> Tuple[str, str]:
+    """Build the (system message, user prompt) of one batch request.
+    
+    Segments are joined with separator, or, with source_langs, sent as a JSON
+    list in which every segment carries its own source language.
+    """
+    # Combine texts with separator
+    combined_text = separator.join(segments)
+    
+    # Keep only the glossary terms used in this batch
+    custom_terminology = str(glossary.subset_for(combined_text)) if glossary else ""
+    
+    # Get style description
+    style_description = TRANSLATION_STYLES.get(translation_style, "general translation")
+    
+    # Prepare system message
+    if source_langs is None:
+        system_message = f"""You are a professional translator from {source_lang} to {target_lang}, specializing in {style_description}. 
+Follow these rules strictly:
+1. Output ONLY the translation, nothing else
+2. DO NOT include the original text in your response
+3. DO NOT add any explanations or notes
+4. Keep IDs, model numbers, and special characters unchanged
+5. Use standard terminology for technical terms
+6. Preserve the original formatting (spaces, line breaks)
+7. Use proper grammar and punctuation
+8. Only keep unchanged: proper names, IDs, and technical codes
+9. Translate all segments separated by "{separator}" and keep them separated with the same delimiter"""
+    else:
+        system_message = f"""You are a professional translator into {target_lang}, specializing in {style_description}. Each segment states its own source language.
+Follow these rules strictly:
+1. Answer with a single JSON object: {{"translations": [{{"id": <segment id>, "text": "<translation>"}}, ...]}}
+2. Return exactly one translation for every segment id; DO NOT include the original text
+3. DO NOT add any explanations or notes
+4. Keep IDs, model numbers, and special characters unchanged
+5. Use standard terminology for technical terms
+6. Preserve the original formatting (spaces, line breaks)
+7. Use proper grammar and punctuation
+8. Only keep unchanged: proper names, IDs, and technical codes
+9. Translate each segment from its "source_language" into {target_lang}"""
+    
+    if country:
+        system_message += f"\n10. Use language style appropriate for {target_lang} as spoken in {country}"
+    
+    if custom_style_instructions:
+        system_message += f"\n11. Follow these additional style instructions: {custom_style_instructions}"
+    
+    if custom_terminology:
+        system_message += f"\n12. Use the following custom terminology for specialized terms:\n{custom_terminology}"
+    
+    if references:
+        reference_lines = "".join(f"- {match.source} → {match.target}\n" for match in references)
+        system_message += f"\n13. Earlier translations of similar segments; reuse their wording where it fits:\n{reference_lines}"
+    
+    if masked:
+        system_message += f"\n14. {PLACEHOLDER_INSTRUCTION}"
+    
+    # Prepare prompt
+    if source_langs is None:
+        user_prompt = f"""Translate the following text from {source_lang} to {target_lang} in a {style_description} style, keeping segments separated by '{separator}':\n\n{combined_text}"""
+    else:
+        request = {"segments": [
+            {"id": k + 1, "source_language": lang, "text": segment}
+            for k, (segment, lang) in enumerate(zip(segments, source_langs))
+        ]}
+        user_prompt = f"""Translate every segment into {target_lang} in a {style_description} style:\n\n{json.dumps(request, ensure_ascii=False)}"""
+    
+    return system_message, user_prompt
+
+
+def _parse_mixed_translations(response: str, count: int) -> List[Optional[str]]:
+    """Read the translations of a mixed-language batch by segment id; missing ones are None."""
+    try:
+        items = json.loads(response).get("translations", [])
+    except (ValueError, AttributeError) as e:
+        print(f"Mixed-language batch response could not be parsed: {e}")
+        return [None] * count
+    parts: List[Optional[str]] = [None] * count
+    for item in items if isinstance(items, list) else []:
+        try:
+            k = int(item["id"]) - 1
+            if 0 <= k < count and isinstance(item["text"], str):
+                parts[k] = item["text"]
+        except (KeyError, TypeError, ValueError):
+            continue
+    return parts
+
+
+def _translate_segments(
+    segments: List[str],
+    source_lang: str,
+    target_lang: str,
+    country: str = "",
+    separator: str = "|||",
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    glossary: Optional[Glossary] = None,
+    references: Optional[List[TMMatch]] = None,
+    masked: bool = False,
+    source_langs: Optional[List[str]] = None,
+) -> List[Optional[str]]:
+    """Translate non-empty segments with one batch request.
+    
+    Returns the raw split response, which may have more or fewer parts than
+    segments. With source_langs (one language per segment) the request is a
+    JSON list and the result has one part per segment, None where the model
+    left a segment out. API errors are raised to the caller.
+    """
+    system_message, user_prompt = _batch_prompts(
+        segments, source_lang, target_lang, country, separator,
+        translation_style, custom_style_instructions, glossary, references, masked,
+        source_langs
+    )
+    
+    if source_langs is not None:
+        response = get_completion(prompt=user_prompt, system_message=system_message, json_mode=True)
+        return _parse_mixed_translations(response, len(segments))
+    
+    # Call API
+    translated_text = get_completion(
+        prompt=user_prompt,
+        system_message=system_message
+    )
+    
+    # Split response
+    return translated_text.split(separator)
+
+
 def batch_translate(
     texts: Optional[List[str]] = None,
     source_texts: Optional[List[str]] = None,
@@ -641,7 +1095,11 @@ def batch_translate(
     separator: str = "|||",
     translation_style: str = "General",
     custom_style_instructions: str = "",
-    terminology_file: Optional[str] = None
+    terminology_file: Optional[str] = None,
+    translation_memory: Optional[TranslationMemory] = None,
+    mask_placeholders: bool = True,
+    template_cache: Optional[TemplateCache] = None,
+    source_langs: Optional[List[str]] = None
 ) -> List[str]:
     """
     Translate a batch of texts at once to optimize API usage.
@@ -658,6 +1116,20 @@ def batch_translate(
         translation_style: Style of translation (e.g., "Literary", "Technical", "Financial")
         custom_style_instructions: Additional custom instructions for translation style
         terminology_file: Path to a file containing custom terminology
+        translation_memory: Optional memory of earlier translations. Identical
+            segments are reused without a request, similar ones are sent as
+            reference translations, and new translations are added to it.
+        mask_placeholders: Replace numbers, dates, amounts, codes, URLs and
+            emails with placeholders before sending, restore them afterwards
+            and retry segments whose placeholders come back damaged.
+            Segments that mask to the same template are translated once.
+        template_cache: Optional cache of translated templates shared across
+            batches, so variants differing only in masked values are filled
+            in locally instead of being sent again.
+        source_langs: Optional source language of each text (e.g. from
+            detect_language). Texts in different languages then share one
+            request in which each segment states its language, instead of
+            one request per language; source_lang is ignored.
         
     Returns:
         List of translated texts
@@ -673,68 +1145,134 @@ def batch_translate(
     if not input_texts:
         return []
     
-    # Load custom terminology if provided
-    custom_terminology = ""
-    if terminology_file and os.path.exists(terminology_file):
-        try:
-            with open(terminology_file, 'r', encoding='utf-8') as f:
-                custom_terminology = f.read()
-        except Exception as e:
-            print(f"Error loading terminology file: {e}")
-    
     # Filter out empty texts
     filtered_texts = [text for text in input_texts if text and len(text.strip()) > 0]
     if not filtered_texts:
         return input_texts
-    
-    # Combine texts with separator
-    combined_text = separator.join(filtered_texts)
-    
-    # Get style description
-    style_description = TRANSLATION_STYLES.get(translation_style, "general translation")
-    
-    # Prepare system message
-    system_message = f"""You are a professional translator from {source_lang} to {target_lang}, specializing in {style_description}. 
-Follow these rules strictly:
-1. Output ONLY the translation, nothing else
-2. DO NOT include the original text in your response
-3. DO NOT add any explanations or notes
-4. Keep IDs, model numbers, and special characters unchanged
-5. Use standard terminology for technical terms
-6. Preserve the original formatting (spaces, line breaks)
-7. Use proper grammar and punctuation
-8. Only keep unchanged: proper names, IDs, and technical codes
-9. Translate all segments separated by "{separator}" and keep them separated with the same delimiter"""
-    
-    if country:
-        system_message += f"\n10. Use language style appropriate for {target_lang} as spoken in {country}"
-    
-    if custom_style_instructions:
-        system_message += f"\n11. Follow these additional style instructions: {custom_style_instructions}"
-    
-    if custom_terminology:
-        system_message += f"\n12. Use the following custom terminology for specialized terms:\n{custom_terminology}"
-    
-    # Prepare prompt
-    user_prompt = f"""Translate the following text from {source_lang} to {target_lang} in a {style_description} style, keeping segments separated by '{separator}':\n\n{combined_text}"""
+    if source_langs is not None:
+        langs = [lang for text, lang in zip(input_texts, source_langs) if text and len(text.strip()) > 0]
+    else:
+        langs = [source_lang] * len(filtered_texts)
+    
+    # Load custom terminology if provided (compiled once and cached per file)
+    glossary = try_load_glossary(terminology_file) if terminology_file and os.path.exists(terminology_file) else None
+    
+    # Mask numbers, codes and similar tokens; segments left with nothing to
+    # translate are kept as they are, known templates are filled in locally
+    translated = {}
+    masks = {}
+    if mask_placeholders:
+        for i, text in enumerate(filtered_texts):
+            masks[i] = mask_text(text)
+            if not needs_translation(masks[i]):
+                translated[i] = text
+            elif template_cache is not None:
+                cached = template_cache.get(masks[i])
+                if cached is not None:
+                    translated[i] = cached
+    
+    # Segments finished by an earlier, interrupted run of the current job
+    journal = get_active_journal()
+    if journal is not None:
+        for i, text in enumerate(filtered_texts):
+            if i not in translated:
+                done = journal.get(langs[i], target_lang, text)
+                if done is not None:
+                    translated[i] = done
+    
+    # Resolve remaining segments from the translation memory where possible
+    references = []
+    if translation_memory is not None:
+        for i, text in enumerate(filtered_texts):
+            if i in translated:
+                continue
+            match = translation_memory.lookup(text)
+            if match is None:
+                continue
+            if match.source == text:
+                translated[i] = match.target
+            elif match not in references:
+                references.append(match)
+    pending = [i for i in range(len(filtered_texts)) if i not in translated]
     
     try:
-        # Call API
-        translated_text = get_completion(
-            prompt=user_prompt,
-            system_message=system_message
-        )
-        
-        # Split response
-        translated_parts = translated_text.split(separator)
-        
-        # Handle mismatch in number of translated parts
-        if len(translated_parts) != len(filtered_texts):
-            # Fill with original text if parts are missing
-            if len(translated_parts) < len(filtered_texts):
-                translated_parts.extend(filtered_texts[len(translated_parts):])
-            else:
-                translated_parts = translated_parts[:len(filtered_texts)]
+        if pending:
+            # Send each distinct (masked) text once
+            request_of = {}
+            unique_texts = []
+            unique_masks = []
+            unique_langs = []
+            for i in pending:
+                request_key = (langs[i], masks[i].text if i in masks else filtered_texts[i])
+                if request_key not in request_of:
+                    request_of[request_key] = len(unique_texts)
+                    unique_texts.append(request_key[1])
+                    unique_masks.append(masks.get(i))
+                    unique_langs.append(langs[i])
+            
+            # A batch in one language uses the plain delimited request
+            mixed = len(set(unique_langs)) > 1
+            batch_lang = source_lang if mixed else unique_langs[0]
+            translated_parts = _translate_segments(
+                unique_texts, batch_lang, target_lang, country, separator,
+                translation_style, custom_style_instructions, glossary, references,
+                masked=bool(masks), source_langs=unique_langs if mixed else None
+            )
+            
+            # Handle mismatch in number of translated parts
+            complete = len(translated_parts) == len(unique_texts)
+            if not complete:
+                # Fill with original text if parts are missing
+                if len(translated_parts) < len(unique_texts):
+                    translated_parts.extend(unique_texts[len(translated_parts):])
+                else:
+                    translated_parts = translated_parts[:len(unique_texts)]
+            
+            # Segments left out of a mixed-language answer keep their source text
+            for k, part in enumerate(translated_parts):
+                if part is None:
+                    translated_parts[k] = unique_texts[k]
+                    complete = False
+            
+            if masks:
+                # Retry only the segments whose placeholders were lost or altered
+                damaged = [k for k, mask in enumerate(unique_masks)
+                           if not placeholders_intact(translated_parts[k], mask)]
+                if damaged:
+                    print(f"Retrying {len(damaged)} segment(s) with damaged placeholders")
+                    retried = _translate_segments(
+                        [unique_texts[k] for k in damaged], batch_lang, target_lang, country, separator,
+                        translation_style, custom_style_instructions, glossary, references,
+                        masked=True, source_langs=[unique_langs[k] for k in damaged] if mixed else None
+                    )
+                    # Parts can only be matched to segments by position when none is
+                    # missing; segments sharing placeholders would otherwise swap text
+                    if len(retried) == len(damaged):
+                        for k, part in zip(damaged, retried):
+                            if part is not None and placeholders_intact(part, unique_masks[k]):
+                                translated_parts[k] = part
+                    for k in damaged:
+                        if not placeholders_intact(translated_parts[k], unique_masks[k]):
+                            # Never ship a translation with missing or altered values
+                            print(f"Placeholders still damaged, keeping source text: {unique_texts[k][:50]}")
+                            translated_parts[k] = unique_texts[k]
+                            complete = False
+                if template_cache is not None and complete:
+                    for k, mask in enumerate(unique_masks):
+                        template_cache.put(mask, translated_parts[k].strip())
+            
+            for i in pending:
+                part = translated_parts[request_of[(langs[i], masks[i].text if i in masks else filtered_texts[i])]]
+                translated[i] = unmask_text(part, masks[i]) if i in masks else part
+                if translation_memory is not None and complete:
+                    translation_memory.add(filtered_texts[i], translated[i].strip())
+            
+            # Journal only batches that came back whole; the rest is redone on resume
+            if journal is not None and complete:
+                for lang in dict.fromkeys(langs[i] for i in pending):
+                    journal.record_batch(lang, target_lang, [
+                        (filtered_texts[i], translated[i]) for i in pending if langs[i] == lang
+                    ])
         
         # Map translations back to original text positions
         result = []
@@ -742,7 +1280,7 @@ Follow these rules strictly:
         
         for original_text in input_texts:
             if original_text and len(original_text.strip()) > 0:
-                result.append(translated_parts[translated_idx])
+                result.append(translated[translated_idx])
                 translated_idx += 1
             else:
                 result.append("")
@@ -878,6 +1416,87 @@ Please provide the improved {target_lang} translation of the original text. Retu
     return improved_translation
 
 
+def one_chunk_reflect_and_improve(
+    source_lang: str,
+    target_lang: str,
+    source_text: str,
+    initial_translation: str,
+    country: str = "",
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology: Dict[str, str] = None
+) -> Tuple[str, str]:
+    """Reflect on a translation and improve it in a single JSON-mode call.
+
+    Falls back to the sequential reflect/improve calls if the model does not
+    return a usable JSON object.
+
+    Returns:
+        Tuple of (reflection, improved_translation)
+    """
+    # Get style description
+    style_description = TRANSLATION_STYLES.get(translation_style, "general translation")
+
+    # Prepare system message
+    system_message = f"""You are an expert linguist, specializing in {style_description} translation and editing from {source_lang} to {target_lang}. You always answer with a single JSON object."""
+
+    if custom_style_instructions:
+        system_message += f"\nAdditional style instructions: {custom_style_instructions}"
+
+    if terminology:
+        system_message += f"\nUse the following custom terminology for specialized terms:\n{terminology}"
+
+    country_context = f"The final style and tone of the translation should match the style of {target_lang} colloquially spoken in {country}." if country else ""
+
+    prompt = f"""Your task is to carefully read a source text and a translation from {source_lang} to {target_lang} in a {style_description} style, \
+give constructive criticism and helpful suggestions to improve the translation, and then edit the translation taking those suggestions into account. \
+{country_context}
+
+The source text and initial translation, delimited by XML tags <SOURCE_TEXT></SOURCE_TEXT> and <TRANSLATION></TRANSLATION>, are as follows:
+
+<SOURCE_TEXT>
+{source_text}
+</SOURCE_TEXT>
+
+<TRANSLATION>
+{initial_translation}
+</TRANSLATION>
+
+When writing suggestions, pay attention to whether there are ways to improve the translation's \n\
+(i) accuracy (by correcting errors of addition, mistranslation, omission, or untranslated text),\n\
+(ii) fluency (by applying {target_lang} grammar, spelling and punctuation rules, and ensuring there are no unnecessary repetitions),\n\
+(iii) style (by ensuring the translations reflect the {style_description} style and take into account any cultural context),\n\
+(iv) terminology (by ensuring terminology use is consistent and reflects the source text domain; and by only ensuring you use equivalent idioms {target_lang}).\n\
+
+Respond with a JSON object with exactly two keys:
+"reflection": a list of specific, helpful and constructive suggestions, each addressing one specific part of the translation,
+"improved_translation": the improved {target_lang} translation of the source text, with no explanation or commentary."""
+
+    response = get_completion(prompt, system_message=system_message, json_mode=True)
+
+    try:
+        data = json.loads(response)
+        reflection = data["reflection"]
+        improved_translation = data["improved_translation"]
+        if isinstance(reflection, list):
+            reflection = "\n".join(f"- {item}" for item in reflection)
+        if not isinstance(reflection, str) or not isinstance(improved_translation, str) or not improved_translation.strip():
+            raise ValueError("unexpected JSON structure")
+        return reflection.strip(), improved_translation.strip()
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Fused reflection response could not be parsed ({e}), falling back to sequential calls")
+
+    reflection = one_chunk_reflect_on_translation(
+        source_lang, target_lang, source_text, initial_translation,
+        country, translation_style, custom_style_instructions, terminology
+    )
+    improved_translation = one_chunk_improve_translation(
+        source_lang, target_lang, source_text, initial_translation, reflection,
+        get_style_prompt(translation_style, custom_style_instructions), terminology
+    )
+    return reflection, improved_translation
+
+
 def multichunk_initial_translation(
     source_lang: str, 
     target_lang: str, 
@@ -992,4 +1611,36 @@ def detect_language(text: str) -> str:
         
     except Exception as e:
         print(f"Error detecting language: {str(e)}")
-        return "Unknown" 
\ No newline at end of file
+        return "Unknown" 
+
+def detect_text_languages(texts: List[str], batch_size: int = 100) -> List[str]:
+    """
+    Detect the language of each text, reusing the detections of a resumed job.
+    
+    With an active job journal, languages already detected by an interrupted
+    run are read back instead of asked again, and new detections are
+    journaled as one record per batch_size texts rather than one per text.
+    
+    Args:
+        texts: The texts to detect the language of
+        batch_size: Number of new detections journaled together
+        
+    Returns:
+        The detected language name of each text ("Unknown" if it failed)
+    """
+    journal = get_active_journal()
+    languages = []
+    detected = []
+    for text in texts:
+        lang = journal.get("*", "language", text) if journal is not None else None
+        if lang is None:
+            lang = detect_language(text)
+            if journal is not None and lang != "Unknown":
+                detected.append((text, lang))
+                if len(detected) >= batch_size:
+                    journal.record_batch("*", "language", detected)
+                    detected = []
+        languages.append(lang)
+    if journal is not None:
+        journal.record_batch("*", "language", detected)
+    return languages
@@ -0,0 +1,226 @@
+"""
+XLS Processor for Advanced Translation Suite
+Translates legacy .xls (BIFF) workbooks with xlrd, without Microsoft Excel,
+and saves the result as .xlsx
+"""
+
+import os
+import re
+from typing import Dict, Optional
+
+from .excel_processor import clean_text, open_manifest, save_manifest, translate_cell_texts
+from .cell_classifier import TEXT, classify_column
+from .translation_memory import TranslationMemory
+from .masking import TemplateCache
+
+# Column widths in .xls files are in 1/256 of a character
+XLS_WIDTH_UNITS = 256
+
+# Control characters allowed in BIFF text and formats but not in XML
+ILLEGAL_XML_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xls_strings(book) -> list:
+    """Every distinct cell text of a workbook.
+
+    BIFF8 files keep their text in one shared string table, which xlrd
+    exposes before any sheet is loaded when the book is opened on demand.
+    Older BIFF versions store text in the cells, so those are scanned.
+    """
+    strings = getattr(book, "_sharedstrings", None)
+    if strings:
+        return list(dict.fromkeys(strings))
+
+    import xlrd
+    seen = {}
+    for index in range(book.nsheets):
+        sheet = book.sheet_by_index(index)
+        for row in range(sheet.nrows):
+            for ctype, value in zip(sheet.row_types(row), sheet.row_values(row)):
+                if ctype == xlrd.XL_CELL_TEXT:
+                    seen[value] = None
+        book.unload_sheet(index)
+    return list(seen)
+
+
+def _xls_style(book, xf_index: int, styles: Dict[int, dict]) -> dict:
+    """openpyxl style attributes of an .xls cell format, resolved once per format."""
+    style = styles.get(xf_index)
+    if style is not None:
+        return style
+
+    from openpyxl.styles import Alignment, Font
+    style = {}
+    xf = book.xf_list[xf_index] if xf_index < len(book.xf_list) else None
+    if xf is not None:
+        font = book.font_list[xf.font_index]
+        if font.bold or font.italic:
+            style["font"] = Font(bold=bool(font.bold), italic=bool(font.italic))
+        fmt = book.format_map.get(xf.format_key)
+        if fmt is not None and fmt.format_str and fmt.format_str != "General":
+            style["number_format"] = ILLEGAL_XML_CHARS_RE.sub("", fmt.format_str)
+        if xf.alignment.text_wrapped:
+            style["alignment"] = Alignment(wrap_text=True, vertical="top")
+    styles[xf_index] = style
+    return style
+
+
+def process_xls(
+    input_path: str,
+    output_path: Optional[str] = None,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    incremental: bool = False,
+) -> str:
+    """
+    Translate a legacy .xls workbook without Excel and save it as .xlsx.
+
+    All distinct strings are read from the workbook's shared string table in
+    one pass and translated together, once each; sheets are then loaded one
+    at a time and written to a new .xlsx workbook. Values, dates, merged
+    cells, column widths, bold/italic text, number formats and wrapping are
+    kept; formulas are written as their last calculated values, and charts,
+    shapes and macros are not carried over. Writing .xls again would need
+    Excel, so the output is always .xlsx.
+
+    Args:
+        input_path: Path to the .xls file to translate
+        output_path: Path where to save the translated file (if None, auto-generated;
+            an .xls extension is replaced by .xlsx)
+        source_lang: Source language of the content (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of strings to translate in one batch
+        detect_languages: Whether to detect languages in different strings
+        translation_style: Style of translation (e.g., "General", "Technical", "Literary")
+        custom_style_instructions: Additional instructions for translation style
+        terminology_file: Path to custom terminology file
+        incremental: Only send strings that changed since the run recorded in
+            the manifest next to the output
+
+    Returns:
+        Path to the saved translated file
+    """
+    try:
+        import xlrd
+    except ImportError:
+        print("❌ xlrd is not installed. Please install with: pip install xlrd")
+        return ""
+    try:
+        import openpyxl
+    except ImportError:
+        print("❌ openpyxl is not installed. Please install with: pip install openpyxl")
+        return ""
+
+    book = None
+    try:
+        if output_path is None:
+            base_name, _ = os.path.splitext(os.path.basename(input_path))
+            output_path = os.path.join(os.path.dirname(input_path), f"{base_name}-{target_lang}.xlsx")
+        elif output_path.lower().endswith(".xls"):
+            output_path = output_path[:-4] + ".xlsx"
+
+        print(f"\n🔄 Processing file: {input_path} (.xls, saved as .xlsx)")
+        print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
+
+        try:
+            book = xlrd.open_workbook(input_path, formatting_info=True, on_demand=True)
+        except NotImplementedError:
+            # Formatting is only readable from BIFF8 onwards
+            book = xlrd.open_workbook(input_path, on_demand=True)
+        with_formatting = bool(book.xf_list)
+
+        strings = _xls_strings(book)
+        print(f"   📚 {len(strings)} distinct strings in {book.nsheets} sheets")
+
+        categories = classify_column(strings, target_lang)
+        texts_to_translate = []
+        sources = []
+        for text, category in zip(strings, categories):
+            if category != TEXT:
+                continue
+            clean_string = clean_text(text)
+            if len(clean_string) >= 2:
+                texts_to_translate.append(clean_string)
+                sources.append(text)
+        print(f"   ⏩ {len(strings) - len(sources)} strings need no translation")
+
+        manifest = None
+        if incremental:
+            manifest = open_manifest(
+                output_path, source_lang, target_lang, country, detect_languages,
+                translation_style, custom_style_instructions, terminology_file
+            )
+
+        translated = {}
+        if texts_to_translate:
+            # Strings have no stable index across edits, so the manifest keys them by content
+            translations = translate_cell_texts(
+                texts_to_translate, source_lang, target_lang, country, batch_size,
+                detect_languages, translation_style, custom_style_instructions,
+                terminology_file, TranslationMemory(), TemplateCache(),
+                [f"string {k + 1}" for k in range(len(sources))],
+                manifest, [f"xls!{text}" for text in texts_to_translate]
+            )
+            translated = {source: text for source, text in zip(sources, translations) if text is not None}
+
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        styles = {}
+        for index in range(book.nsheets):
+            sheet = book.sheet_by_index(index)
+            print(f"📋 Writing sheet: {sheet.name}")
+            ws = wb.create_sheet(sheet.name[:31])
+
+            for row in range(sheet.nrows):
+                for col, cell in enumerate(sheet.row(row)):
+                    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                        continue
+                    if cell.ctype == xlrd.XL_CELL_TEXT:
+                        value = ILLEGAL_XML_CHARS_RE.sub("", translated.get(cell.value, cell.value))
+                    elif cell.ctype == xlrd.XL_CELL_DATE:
+                        try:
+                            value = xlrd.xldate_as_datetime(cell.value, book.datemode)
+                        except (ValueError, OverflowError):
+                            value = cell.value
+                    elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                        value = bool(cell.value)
+                    elif cell.ctype == xlrd.XL_CELL_ERROR:
+                        value = xlrd.error_text_from_code.get(cell.value, "#N/A")
+                    else:
+                        value = cell.value
+                    out_cell = ws.cell(row=row + 1, column=col + 1, value=value)
+                    if with_formatting:
+                        for name, attribute in _xls_style(book, cell.xf_index, styles).items():
+                            if name == "number_format" and cell.ctype == xlrd.XL_CELL_TEXT:
+                                continue
+                            setattr(out_cell, name, attribute)
+
+            for row_lo, row_hi, col_lo, col_hi in sheet.merged_cells:
+                ws.merge_cells(start_row=row_lo + 1, end_row=row_hi, start_column=col_lo + 1, end_column=col_hi)
+            for col, info in sheet.colinfo_map.items():
+                dimension = ws.column_dimensions[openpyxl.utils.get_column_letter(col + 1)]
+                if info.width:
+                    dimension.width = info.width / XLS_WIDTH_UNITS
+                dimension.hidden = bool(info.hidden)
+            book.unload_sheet(index)
+
+        print(f"\n💾 Saving translated file to: {output_path}")
+        wb.save(output_path)
+        print(f"✅ File saved successfully: {output_path} ({len(translated)} strings translated)")
+        save_manifest(manifest)
+        return output_path
+
+    except Exception as e:
+        print(f"❌ Error processing workbook: {str(e)}")
+        return ""
+
+    finally:
+        if book is not None:
+            book.release_resources()
@@ -0,0 +1,446 @@
+"""
+XLSX Processor for Advanced Translation Suite
+Translates .xlsx/.xlsm workbooks with openpyxl, without Microsoft Excel
+"""
+
+import datetime
+import os
+from copy import copy
+from typing import Optional
+
+from .excel_processor import (
+    BatchPipeline, _column_letter, clean_text, open_manifest, save_manifest, translate_cell_texts
+)
+from .cell_classifier import TEXT, classify_column, classify_grid, classify_value
+from .translation_memory import TranslationMemory
+from .masking import TemplateCache
+from .ooxml import (
+    has_shared_strings, read_shared_strings, read_text_units, repackage,
+    shared_strings_replacement, text_part_replacements
+)
+
+# Largest number of templates kept by the streaming mode
+STREAMING_TEMPLATE_LIMIT = 50000
+
+
+def process_xlsx(
+    input_path: str,
+    output_path: Optional[str] = None,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    workers: int = 1,
+    incremental: bool = False,
+) -> str:
+    """
+    Translate an .xlsx/.xlsm file in memory with openpyxl and save the result.
+
+    Cell styles, merged cells, formulas, number formats, column widths and
+    macros (.xlsm) are kept. Unlike the Excel engine, text in shapes is not
+    translated.
+
+    Args:
+        input_path: Path to the Excel file to translate
+        output_path: Path where to save the translated file (if None, auto-generated)
+        source_lang: Source language of the content (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of cells to translate in one batch
+        detect_languages: Whether to detect languages in different cells
+        translation_style: Style of translation (e.g., "General", "Technical", "Literary")
+        custom_style_instructions: Additional instructions for translation style
+        terminology_file: Path to custom terminology file
+        workers: Number of batches translated concurrently
+        incremental: Only send cells that changed since the run recorded in
+            the manifest next to the output
+
+    Returns:
+        Path to the saved translated file
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        print("❌ openpyxl is not installed. Please install with: pip install openpyxl")
+        return ""
+
+    try:
+        if output_path is None:
+            base_name, ext = os.path.splitext(os.path.basename(input_path))
+            output_path = os.path.join(os.path.dirname(input_path), f"{base_name}-{target_lang}{ext}")
+
+        print(f"\n🔄 Processing file: {input_path} (openpyxl engine)")
+        print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
+
+        # Reuse translations of repeated and near-identical cells across sheets
+        translation_memory = TranslationMemory()
+        # Cells differing only in numbers, dates or codes share one translation
+        template_cache = TemplateCache()
+        manifest = None
+        if incremental:
+            manifest = open_manifest(
+                output_path, source_lang, target_lang, country, detect_languages,
+                translation_style, custom_style_instructions, terminology_file
+            )
+
+        keep_vba = input_path.lower().endswith(".xlsm")
+        wb = openpyxl.load_workbook(input_path, keep_vba=keep_vba)
+
+        # Batches are translated on worker threads as soon as the scan has
+        # filled them and written back on this thread as they return
+        def translate_batch(batch):
+            return translate_cell_texts(
+                [text for text, _, _ in batch], source_lang, target_lang, country, batch_size,
+                detect_languages, translation_style, custom_style_instructions,
+                terminology_file, translation_memory, template_cache,
+                [f"cell {address}" for _, _, address in batch], manifest,
+                [f"{ws.title}!{address}" for _, ws, address in batch]
+            )
+
+        def write_batch(batch, translations):
+            print(f"   ✍️ Writing {sum(t is not None for t in translations)} translated cells...")
+            for (_, ws, address), translated in zip(batch, translations):
+                if translated is not None:
+                    ws[address].value = translated
+
+        with BatchPipeline(translate_batch, write_batch, batch_size, workers) as pipeline:
+            for ws in wb.worksheets:
+                print(f"📋 Processing sheet: {ws.title}")
+
+                if ws.max_row == 1 and ws.max_column == 1 and ws.cell(1, 1).value is None:
+                    print(f"   ⚠️ Sheet '{ws.title}' is empty or has no data.")
+                    continue
+
+                # Read all values of the used range at once; formulas come back as
+                # "=..." strings and the non-anchor cells of merged ranges as None
+                min_row, min_col = ws.min_row, ws.min_column
+                values = [
+                    [
+                        value if isinstance(value, (str, int, float, datetime.date, datetime.time)) else None
+                        for value in row
+                    ]
+                    for row in ws.iter_rows(min_row=min_row, max_row=ws.max_row,
+                                            min_col=min_col, max_col=ws.max_column, values_only=True)
+                ]
+
+                categories, profiles = classify_grid(values, target_lang)
+                for profile in profiles:
+                    if profile.kind != TEXT:
+                        print(f"   ⏩ Skipping column {_column_letter(min_col + profile.index)} ({profile.kind} column)")
+
+                texts_found = 0
+                skipped = {}
+                for r, row in enumerate(values):
+                    for c, value in enumerate(row):
+                        category = categories[r][c]
+                        if category != TEXT:
+                            skipped[category] = skipped.get(category, 0) + 1
+                            continue
+                        clean_cell_text = clean_text(str(value))
+                        if len(clean_cell_text) < 2:
+                            continue
+                        pipeline.add((clean_cell_text, ws, f"{_column_letter(min_col + c)}{min_row + r}"))
+                        texts_found += 1
+
+                skipped.pop("empty", None)
+                if skipped:
+                    summary = ", ".join(f"{count} {category}" for category, count in sorted(skipped.items()))
+                    print(f"   ⏩ Skipped cells that need no translation: {summary}")
+
+                if not texts_found:
+                    print(f"   ✅ No text to translate on sheet '{ws.title}'.")
+
+        print(f"\n💾 Saving translated file to: {output_path}")
+        wb.save(output_path)
+        print(f"✅ File saved successfully: {output_path}")
+        save_manifest(manifest)
+        return output_path
+
+    except Exception as e:
+        print(f"❌ Error processing workbook: {str(e)}")
+        return ""
+
+
+def _stream_value(cell):
+    value = getattr(cell, "value", None)
+    return value if isinstance(value, (str, int, float, datetime.date, datetime.time)) else None
+
+
+def process_xlsx_streaming(
+    input_path: str,
+    output_path: Optional[str] = None,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    window_rows: int = 1000,
+) -> str:
+    """
+    Translate a very large .xlsx file with bounded memory.
+
+    Rows are read with a read-only workbook and handled in windows of
+    window_rows: each window is classified, translated and written to a
+    write-only workbook before the next one is read, so memory use does not
+    grow with the number of rows. Values, formulas, number formats and cell
+    styles are kept; merged cells, column widths, frozen panes, shapes and
+    macros are not, since write-only workbooks cannot carry them. Repeated
+    cells are reused through a capped template cache rather than a
+    translation memory.
+
+    Args:
+        input_path: Path to the Excel file to translate
+        output_path: Path where to save the translated file (if None, auto-generated)
+        source_lang: Source language of the content (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of cells to translate in one batch
+        detect_languages: Whether to detect languages in different cells
+        translation_style: Style of translation (e.g., "General", "Technical", "Literary")
+        custom_style_instructions: Additional instructions for translation style
+        terminology_file: Path to custom terminology file
+        window_rows: Number of rows read, translated and written at a time
+
+    Returns:
+        Path to the saved translated file
+    """
+    try:
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+    except ImportError:
+        print("❌ openpyxl is not installed. Please install with: pip install openpyxl")
+        return ""
+
+    wb_in = None
+    try:
+        if output_path is None:
+            base_name, _ = os.path.splitext(os.path.basename(input_path))
+            output_path = os.path.join(os.path.dirname(input_path), f"{base_name}-{target_lang}.xlsx")
+
+        print(f"\n🔄 Processing file: {input_path} (streaming, {window_rows} rows per window)")
+        print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
+
+        # A translation memory would grow with every distinct row; keep only a
+        # capped template cache so memory use stays bounded
+        template_cache = TemplateCache(max_entries=STREAMING_TEMPLATE_LIMIT)
+
+        wb_in = openpyxl.load_workbook(input_path, read_only=True)
+        wb_out = openpyxl.Workbook(write_only=True)
+
+        for ws_in in wb_in.worksheets:
+            print(f"📋 Processing sheet: {ws_in.title}")
+            ws_out = wb_out.create_sheet(ws_in.title)
+            # Output style of each input style id, so styles are resolved once per sheet
+            styles = {}
+            state = {"rows": 0, "translated": 0, "first": True}
+
+            def flush(window):
+                values = [[_stream_value(cell) for cell in row] for row in window]
+                categories, _ = classify_grid(values, target_lang, has_header=state["first"])
+                state["first"] = False
+
+                texts, positions = [], []
+                for r, row in enumerate(values):
+                    for c, value in enumerate(row):
+                        if categories[r][c] == TEXT:
+                            clean_cell_text = clean_text(str(value))
+                            if len(clean_cell_text) >= 2:
+                                texts.append(clean_cell_text)
+                                positions.append((r, c))
+
+                translated = {}
+                if texts:
+                    labels = [f"cell {_column_letter(c + 1)}{state['rows'] + r + 1}" for r, c in positions]
+                    results = translate_cell_texts(
+                        texts, source_lang, target_lang, country, batch_size,
+                        detect_languages, translation_style, custom_style_instructions,
+                        terminology_file, None, template_cache, labels
+                    )
+                    translated = {pos: text for pos, text in zip(positions, results) if text is not None}
+
+                for r, row in enumerate(window):
+                    out_row = []
+                    for c, cell in enumerate(row):
+                        value = translated.get((r, c), values[r][c])
+                        if not getattr(cell, "has_style", False):
+                            out_row.append(value)
+                            continue
+                        out_cell = WriteOnlyCell(ws_out, value=value)
+                        style = styles.get(cell._style_id)
+                        if style is None:
+                            out_cell.font = cell.font
+                            out_cell.fill = cell.fill
+                            out_cell.border = cell.border
+                            out_cell.alignment = cell.alignment
+                            out_cell.number_format = cell.number_format
+                            out_cell.protection = cell.protection
+                            styles[cell._style_id] = copy(out_cell._style)
+                        else:
+                            out_cell._style = copy(style)
+                        out_row.append(out_cell)
+                    ws_out.append(out_row)
+
+                state["rows"] += len(window)
+                state["translated"] += len(translated)
+                print(f"   ✍️ Wrote {state['rows']} rows ({state['translated']} cells translated)")
+
+            window = []
+            for row in ws_in.iter_rows():
+                window.append(row)
+                if len(window) >= window_rows:
+                    flush(window)
+                    window = []
+            if window:
+                flush(window)
+
+        print(f"\n💾 Saving translated file to: {output_path}")
+        wb_out.save(output_path)
+        print(f"✅ File saved successfully: {output_path}")
+        return output_path
+
+    except Exception as e:
+        print(f"❌ Error processing workbook: {str(e)}")
+        return ""
+
+    finally:
+        if wb_in is not None:
+            wb_in.close()
+
+
+def process_xlsx_shared_strings(
+    input_path: str,
+    output_path: Optional[str] = None,
+    source_lang: str = "English",
+    target_lang: str = "Spanish",
+    country: str = "",
+    batch_size: int = 100,
+    detect_languages: bool = True,
+    translation_style: str = "General",
+    custom_style_instructions: str = "",
+    terminology_file: Optional[str] = None,
+    incremental: bool = False,
+) -> str:
+    """
+    Translate an .xlsx file through its shared strings table only.
+
+    Excel stores each distinct cell text once in xl/sharedStrings.xml, so
+    translating that part translates every cell that uses it. Each unique
+    string is translated once and only that XML part is rewritten; sheets,
+    styles and everything else are copied byte for byte, so the cost follows
+    the number of unique strings rather than the number of cells.
+
+    Text boxes and other shapes, chart titles and labels, comments and notes,
+    and sheet headers and footers are read from their own parts and go into
+    the same translation batches as the strings, so no Excel installation is
+    needed for them. Inline strings and formula results are not translated.
+    Workbooks without a shared strings table (e.g. written by openpyxl) are
+    handed to process_xlsx instead.
+
+    Args:
+        input_path: Path to the Excel file to translate
+        output_path: Path where to save the translated file (if None, auto-generated)
+        source_lang: Source language of the content (used if language detection is disabled)
+        target_lang: Target language for translation
+        country: Optional country context for translation style
+        batch_size: Maximum number of strings to translate in one batch
+        detect_languages: Whether to detect languages in different strings
+        translation_style: Style of translation (e.g., "General", "Technical", "Literary")
+        custom_style_instructions: Additional instructions for translation style
+        terminology_file: Path to custom terminology file
+        incremental: Only send strings that changed since the run recorded in
+            the manifest next to the output
+
+    Returns:
+        Path to the saved translated file
+    """
+    try:
+        if output_path is None:
+            base_name, ext = os.path.splitext(os.path.basename(input_path))
+            output_path = os.path.join(os.path.dirname(input_path), f"{base_name}-{target_lang}{ext}")
+
+        if not has_shared_strings(input_path):
+            print("   ⚠️ No shared strings table; using the openpyxl engine")
+            return process_xlsx(
+                input_path, output_path, source_lang, target_lang, country, batch_size,
+                detect_languages, translation_style, custom_style_instructions, terminology_file,
+                incremental=incremental
+            )
+
+        print(f"\n🔄 Processing file: {input_path} (shared strings)")
+        print(f"   Source: {source_lang}, Target: {target_lang}, Country: {country}")
+
+        strings = read_shared_strings(input_path)
+        print(f"   📚 {len(strings)} shared strings")
+
+        categories = classify_column(strings, target_lang)
+        texts_to_translate = []
+        indices = []
+        for index, (text, category) in enumerate(zip(strings, categories)):
+            if category != TEXT:
+                continue
+            clean_string = clean_text(text)
+            if len(clean_string) >= 2:
+                texts_to_translate.append(clean_string)
+                indices.append(index)
+        print(f"   ⏩ {len(strings) - len(indices)} strings need no translation")
+        labels = [f"shared string {index}" for index in indices]
+        keys = [f"sst!{index}" for index in indices]
+
+        # Shapes, charts, comments and headers/footers join the same batches
+        units = []
+        units_found = 0
+        for unit in read_text_units(input_path):
+            units_found += 1
+            clean_unit = clean_text(unit.text)
+            if len(clean_unit) >= 2 and classify_value(clean_unit, target_lang) == TEXT:
+                texts_to_translate.append(clean_unit)
+                labels.append(f"{unit.kind} in {unit.part}")
+                keys.append(f"{unit.part}#{unit.index}")
+                units.append(unit)
+        if units_found:
+            print(f"   🔷 {len(units)} of {units_found} texts in shapes, charts, comments and headers/footers to translate")
+
+        manifest = None
+        if incremental:
+            manifest = open_manifest(
+                output_path, source_lang, target_lang, country, detect_languages,
+                translation_style, custom_style_instructions, terminology_file
+            )
+
+        replacements = {}
+        unit_replacements = {}
+        if texts_to_translate:
+            # Table indices shift when strings are added; moved strings are found by their hash
+            translations = translate_cell_texts(
+                texts_to_translate, source_lang, target_lang, country, batch_size,
+                detect_languages, translation_style, custom_style_instructions,
+                terminology_file, TranslationMemory(), TemplateCache(),
+                labels, manifest, keys
+            )
+            replacements = {
+                index: text for index, text in zip(indices, translations[:len(indices)]) if text is not None
+            }
+            unit_replacements = {
+                (unit.part, unit.index): text
+                for unit, text in zip(units, translations[len(indices):]) if text is not None
+            }
+
+        print(f"\n💾 Saving translated file to: {output_path}")
+        parts = shared_strings_replacement(input_path, replacements)
+        parts.update(text_part_replacements(input_path, unit_replacements))
+        repackage(input_path, output_path, parts)
+        print(f"✅ File saved successfully: {output_path} "
+              f"({len(replacements)} strings and {len(unit_replacements)} other texts translated)")
+        save_manifest(manifest)
+        return output_path
+
+    except Exception as e:
+        print(f"❌ Error processing workbook: {str(e)}")
+        return ""
@@ -0,0 +1,27 @@
+import os
+import unicodedata
+
+import pytest
+
+from src.translator.glossary import load_glossary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_GLOSSARY = os.path.join(ROOT, "examples", "Thuật ngữ chuyên nghành", "Taichinh.xlsx")
+
+
+def test_vietnamese_headers_of_bundled_example_are_skipped():
+    pytest.importorskip("openpyxl")
+    glossary = load_glossary(EXAMPLE_GLOSSARY)
+
+    # Each section of the sheet repeats the "Tên tiếng Việt | Tên tiếng Anh" header
+    assert "Tên tiếng Việt" not in glossary
+    assert glossary["Bộ thu hồi nhiệt gió"] == "Air economizer"
+    assert glossary["Vít lấy tro đầu lò"] == "Front ash screw conveyor"
+
+
+def test_decomposed_vietnamese_header_is_skipped(tmp_path):
+    path = tmp_path / "glossary.csv"
+    header = unicodedata.normalize("NFD", "Tiếng Việt,Tiếng Anh")
+    path.write_text(f"{header}\nLò hơi,Boiler\n", encoding="utf-8")
+
+    assert dict(load_glossary(str(path))) == {"Lò hơi": "Boiler"}
@@ -0,0 +1,68 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load when a translation or document actually needs them
+HEAVY_MODULES = ("openai", "tiktoken", "fitz", "pymupdf", "openpyxl", "pandas", "gradio")
+
+# Cumulative import time of the package itself, in microseconds
+IMPORT_BUDGET_US = 200_000
+
+
+def test_package_import_is_lazy_and_fast():
+    code = (
+        "import sys, src.translator; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, timeout=60, check=True,
+    )
+
+    assert result.stdout.strip() == ""
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \|\s+src\.translator$", result.stderr, re.M)
+    assert match is not None, result.stderr[-2000:]
+    assert int(match.group(1)) < IMPORT_BUDGET_US
+
+
+def _timed_in_fresh_interpreter(statement):
+    """Run statement in a new interpreter; return the heavy modules it loaded and its time in microseconds."""
+    code = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = round((time.perf_counter() - started) * 1e6)\n"
+        f"print(elapsed, ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60, check=True,
+    )
+    elapsed, _, loaded = result.stderr.strip().splitlines()[-1].partition(" ")
+    return loaded, int(elapsed)
+
+
+def test_text_translator_import_is_lazy_and_fast():
+    # Lazy exports are loaded through importlib, which -X importtime does not report
+    loaded, elapsed = _timed_in_fresh_interpreter("from src.translator import simple_translator")
+
+    assert loaded == ""
+    assert elapsed < IMPORT_BUDGET_US
+
+
+def test_text_command_help_is_lazy_and_fast():
+    loaded, elapsed = _timed_in_fresh_interpreter(
+        "import contextlib, io, runpy\n"
+        "sys.argv = ['run.py', 'text', '--help']\n"
+        "with contextlib.redirect_stdout(io.StringIO()) as out:\n"
+        "    try:\n"
+        "        runpy.run_path('run.py', run_name='__main__')\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        "assert '--target' in out.getvalue()"
+    )
+
+    assert loaded == ""
+    assert elapsed < IMPORT_BUDGET_US
@@ -0,0 +1,159 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.translator.ooxml import (
+    MAIN_NS, read_shared_strings, read_text_units, repackage, text_part_replacements, write_shared_strings
+)
+
+openpyxl = pytest.importorskip("openpyxl")
+
+PREFIXED_SST = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<x:sst xmlns:x="' + MAIN_NS.encode() + b'" '
+    b'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    b'xmlns:ext="urn:example:ext" count="3" uniqueCount="3">'
+    b'<x:si><x:t>Product</x:t></x:si>'
+    b'<x:si ext:id="7"><x:r><x:rPr><x:b/></x:rPr><x:t xml:space="preserve">Total </x:t></x:r>'
+    b'<x:r><x:t>sales</x:t></x:r></x:si>'
+    b'<x:si><x:t>Unchanged</x:t></x:si>'
+    b'</x:sst>'
+)
+
+
+def _workbook_with_sst(path, sst_xml):
+    """An .xlsx whose first sheet refers to three shared strings stored as sst_xml."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws["A1"], ws["A2"], ws["A3"] = "Product", "Total sales", "Unchanged"
+    wb.save(path)
+    with zipfile.ZipFile(path) as zf:
+        items = {name: zf.read(name) for name in zf.namelist()}
+
+    # openpyxl writes inline strings; point the cells at the shared string table instead
+    index = iter(range(3))
+    items["xl/worksheets/sheet1.xml"] = re.sub(
+        rb'(<c r="A\d" )t="inlineStr"><is><t>.*?</t></is></c>',
+        lambda m: m.group(1) + b't="s"><v>' + str(next(index)).encode() + b"</v></c>",
+        items["xl/worksheets/sheet1.xml"],
+    )
+    items["xl/sharedStrings.xml"] = sst_xml
+    items["[Content_Types].xml"] = items["[Content_Types].xml"].replace(
+        b"</Types>",
+        b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+        b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>',
+    )
+    items["xl/_rels/workbook.xml.rels"] = items["xl/_rels/workbook.xml.rels"].replace(
+        b"</Relationships>",
+        b'<Relationship Id="rIdSst" Type="http://schemas.openxmlformats.org/officeDocument/'
+        b'2006/relationships/sharedStrings" Target="sharedStrings.xml"/></Relationships>',
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in items.items():
+            zf.writestr(name, data)
+
+
+def test_prefixed_shared_strings_round_trip(tmp_path):
+    source = str(tmp_path / "prefixed.xlsx")
+    output = str(tmp_path / "prefixed-vi.xlsx")
+    _workbook_with_sst(source, PREFIXED_SST)
+    assert read_shared_strings(source) == ["Product", "Total sales", "Unchanged"]
+
+    write_shared_strings(source, output, {0: "Sản phẩm", 1: "Tổng doanh số"})
+
+    with zipfile.ZipFile(output) as zf:
+        root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+    items = list(root)
+    assert root.tag == f"{{{MAIN_NS}}}sst"
+    assert all(item.tag == f"{{{MAIN_NS}}}si" for item in items)
+    assert items[1].get("{urn:example:ext}id") == "7"
+
+    ws = openpyxl.load_workbook(output).active
+    assert [ws["A1"].value, ws["A2"].value, ws["A3"].value] == ["Sản phẩm", "Tổng doanh số", "Unchanged"]
+
+
+def test_undeclared_namespace_gets_local_declaration(tmp_path):
+    source = str(tmp_path / "undeclared.xlsx")
+    output = str(tmp_path / "undeclared-vi.xlsx")
+    sst_xml = PREFIXED_SST.replace(b'xmlns:ext="urn:example:ext" ', b"").replace(
+        b'<x:si ext:id="7">', b'<x:si><ext:note xmlns:ext="urn:example:ext" ext:by="me"/>'
+    )
+    _workbook_with_sst(source, sst_xml)
+
+    write_shared_strings(source, output, {2: "Không đổi"})
+
+    with zipfile.ZipFile(output) as zf:
+        root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+    note = root[1][0]
+    assert note.tag == "{urn:example:ext}note"
+    assert note.get("{urn:example:ext}by") == "me"
+    assert openpyxl.load_workbook(output).active["A3"].value == "Không đổi"
+
+
+def test_children_other_than_strings_are_kept(tmp_path):
+    source = str(tmp_path / "extlst.xlsx")
+    output = str(tmp_path / "extlst-vi.xlsx")
+    ext_list = (
+        b'<x:extLst><x:ext uri="{00000000-0000-0000-0000-000000000001}">'
+        b'<ext:data ext:kind="sst">kept</ext:data></x:ext></x:extLst>'
+    )
+    _workbook_with_sst(source, PREFIXED_SST.replace(b"</x:sst>", ext_list + b"</x:sst>"))
+    assert read_shared_strings(source) == ["Product", "Total sales", "Unchanged"]
+
+    write_shared_strings(source, output, {2: "Không đổi"})
+
+    with zipfile.ZipFile(output) as zf:
+        root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+    assert [child.tag for child in root] == [f"{{{MAIN_NS}}}si"] * 3 + [f"{{{MAIN_NS}}}extLst"]
+    data = root.find(f"{{{MAIN_NS}}}extLst/{{{MAIN_NS}}}ext/{{urn:example:ext}}data")
+    assert data.text == "kept" and data.get("{urn:example:ext}kind") == "sst"
+    assert openpyxl.load_workbook(output).active["A3"].value == "Không đổi"
+
+
+def _workbook_with_header(path, header):
+    wb = openpyxl.Workbook()
+    wb.active["A1"] = "Revenue"
+    wb.active.oddHeader.center.text = header
+    wb.save(path)
+
+
+def _translate_headers(source, output, translate):
+    units = read_text_units(source)
+    translations = {(unit.part, unit.index): translate(unit.text) for unit in units}
+    repackage(source, output, text_part_replacements(source, translations))
+    return units
+
+
+def test_header_ampersand_is_escaped(tmp_path):
+    source = str(tmp_path / "header.xlsx")
+    output = str(tmp_path / "header-vi.xlsx")
+    _workbook_with_header(source, "Sales report")
+
+    _translate_headers(source, output, lambda text: "Sales & costs")
+
+    with zipfile.ZipFile(output) as zf:
+        sheet = zf.read("xl/worksheets/sheet1.xml")
+    assert b"&amp;CSales &amp;&amp; costs</oddHeader>" in sheet
+    assert openpyxl.load_workbook(output).active.oddHeader.center.text == "Sales && costs"
+
+
+def test_parts_found_through_default_content_type(tmp_path):
+    source = str(tmp_path / "defaults.xlsx")
+    output = str(tmp_path / "defaults-vi.xlsx")
+    _workbook_with_header(str(tmp_path / "plain.xlsx"), "Sales report")
+
+    # Drop the worksheet's <Override>, leaving it the generic <Default Extension="xml">
+    with zipfile.ZipFile(str(tmp_path / "plain.xlsx")) as zin, zipfile.ZipFile(source, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info)
+            if info.filename == "[Content_Types].xml":
+                data = re.sub(rb'<Override PartName="/xl/worksheets/sheet1.xml"[^>]*/>', b"", data)
+                assert b"spreadsheetml.worksheet" not in data
+            zout.writestr(info, data)
+
+    units = _translate_headers(source, output, lambda text: "Báo cáo doanh số")
+
+    assert [(unit.part, unit.kind, unit.text) for unit in units] == [("xl/worksheets/sheet1.xml", "header", "Sales report")]
+    assert read_text_units(output)[0].text == "Báo cáo doanh số"
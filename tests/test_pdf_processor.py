@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+pytest.importorskip("pymupdf")
+pytest.importorskip("reportlab")
+
+from src.translator import pdf_processor, translator_core
+from src.translator.journal import job_journal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_PDF = os.path.join(ROOT, "examples", "oldmansea_split (1).pdf")
+
+
+@pytest.fixture
+def stub_translator(monkeypatch):
+    """Translate by prefixing each text and detect every paragraph as English."""
+    calls = []
+
+    def batch_translate(source_texts, source_langs=None, **kwargs):
+        calls.append((list(source_texts), source_langs))
+        return [f"VI {text}" for text in source_texts]
+
+    monkeypatch.setattr(pdf_processor, "batch_translate", batch_translate)
+    monkeypatch.setattr(translator_core, "detect_language", lambda text: "English")
+    return calls
+
+
+def test_process_pdf_with_language_detection(tmp_path, stub_translator):
+    pdf_path, txt_path = pdf_processor.process_pdf(
+        EXAMPLE_PDF, str(tmp_path / "out"), target_lang="Vietnamese", detect_languages=True
+    )
+
+    assert pdf_path and os.path.exists(pdf_path)
+    text = open(txt_path, encoding="utf-8").read()
+    assert "VI " in text
+    assert stub_translator and all(langs for _, langs in stub_translator)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_pdf_is_laid_out_in_the_target_language(tmp_path, monkeypatch, stub_translator, streaming):
+    languages = []
+
+    class RecordingLayout(pdf_processor.TextLayout):
+        def __init__(self, measure, max_width, language=None):
+            languages.append(language)
+            super().__init__(measure, max_width, language)
+
+    monkeypatch.setattr(pdf_processor, "TextLayout", RecordingLayout)
+    pdf_processor.process_pdf(
+        EXAMPLE_PDF, str(tmp_path / "out"), target_lang="Spanish", detect_languages=False, streaming=streaming
+    )
+
+    assert languages and set(languages) == {"es"}
+
+
+def test_streaming_with_language_detection(tmp_path, stub_translator):
+    expected = pdf_processor.process_pdf(
+        EXAMPLE_PDF, str(tmp_path / "full"), target_lang="Vietnamese", detect_languages=True
+    )
+    pdf_path, txt_path = pdf_processor.process_pdf(
+        EXAMPLE_PDF, str(tmp_path / "stream"), target_lang="Vietnamese", detect_languages=True,
+        streaming=True, window_pages=1
+    )
+
+    assert pdf_path and os.path.exists(pdf_path)
+    assert open(txt_path, encoding="utf-8").read() == open(expected[1], encoding="utf-8").read()
+    assert not os.path.exists(pdf_path + pdf_processor.CHECKPOINT_SUFFIX)
+    assert not os.path.exists(pdf_path + pdf_processor.PARTS_SUFFIX)
+
+
+def test_pdf_job_resumes_from_journal(tmp_path, monkeypatch):
+    requests = {"detect": 0, "translate": 0}
+
+    def detect_language(text):
+        requests["detect"] += 1
+        return "English"
+
+    def translate_segments(segments, *args, **kwargs):
+        requests["translate"] += 1
+        return [f"VI {segment}" for segment in segments]
+
+    monkeypatch.setattr(translator_core, "detect_language", detect_language)
+    monkeypatch.setattr(translator_core, "_translate_segments", translate_segments)
+    jobs = str(tmp_path / "jobs")
+
+    # First run is "interrupted": its journal is kept
+    with job_journal("pdf-job", directory=jobs):
+        first = pdf_processor.process_pdf(EXAMPLE_PDF, str(tmp_path / "first"), target_lang="Vietnamese")
+    assert requests["detect"] and requests["translate"]
+
+    requests.update(detect=0, translate=0)
+    with job_journal("pdf-job", resume=True, directory=jobs) as journal:
+        second = pdf_processor.process_pdf(EXAMPLE_PDF, str(tmp_path / "second"), target_lang="Vietnamese")
+        assert journal.reused
+
+    assert requests == {"detect": 0, "translate": 0}
+    assert open(second[1], encoding="utf-8").read() == open(first[1], encoding="utf-8").read()
+
+
+def _three_page_pdf(path):
+    import pymupdf
+
+    with pymupdf.open() as doc:
+        for number in range(1, 4):
+            page = doc.new_page()
+            # Lines holding a space come back as the blank lines that separate paragraphs
+            page.insert_text((72, 72), f"Page {number} opens here.\n \nPage {number} closes here.\n \n")
+        doc.save(path)
+    return path
+
+
+def test_streaming_resume_after_crash_before_checkpoint(tmp_path, monkeypatch, stub_translator):
+    source = _three_page_pdf(str(tmp_path / "three.pdf"))
+    _, expected_txt = pdf_processor.process_pdf(
+        source, str(tmp_path / "full"), target_lang="Vietnamese", detect_languages=False,
+        streaming=True, window_pages=1
+    )
+
+    # Crash after page 2 is written to the TXT but before its checkpoint is saved
+    save_checkpoint = pdf_processor._save_checkpoint
+    saves = []
+
+    def crashing_save(path, data):
+        saves.append(data["next_page"])
+        if len(saves) == 2:
+            raise OSError("disk full")
+        save_checkpoint(path, data)
+
+    monkeypatch.setattr(pdf_processor, "_save_checkpoint", crashing_save)
+    output = str(tmp_path / "stream")
+    assert pdf_processor.process_pdf(
+        source, output, target_lang="Vietnamese", detect_languages=False, streaming=True, window_pages=1
+    ) == ("", "")
+
+    monkeypatch.setattr(pdf_processor, "_save_checkpoint", save_checkpoint)
+    pdf_path, txt_path = pdf_processor.process_pdf(
+        source, output, target_lang="Vietnamese", detect_languages=False, streaming=True,
+        window_pages=1, resume=True
+    )
+
+    assert pdf_path and os.path.exists(pdf_path)
+    text = open(txt_path, encoding="utf-8").read()
+    assert text.count("Page 2 opens here.") == 1
+    assert text == open(expected_txt, encoding="utf-8").read()
@@ -0,0 +1,33 @@
+import pytest
+
+from src.translator.text_layout import TextLayout
+
+
+def test_cjk_line_breaks_between_characters():
+    layout = TextLayout(len, 5)
+
+    lines = layout.wrap("日本語のテキストです。")
+
+    # The closing full stop hangs past the margin instead of starting a line
+    assert lines == ["日本語のテ", "キストです。"]
+
+
+def test_hyphenated_words_break_after_their_hyphens():
+    layout = TextLayout(len, 12)
+
+    lines = layout.wrap("A well-known state-of-the-art design")
+
+    assert lines == ["A well-known", "state-of-", "the-art", "design"]
+
+
+def test_dictionary_hyphenation_for_the_given_language():
+    pytest.importorskip("pyphen")
+    layout = TextLayout(len, 10, language="en")
+
+    lines = layout.wrap("An extraordinary translation")
+
+    assert any(line.endswith("-") for line in lines)
+    assert all(len(line) <= 10 for line in lines)
+    assert "".join(line[:-1] if line.endswith("-") else line + " " for line in lines).split() == [
+        "An", "extraordinary", "translation"
+    ]
@@ -0,0 +1,66 @@
+import random
+import time
+
+from src.translator.translation_memory import TranslationMemory, _bounded_levenshtein, _normalize
+
+LABELS = (
+    "Total revenue", "Net income", "Operating expenses", "Gross margin", "Cost of sales",
+    "Total assets", "Total liabilities", "Cash flow", "Interest expense", "Tax expense",
+)
+
+# Average fuzzy lookup time allowed on the repetitive rows, in milliseconds
+LOOKUP_BUDGET_MS = 1.0
+
+
+def _financial_row(k):
+    return f"{LABELS[k % 10]} Division {k // 10} {2000 + k % 25}"
+
+
+def _edit_distance(a, b):
+    return _bounded_levenshtein(a, b, max(len(a), len(b)))
+
+
+def test_lookup_on_repetitive_rows_is_fast():
+    rows = 200_000
+    memory = TranslationMemory()
+    for k in range(rows):
+        memory.add(_financial_row(k), f"VI {k}")
+
+    # Every piece of "Total revenue Division" is shared by tens of thousands of rows
+    rng = random.Random(7)
+    picks = [rng.randrange(rows) for _ in range(300)]
+    queries = [_financial_row(k) + "." for k in picks]
+
+    started = time.perf_counter()
+    matches = [memory.lookup(query) for query in queries]
+    elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    assert [match.target if match else None for match in matches] == [f"VI {k}" for k in picks]
+    assert elapsed_ms < LOOKUP_BUDGET_MS, f"{elapsed_ms:.3f} ms per lookup"
+
+
+def test_lookup_finds_the_most_similar_segment():
+    rng = random.Random(3)
+    sources = {f"{rng.choice(LABELS)} Division {rng.randrange(40)} {rng.randrange(2020, 2025)}" for _ in range(300)}
+    memory = TranslationMemory()
+    for source in sources:
+        memory.add(source, source)
+
+    for _ in range(200):
+        chars = list(rng.choice(sorted(sources)))
+        for _ in range(rng.randint(1, 3)):
+            position = rng.randrange(len(chars))
+            if rng.random() < 0.5:
+                chars[position] = rng.choice("0123456789x")
+            else:
+                chars.insert(position, rng.choice("0123456789x"))
+        query = "".join(chars)
+
+        norm = _normalize(query)
+        expected = max(1.0 - _edit_distance(norm, _normalize(source)) / max(len(norm), len(_normalize(source)))
+                       for source in sources)
+        match = memory.lookup(query)
+        if expected < memory.threshold:
+            assert match is None, query
+        else:
+            assert match is not None and abs(match.similarity - expected) < 1e-9, query
@@ -0,0 +1,190 @@
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.translator import translator_core
+from src.translator.journal import job_journal
+from src.translator.manifest import translation_settings
+
+
+@pytest.fixture
+def fresh_encodings():
+    translator_core._get_encoding.cache_clear()
+    yield
+    translator_core._get_encoding.cache_clear()
+
+
+def _fake_tiktoken(monkeypatch, get_encoding):
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+
+
+def test_encoding_loaded_even_when_not_cached(monkeypatch, tmp_path, fresh_encodings):
+    # An empty cache no longer short-circuits: tiktoken may download the file
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    encoding = types.SimpleNamespace(encode=lambda text: text.split())
+    _fake_tiktoken(monkeypatch, lambda name: encoding)
+
+    assert translator_core._get_encoding("cl100k_base") is encoding
+    assert translator_core.num_tokens_in_string("one two three", "cl100k_base") == 3
+
+
+def test_estimate_when_encoding_cannot_load(monkeypatch, tmp_path, fresh_encodings):
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+
+    def offline(name):
+        raise ConnectionError("offline")
+
+    _fake_tiktoken(monkeypatch, offline)
+
+    assert translator_core._get_encoding("cl100k_base") is None
+    assert translator_core.num_tokens_in_string("x" * 40, "cl100k_base") == 10
+
+
+class _FakeClient:
+    """OpenAI-style client answering after a delay, recording when each request started."""
+
+    def __init__(self, answer, delay):
+        self.answer = answer
+        self.delay = delay
+        self.starts = []
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.starts.append(time.monotonic())
+        time.sleep(self.delay)
+        message = types.SimpleNamespace(content=self.answer)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """Install fake primary and backup clients on their own hedge pools."""
+    def install(primary_delay, backup_delay, rpm=6000, budget=1.0, workers=2, hedge_delay=0.2):
+        primary = _FakeClient("primary", primary_delay)
+        backup = _FakeClient("backup", backup_delay)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        backup_executor = ThreadPoolExecutor(max_workers=workers)
+        monkeypatch.setattr(translator_core, "client", primary)
+        monkeypatch.setattr(translator_core, "backup_client", backup)
+        monkeypatch.setattr(translator_core, "_hedge_executor", executor)
+        monkeypatch.setattr(translator_core, "_backup_executor", backup_executor)
+        monkeypatch.setattr(translator_core, "HEDGE_DEFAULT_DELAY", hedge_delay)
+        monkeypatch.setitem(translator_core.current_config, "rpm", rpm)
+        monkeypatch.setitem(translator_core.current_config, "hedge_budget", budget)
+        translator_core.hedge_stats.reset()
+        installed.extend([executor, backup_executor])
+        return primary, backup
+
+    installed = []
+    yield install
+    for executor in installed:
+        executor.shutdown(wait=True)
+    translator_core.hedge_stats.reset()
+
+
+def test_hedge_clock_starts_when_primary_runs(hedging):
+    primary, backup = hedging(primary_delay=0.05, backup_delay=0.0)
+    # Keep both hedge threads busy so the primary waits longer than the hedge delay
+    blockers = [translator_core._hedge_executor.submit(time.sleep, 0.3) for _ in range(2)]
+
+    answer = translator_core._hedged_completion("model", 0.0, False, "system", "prompt")
+
+    assert answer == "primary"
+    assert backup.starts == []
+    assert translator_core.hedge_stats.hedged == 0
+    assert translator_core.hedge_stats.latencies[0] < 0.2
+    for blocker in blockers:
+        blocker.result()
+
+
+def test_backups_do_not_wait_for_busy_primary_workers(hedging):
+    primary, backup = hedging(primary_delay=0.3, backup_delay=0.6, workers=1, hedge_delay=0.05)
+
+    first = translator_core._hedged_completion("model", 0.0, False, "system", "prompt")
+    first_done = time.monotonic()
+    second = translator_core._hedged_completion("model", 0.0, False, "system", "prompt")
+
+    assert [first, second] == ["primary", "primary"]
+    # The backup starts while the primary holds the only primary worker ...
+    assert backup.starts[0] - primary.starts[0] < 0.2
+    # ... and the next primary does not queue behind the losing backup
+    assert primary.starts[1] - first_done < 0.1
+    assert translator_core.get_hedge_stats()["hedged"] == 2
+
+
+def test_backup_requests_are_rate_limited(hedging):
+    primary, backup = hedging(primary_delay=0.6, backup_delay=0.0, rpm=300, workers=8, hedge_delay=0.05)
+
+    answers = [translator_core._hedged_completion("model", 0.0, False, "system", "prompt") for _ in range(2)]
+
+    assert answers == ["backup", "backup"]
+    # 300 requests per minute leaves at least 0.2 s between backup requests
+    assert backup.starts[1] - backup.starts[0] >= 0.19
+
+
+def test_language_detections_are_journaled_per_batch(monkeypatch, tmp_path):
+    detected = []
+
+    def detect_language(text):
+        detected.append(text)
+        return "English"
+
+    monkeypatch.setattr(translator_core, "detect_language", detect_language)
+    texts = [f"paragraph number {k}" for k in range(25)]
+
+    with job_journal("detect", directory=str(tmp_path)) as journal:
+        assert translator_core.detect_text_languages(texts, batch_size=10) == ["English"] * 25
+        assert journal.batches == 3
+
+    detected.clear()
+    with job_journal("detect", resume=True, directory=str(tmp_path)):
+        assert translator_core.detect_text_languages(texts, batch_size=10) == ["English"] * 25
+    assert detected == []
+
+
+def test_journal_is_only_resumed_with_the_same_settings(monkeypatch, tmp_path):
+    requests = []
+
+    def translate_segments(segments, *args, **kwargs):
+        requests.append(list(segments))
+        return [f"VI {segment}" for segment in segments]
+
+    monkeypatch.setattr(translator_core, "_translate_segments", translate_segments)
+    texts = ["Revenue", "Net income"]
+    formal = translation_settings("English", "Vietnamese", "Vietnam", translation_style="Formal")
+    casual = translation_settings("English", "Vietnamese", "Vietnam", translation_style="Casual")
+
+    with job_journal("settings", directory=str(tmp_path), settings=formal):
+        translator_core.batch_translate(source_texts=texts, source_lang="English", target_lang="Vietnamese")
+
+    requests.clear()
+    with job_journal("settings", resume=True, directory=str(tmp_path), settings=casual) as journal:
+        translator_core.batch_translate(source_texts=texts, source_lang="English", target_lang="Vietnamese")
+        assert journal.reused == 0
+    assert requests == [texts]
+
+    # The journal now belongs to the casual run
+    requests.clear()
+    with job_journal("settings", resume=True, directory=str(tmp_path), settings=casual) as journal:
+        translator_core.batch_translate(source_texts=texts, source_lang="English", target_lang="Vietnamese")
+        assert journal.reused == 2
+    assert requests == []
+
+
+def test_short_placeholder_retry_keeps_source_text(monkeypatch):
+    answers = [
+        # First answer loses both placeholders, the retry answers only the second segment
+        ["VI Pay now", "VI Owe later"],
+        ["VI Owe [[N1]] later"],
+    ]
+    monkeypatch.setattr(translator_core, "_translate_segments", lambda segments, *args, **kwargs: answers.pop(0))
+
+    result = translator_core.batch_translate(
+        source_texts=["Pay 100 now", "Owe 200 later"], source_lang="English", target_lang="Vietnamese"
+    )
+
+    assert result == ["Pay 100 now", "Owe 200 later"]
+    assert answers == []